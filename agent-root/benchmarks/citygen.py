@@ -0,0 +1,186 @@
+import math
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+# Default reference time generated timestamps lead up to, fixed so a seed always gives the same data
+REFERENCE_TIME = datetime(2025, 7, 1, 12, 0)
+
+# Bangalore city bounds used for background noise
+CITY_BOUNDS = (12.85, 77.48, 13.10, 77.75)
+
+# Recurring trouble spots: (name, lat, lng, relative weight, spread in km, typical categories)
+HOTSPOTS = [
+    ("Silk Board Junction", 12.9177, 77.6238, 10, 0.4, ["traffic", "water-logging"]),
+    ("KR Puram-Whitefield ORR", 12.9960, 77.6950, 8, 0.8, ["traffic", "water-logging"]),
+    ("Marathahalli Bridge", 12.9569, 77.7011, 7, 0.5, ["traffic", "infrastructure"]),
+    ("Hebbal Flyover", 13.0358, 77.5970, 7, 0.5, ["traffic"]),
+    ("Electronic City Flyover", 12.8452, 77.6602, 5, 0.7, ["traffic", "public-transport"]),
+    ("Majestic Bus Stand", 12.9767, 77.5713, 6, 0.3, ["public-transport", "stampede"]),
+    ("MG Road Metro", 12.9756, 77.6066, 5, 0.3, ["public-transport", "events"]),
+    ("Koramangala 80ft Road", 12.9352, 77.6245, 4, 0.6, ["civic-issues", "events"]),
+    ("Indiranagar 100ft Road", 12.9719, 77.6412, 4, 0.5, ["events", "security"]),
+    ("Bellandur Lake Road", 12.9304, 77.6784, 4, 0.6, ["water-logging", "civic-issues"]),
+    ("Yeshwanthpur Junction", 13.0280, 77.5409, 3, 0.5, ["traffic", "utility"]),
+    ("Jayanagar 4th Block", 12.9250, 77.5938, 3, 0.4, ["civic-issues", "utility"]),
+]
+
+# Report texts per category; each contains keywords the categorizer recognizes
+TEMPLATES = {
+    "traffic": [
+        "Heavy traffic jam near {place}, vehicles barely moving.",
+        "Gridlock at {place} after a signal failure, expect long delay.",
+        "Accident near {place} has blocked two lanes, commuters stuck.",
+    ],
+    "water-logging": [
+        "Road flooded near {place} after heavy rain, underpass submerged.",
+        "Drain overflowing at {place}, water-logging up to knee level.",
+    ],
+    "infrastructure": [
+        "Huge potholes on the road at {place}, repair work incomplete.",
+        "Construction digging at {place} with no barricade, footpath broken.",
+    ],
+    "public-transport": [
+        "Buses delayed at {place}, metro overcrowded during peak hours.",
+        "Metro service halted near {place} due to a track fault.",
+    ],
+    "stampede": [
+        "Overcrowded platform at {place}, people pushing and panic building.",
+    ],
+    "events": [
+        "Large crowd gathering for a concert near {place}.",
+        "Protest rally moving through {place}, roads partially closed.",
+    ],
+    "civic-issues": [
+        "Garbage piling up at {place}, strong smell and stray dogs around.",
+        "Waste burning near {place} causing air pollution.",
+    ],
+    "security": [
+        "Chain snatching reported near {place}, people feel unsafe.",
+        "Suspicious activity near {place} late at night.",
+    ],
+    "utility": [
+        "Power cut across {place} for three hours, no electricity.",
+        "No water supply in {place} since morning, low pressure.",
+    ],
+    "weather": [
+        "Heavy rain and strong winds near {place}, low visibility.",
+    ],
+    "emergency": [
+        "Fire reported near {place}, ambulance and police on the way.",
+    ],
+}
+
+BACKGROUND_CATEGORIES = list(TEMPLATES.keys())
+
+
+class CityLoadGenerator:
+    """
+    Synthetic Bangalore feeds and user reports for benchmarks.
+
+    Most items fall around weighted hotspots with a Gaussian spread, the rest
+    are scattered uniformly over the city. A share of items are repeat reports
+    of a recent incident a few metres away, which is what synthesis clusters.
+    Observation times follow morning and evening peaks over the `days` days
+    up to `now` (REFERENCE_TIME by default), so the same seed and reference
+    time give the same data every run.
+    """
+
+    def __init__(self, seed: int = 7, background_fraction: float = 0.15, duplicate_fraction: float = 0.3,
+                 days: int = 7, now: Optional[datetime] = None):
+        self.rng = random.Random(seed)
+        self.background_fraction = background_fraction
+        self.duplicate_fraction = duplicate_fraction
+        self.days = days
+        self.now = now or REFERENCE_TIME
+        self._weights = [hotspot[3] for hotspot in HOTSPOTS]
+        self._recent: List[tuple] = []
+
+    def _point(self):
+        """Return (place, lat, lng, categories) for one report"""
+        if self._recent and self.rng.random() < self.duplicate_fraction:
+            place, lat, lng, categories = self.rng.choice(self._recent)
+            # Within a few metres of the original report
+            return place, lat + self.rng.gauss(0, 2e-5), lng + self.rng.gauss(0, 2e-5), categories
+
+        incident = self._incident()
+        self._recent.append(incident)
+        if len(self._recent) > 200:
+            self._recent.pop(0)
+        return incident
+
+    def _incident(self):
+        if self.rng.random() < self.background_fraction:
+            min_lat, min_lng, max_lat, max_lng = CITY_BOUNDS
+            lat = self.rng.uniform(min_lat, max_lat)
+            lng = self.rng.uniform(min_lng, max_lng)
+            return "Bengaluru", lat, lng, [self.rng.choice(BACKGROUND_CATEGORIES)]
+
+        name, lat, lng, _, spread_km, categories = self.rng.choices(HOTSPOTS, weights=self._weights)[0]
+        # One degree of latitude is ~111 km; longitude shrinks with cos(latitude)
+        lat += self.rng.gauss(0, spread_km) / 111.0
+        lng += self.rng.gauss(0, spread_km) / (111.0 * math.cos(math.radians(lat)))
+        picked = [self.rng.choice(categories)]
+        if self.rng.random() < 0.2:
+            picked.append(self.rng.choice(BACKGROUND_CATEGORIES))
+        return name, lat, lng, picked
+
+    def _text(self, place: str, categories: List[str]) -> str:
+        return " ".join(self.rng.choice(TEMPLATES[category]).format(place=place) for category in categories)
+
+    def _timestamp(self) -> datetime:
+        """A time in the last `days` days, weighted towards 8-11am and 5-9pm"""
+        day = self.rng.randrange(self.days)
+        roll = self.rng.random()
+        if roll < 0.35:
+            hour = self.rng.uniform(8, 11)
+        elif roll < 0.75:
+            hour = self.rng.uniform(17, 21)
+        else:
+            hour = self.rng.uniform(0, 24)
+        start = (self.now - timedelta(days=day)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return min(self.now, start + timedelta(hours=hour))
+
+    def feed_items(self, count: int, start: int = 0) -> List[Dict[str, Any]]:
+        """Items in the shape served by /api/twitter-feed"""
+        items = []
+        for i in range(start, start + count):
+            place, lat, lng, categories = self._point()
+            item_id = f"SYN{i:09d}"
+            items.append({
+                "id": item_id,
+                "text": self._text(place, categories),
+                "edit_history_tweet_ids": [item_id],
+                "image_url": f"https://example.com/feed/{item_id}.jpg",
+                "location": place,
+                "coordinates": [round(lat, 6), round(lng, 6)],
+                "created_at": self._timestamp().isoformat(),
+            })
+        return items
+
+    def user_reports(self, count: int, start: int = 0) -> List[Dict[str, Any]]:
+        """Documents in the shape written to user_reports by submitReport"""
+        reports = []
+        for i in range(start, start + count):
+            place, lat, lng, categories = self._point()
+            reports.append({
+                "id": f"RPT{i:09d}",
+                "description": self._text(place, categories),
+                "mediaUrl": f"https://example.com/reports/RPT{i:09d}.jpg",
+                "location": {"latitude": round(lat, 6), "longitude": round(lng, 6)},
+                "place": {"name": place},
+                "timestamp": self._timestamp(),
+            })
+        return reports
+
+
+def generate(items: int, reports_fraction: float = 0.1, seed: int = 7,
+             generator: Optional[CityLoadGenerator] = None,
+             now: Optional[datetime] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Split `items` into feed items and user reports"""
+    generator = generator or CityLoadGenerator(seed=seed, now=now)
+    report_count = int(items * reports_fraction)
+    return {
+        "feed_items": generator.feed_items(items - report_count),
+        "user_reports": generator.user_reports(report_count),
+    }
@@ -0,0 +1,326 @@
+"""
+End-to-end pipeline benchmark on synthetic Bangalore load.
+
+Runs every stage against an in-memory Firestore and a fake LLM with a fixed
+latency and reports per-stage throughput, latency, LLM calls and Firestore
+operations. With --scales each size runs in a fresh process and the per-item
+cost of each stage is compared across sizes to flag super-linear stages.
+
+    python -m benchmarks.pipeline_benchmark --items 1000
+    python -m benchmarks.pipeline_benchmark --scales 1000,10000 --fail-on-growth 3
+    python -m benchmarks.pipeline_benchmark --items 1000 --one-run
+"""
+import os
+import sys
+import json
+import random
+import asyncio
+import logging
+import argparse
+import subprocess
+import contextlib
+from io import BytesIO
+from datetime import datetime
+from typing import Any, Dict, List
+
+STAGE_NAMES = [
+    "data_fusing_agent",
+    "multimodal_intake_agent",
+    "synthesis_agent",
+    "sentiment_analyzer_agent",
+    "predictive_agent",
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Nagar Chakshu pipeline on synthetic city load")
+    parser.add_argument("--items", type=int, default=1000, help="Total feed items plus user reports")
+    parser.add_argument("--scales", help="Comma-separated item counts, each run in its own process")
+    parser.add_argument("--reports-fraction", type=float, default=0.1, help="Share of items that are user reports")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--reference-time", type=datetime.fromisoformat,
+                        help="ISO time generated timestamps lead up to (default: citygen.REFERENCE_TIME)")
+    parser.add_argument("--llm-latency-ms", type=float, default=50, help="Fake LLM latency per call")
+    parser.add_argument("--llm-rate", type=float, default=0, help="Gateway calls per second; 0 disables rate limiting")
+    parser.add_argument("--llm-concurrency", type=int, default=32, help="Gateway concurrency, overall and per stage")
+    parser.add_argument("--media-match-rate", type=float, default=0.8,
+                        help="Share of report media the fake LLM says matches the description")
+    parser.add_argument("--stages", help=f"Comma-separated subset of {','.join(STAGE_NAMES)}")
+    parser.add_argument("--fail-on-growth", type=float,
+                        help="Exit non-zero if a stage's per-item time grows more than this factor across --scales")
+    parser.add_argument("--one-run", action="store_true",
+                        help="Run the selected stages as one pipeline run with in-memory handoff; "
+                             "Firestore and LLM counts are then reported for the whole run")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Keep service logging and prints")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args) -> None:
+    """Gateway and cache settings are read at import time, so set them before importing the services"""
+    os.environ["LLM_RATE_PER_SECOND"] = str(args.llm_rate)
+    os.environ["LLM_BURST"] = str(max(1, args.llm_concurrency))
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.llm_concurrency)
+    os.environ["LLM_STAGE_CONCURRENCY"] = str(args.llm_concurrency)
+    os.environ["LLM_CACHE_PATH"] = ":memory:"
+    os.environ["FIRESTORE_BACKEND"] = "memory"
+
+
+def make_responder(args):
+    """Fake LLM answers shaped like what each stage parses"""
+    from nagar_chakshu.sub_agents.util import (
+        COMMON_SENTIMENTS,
+        PROMPT_BATCH_SENTIMENT_ANALYSIS,
+        PROMPT_SENTIMENT_ANALYSIS,
+        PROMPT_PREDICTIVE_NARRATION,
+    )
+    rng = random.Random(args.seed)
+
+    def respond(contents, generation_config=None) -> str:
+        if isinstance(contents, list):
+            # Media check: [prompt, image]
+            return "yes" if rng.random() < args.media_match_rate else "no"
+        if contents.startswith(PROMPT_BATCH_SENTIMENT_ANALYSIS):
+            lines = contents[len(PROMPT_BATCH_SENTIMENT_ANALYSIS):].splitlines()
+            ids = [json.loads(line)["id"] for line in lines if line.strip()]
+            return json.dumps({item_id: rng.choice(COMMON_SENTIMENTS) for item_id in ids})
+        if contents.startswith(PROMPT_SENTIMENT_ANALYSIS):
+            return rng.choice(COMMON_SENTIMENTS)
+        if contents.startswith(PROMPT_PREDICTIVE_NARRATION):
+            return "Incidents here are likely to continue over the next few hours. Plan alternate routes."
+        return "Multiple residents report the same issue at this location; it is ongoing."
+
+    return respond
+
+
+def sample_image() -> bytes:
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new("RGB", (64, 64), (90, 120, 150)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+async def run_benchmark(args, db, backend) -> Dict[str, Any]:
+    from nagar_chakshu.pipeline import PipelineRunner
+    from nagar_chakshu.sub_agents.data_fusing_agent.service import DataFusingService
+    from nagar_chakshu.sub_agents.multimodal_intake_agent.service import MultiModalIntakeService
+    from nagar_chakshu.sub_agents.synthesis_agent.service import SynthesisAgent
+    from nagar_chakshu.sub_agents.sentiment_analyzer_agent.service import SentimentAnalyzerAgent
+    from nagar_chakshu.sub_agents.predictive_agent.service import PredictiveAgent
+    from .citygen import generate
+
+    data = generate(args.items, args.reports_fraction, seed=args.seed, now=args.reference_time)
+
+    # Seed inputs outside the timed stages: the feed is normally fetched over HTTP
+    # and user reports are written by the backend
+    fusing = DataFusingService()
+    fusing.raw_data = fusing._process_raw_data(data["feed_items"])
+    batch = db.batch()
+    reports = db.collection("user_reports")
+    for report in data["user_reports"]:
+        batch.set(reports.document(report["id"]), report)
+    batch.commit()
+
+    image = sample_image()
+    intake = MultiModalIntakeService()
+    intake.download_media = lambda url: (image, "image/jpeg")
+    synthesis = SynthesisAgent()
+    sentiment = SentimentAnalyzerAgent()
+    predictive = PredictiveAgent()
+
+    # Stage, service, steps, items in, items out
+    stages = [
+        ("data_fusing_agent", fusing, ["store_raw_data", "analyze_raw_data", "store_processed_data"],
+         lambda: len(fusing.raw_data), lambda: len(fusing.processed_data)),
+        ("multimodal_intake_agent", intake, ["get_submitted_reports", "process_reports", "store_processed_data"],
+         lambda: intake.report_count, lambda: intake.processed_count),
+        ("synthesis_agent", synthesis, ["get_processed_data", "synthesize_processed_data", "store_summaries"],
+         lambda: len(synthesis.processed_data), lambda: len(synthesis.summarized_data)),
+        ("sentiment_analyzer_agent", sentiment, ["get_summarized_data", "analyze_sentiment_data", "store_sentiment_data"],
+         lambda: sentiment.summary_count, lambda: sentiment.sentiment_count),
+        ("predictive_agent", predictive,
+         ["get_summarized_data", "get_historical_data", "make_predictions", "store_predictive_data"],
+         lambda: predictive.summary_count, lambda: predictive.prediction_count),
+    ]
+    selected = set(args.stages.split(",")) if args.stages else set(STAGE_NAMES)
+
+    stages = [stage for stage in stages if stage[0] in selected]
+
+    if args.one_run:
+        return await run_one(args, data, db, backend, stages)
+
+    results = []
+    for name, service, steps, items_in, items_out in stages:
+        before = db.stats()
+        calls_before = backend.calls
+        run = await PipelineRunner([(name, service, steps)]).run()
+        report = run["stages"][0]
+        after = db.stats()
+        count = items_in()
+        # The whole run, so the stage's background writes are included
+        duration_ms = run["duration_ms"]
+        results.append({
+            "name": name,
+            "status": report["status"],
+            "items_in": count,
+            "items_out": items_out(),
+            "duration_ms": duration_ms,
+            "items_per_second": round(count / (duration_ms / 1000), 1) if duration_ms else None,
+            "ms_per_item": round(duration_ms / count, 4) if count else None,
+            "llm_calls": backend.calls - calls_before,
+            "firestore_reads": after["reads"] - before["reads"],
+            "firestore_writes": after["writes"] - before["writes"],
+            "steps": {step["step"]: step["duration_ms"] for step in report["steps"]},
+        })
+
+    return {
+        "items": args.items,
+        "feed_items": len(data["feed_items"]),
+        "user_reports": len(data["user_reports"]),
+        "llm_latency_ms": args.llm_latency_ms,
+        "total_ms": round(sum(stage["duration_ms"] for stage in results), 1),
+        "stages": results,
+    }
+
+
+async def run_one(args, data, db, backend, stages) -> Dict[str, Any]:
+    """All stages in one run: each stage takes its input from the previous one in memory"""
+    from nagar_chakshu.pipeline import PipelineRunner
+
+    before = db.stats()
+    run = await PipelineRunner([(name, service, steps) for name, service, steps, _, _ in stages]).run()
+    after = db.stats()
+    return {
+        "items": args.items,
+        "feed_items": len(data["feed_items"]),
+        "user_reports": len(data["user_reports"]),
+        "llm_latency_ms": args.llm_latency_ms,
+        "one_run": True,
+        "status": run["status"],
+        "total_ms": run["duration_ms"],
+        "stages_ms": run["stages_duration_ms"],
+        "stages_sum_ms": round(sum(report["duration_ms"] for report in run["stages"]), 1),
+        "llm_calls": backend.calls,
+        "firestore_reads": after["reads"] - before["reads"],
+        "firestore_writes": after["writes"] - before["writes"],
+        "stages": [
+            {"name": report["name"], "status": report["status"], "started_ms": report["started_ms"],
+             "duration_ms": report["duration_ms"], "items_in": items_in(), "items_out": items_out()}
+            for report, (_, _, _, items_in, items_out) in zip(run["stages"], stages)
+        ],
+        "writes": [{"collection": write["collection"], "status": write["status"],
+                    "duration_ms": write["duration_ms"]} for write in run["writes"]],
+    }
+
+
+def run_single(args) -> Dict[str, Any]:
+    configure_environment(args)
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+    random.seed(args.seed)
+
+    from nagar_chakshu.sub_agents.datastore import get_db
+
+    db = get_db()
+
+    from nagar_chakshu.sub_agents.llm_gateway import FakeBackend, set_llm_backend
+
+    backend = FakeBackend(make_responder(args), latency=args.llm_latency_ms / 1000)
+    set_llm_backend(backend)
+    # Services print progress; keep stdout for the report
+    output = sys.stderr if args.verbose else open(os.devnull, "w")
+    with contextlib.redirect_stdout(output):
+        return asyncio.run(run_benchmark(args, db, backend))
+
+
+def run_scales(args) -> Dict[str, Any]:
+    """Run each scale in a fresh process so caches and module state never carry over"""
+    runs = []
+    for items in sorted(int(value) for value in args.scales.split(",")):
+        command = [
+            sys.executable, "-m", "benchmarks.pipeline_benchmark", "--json",
+            "--items", str(items),
+            "--reports-fraction", str(args.reports_fraction),
+            "--seed", str(args.seed),
+            "--llm-latency-ms", str(args.llm_latency_ms),
+            "--llm-rate", str(args.llm_rate),
+            "--llm-concurrency", str(args.llm_concurrency),
+            "--media-match-rate", str(args.media_match_rate),
+        ]
+        if args.stages:
+            command += ["--stages", args.stages]
+        if args.reference_time:
+            command += ["--reference-time", args.reference_time.isoformat()]
+        print(f"Running {items} items...", file=sys.stderr)
+        completed = subprocess.run(command, capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        if completed.returncode != 0:
+            raise RuntimeError(f"Benchmark at {items} items failed:\n{completed.stderr}")
+        runs.append(json.loads(completed.stdout))
+
+    growth = {}
+    if len(runs) > 1:
+        smallest, largest = runs[0], runs[-1]
+        base = {stage["name"]: stage["ms_per_item"] for stage in smallest["stages"]}
+        for stage in largest["stages"]:
+            if base.get(stage["name"]) and stage["ms_per_item"]:
+                growth[stage["name"]] = round(stage["ms_per_item"] / base[stage["name"]], 2)
+    return {"runs": runs, "per_item_growth": growth}
+
+
+def print_one_run(run: Dict[str, Any]) -> None:
+    print(f"\n{run['items']} items ({run['feed_items']} feed, {run['user_reports']} reports) in one run, "
+          f"fake LLM {run['llm_latency_ms']} ms: {run['status']}, stages {run['stages_ms'] / 1000:.2f}s, "
+          f"total with writes {run['total_ms'] / 1000:.2f}s")
+    print(f"LLM calls {run['llm_calls']}, Firestore reads {run['firestore_reads']}, writes {run['firestore_writes']}")
+    print(f"Sum of stage times {run['stages_sum_ms'] / 1000:.2f}s; stages run as a DAG, so the run takes its critical path")
+    header = f"{'stage':<26}{'status':<8}{'in':>9}{'out':>9}{'start ms':>11}{'ms':>11}"
+    print(header)
+    print("-" * len(header))
+    for stage in run["stages"]:
+        print(f"{stage['name']:<26}{stage['status']:<8}{stage['items_in']:>9}{stage['items_out']:>9}"
+              f"{stage['started_ms']:>11.1f}{stage['duration_ms']:>11.1f}")
+    for write in run["writes"]:
+        print(f"  write-behind {write['collection']:<20}{write['status']:<8}{write['duration_ms'] or 0:>11.1f} ms")
+
+
+def print_run(run: Dict[str, Any]) -> None:
+    if run.get("one_run"):
+        print_one_run(run)
+        return
+    print(f"\n{run['items']} items ({run['feed_items']} feed, {run['user_reports']} reports), "
+          f"fake LLM {run['llm_latency_ms']} ms, total {run['total_ms'] / 1000:.2f}s")
+    header = f"{'stage':<26}{'status':<8}{'in':>9}{'out':>9}{'ms':>11}{'items/s':>11}{'ms/item':>10}{'llm':>7}{'reads':>9}{'writes':>9}"
+    print(header)
+    print("-" * len(header))
+    for stage in run["stages"]:
+        print(f"{stage['name']:<26}{stage['status']:<8}{stage['items_in']:>9}{stage['items_out']:>9}"
+              f"{stage['duration_ms']:>11.1f}{stage['items_per_second'] or 0:>11.1f}{stage['ms_per_item'] or 0:>10.3f}"
+              f"{stage['llm_calls']:>7}{stage['firestore_reads']:>9}{stage['firestore_writes']:>9}")
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = run_scales(args) if args.scales else run_single(args)
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        for run in report.get("runs", [report]):
+            print_run(run)
+        if report.get("per_item_growth"):
+            print("\nPer-item time growth, largest vs smallest scale:")
+            for name, factor in report["per_item_growth"].items():
+                print(f"  {name:<26}{factor:>8.2f}x")
+
+    if args.fail_on_growth and report.get("per_item_growth"):
+        regressed = {name: factor for name, factor in report["per_item_growth"].items() if factor > args.fail_on_growth}
+        if regressed:
+            print(f"Super-linear stages (growth > {args.fail_on_growth}x): {regressed}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Cold-start profile of the agent server.
+
+Imports each module in a fresh interpreter with -X importtime and reports the
+heaviest top-level packages, then starts the server and measures the time
+until it answers /.well-known/agent.json.
+
+    python -m benchmarks.startup_profile
+    python -m benchmarks.startup_profile --repeat 5 --max-ready-ms 2000
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.request
+from collections import defaultdict
+from typing import Any, Dict, List
+
+AGENT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ["nagar_chakshu.__main__", "nagar_chakshu.pipeline", "nagar_chakshu.agent"]
+
+# Namespace packages reported one level deeper so google.adk and google.cloud stay apart
+NAMESPACE_PACKAGES = {"google"}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Profile Nagar Chakshu server cold start")
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES), help="Comma-separated modules to import")
+    parser.add_argument("--top", type=int, default=12, help="Packages listed per module")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the median is reported")
+    parser.add_argument("--modes", default="direct,agent", help="Server modes to time to first response")
+    parser.add_argument("--ready-timeout", type=float, default=60, help="Seconds to wait for the server")
+    parser.add_argument("--max-ready-ms", type=float, help="Exit non-zero if any mode takes longer to answer")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def child_environment(**extra) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "FIRESTORE_BACKEND": "memory",
+        "LLM_CACHE_PATH": ":memory:",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    })
+    env.update(extra)
+    return env
+
+
+def package_of(module: str) -> str:
+    parts = module.split(".")
+    if parts[0] in NAMESPACE_PACKAGES and len(parts) > 1:
+        return ".".join(parts[:2])
+    return parts[0]
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """Rows of -X importtime output: module, self and cumulative microseconds"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    return rows
+
+
+def profile_import(module: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=AGENT_ROOT, env=child_environment(),
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    rows = parse_importtime(completed.stderr)
+    by_package = defaultdict(int)
+    for row in rows:
+        by_package[package_of(row["module"])] += row["self_us"]
+    total_us = next((row["cumulative_us"] for row in reversed(rows) if row["module"] == module), 0)
+    return {
+        "module": module,
+        "import_ms": round(total_us / 1000, 1),
+        "process_ms": round(wall_ms, 1),
+        "modules_loaded": len(rows),
+        "packages": {name: round(us / 1000, 1) for name, us in sorted(by_package.items(), key=lambda item: -item[1])},
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_ready(mode: str, timeout: float) -> float:
+    """Milliseconds from process start until the server answers its metadata endpoint"""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/.well-known/agent.json"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "nagar_chakshu", "--mode", mode],
+        cwd=AGENT_ROOT,
+        env=child_environment(SPEAKER_A2A_HOST="127.0.0.1", SPEAKER_A2A_PORT=str(port)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server in {mode} mode exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return round((time.perf_counter() - started) * 1000, 1)
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError(f"Server in {mode} mode not ready after {timeout}s")
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def median_run(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return sorted(runs, key=lambda run: run["import_ms"])[len(runs) // 2]
+
+
+def run_profile(args) -> Dict[str, Any]:
+    imports = []
+    for module in filter(None, args.modules.split(",")):
+        print(f"Profiling import of {module}...", file=sys.stderr)
+        imports.append(median_run([profile_import(module) for _ in range(args.repeat)]))
+
+    ready = {}
+    for mode in filter(None, args.modes.split(",")):
+        print(f"Starting server in {mode} mode...", file=sys.stderr)
+        ready[mode] = statistics.median(time_to_ready(mode, args.ready_timeout) for _ in range(args.repeat))
+    return {"python": sys.version.split()[0], "imports": imports, "time_to_ready_ms": ready}
+
+
+def print_report(report: Dict[str, Any], top: int) -> None:
+    for entry in report["imports"]:
+        print(f"\nimport {entry['module']}: {entry['import_ms']:.1f} ms "
+              f"({entry['modules_loaded']} modules, process {entry['process_ms']:.1f} ms)")
+        for name, ms in list(entry["packages"].items())[:top]:
+            print(f"  {name:<40}{ms:>10.1f} ms")
+    if report["time_to_ready_ms"]:
+        print("\nTime to first response:")
+        for mode, ms in report["time_to_ready_ms"].items():
+            print(f"  {mode:<10}{ms:>10.1f} ms")
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = run_profile(args)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.top)
+
+    if args.max_ready_ms:
+        slow = {mode: ms for mode, ms in report["time_to_ready_ms"].items() if ms > args.max_ready_ms}
+        if slow:
+            print(f"Slow start (> {args.max_ready_ms} ms): {slow}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,17 @@
 import os
 import json
+import time
 import inspect
 from typing import Dict, Any, Callable, Optional
 
-from fastapi import FastAPI, Body
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Body, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
+from .jobs import JobManager, QueueFullError
+from .metrics import REGISTRY, RUN_IN_FLIGHT, RUN_DURATION
+
 class AgentRequest(BaseModel):
     """Standard A2A agent request format."""
     message: str = Field(..., description="The message to process")
@@ -65,7 +69,7 @@ def create_agent_server(
     # Generate agent.json metadata
     agent_json_path = os.path.join(well_known_path, "agent.json")
     if not os.path.exists(agent_json_path):
-        endpoint_names = ["run"]
+        endpoint_names = ["run", "run/stream", "jobs", "metrics"]
         if endpoints:
             endpoint_names.extend(endpoints.keys())
         
@@ -83,8 +87,12 @@ def create_agent_server(
     @app.post("/run", response_model=AgentResponse)
     async def run(request: AgentRequest = Body(...)):
         """Run the agent task."""
+        started = time.perf_counter()
+        status = "error"
+        RUN_IN_FLIGHT.inc()
         try:
             result = await task_manager.process_task(request.message, request.context, request.session_id)
+            status = result.get("status", "success")
             return AgentResponse(
                 data = {
                     "message": result.get("message", "Task processed successfully"),
@@ -100,6 +108,61 @@ def create_agent_server(
                     "final_response": "None"
                 }
             )
+        finally:
+            RUN_IN_FLIGHT.dec()
+            RUN_DURATION.observe(time.perf_counter() - started, status=status)
+
+    # Streaming variant of /run: each event is sent as a server-sent event as soon as it happens
+    @app.post("/run/stream")
+    async def run_stream(request: AgentRequest = Body(...)):
+        async def events():
+            started = time.perf_counter()
+            status = "error"
+            RUN_IN_FLIGHT.inc()
+            try:
+                async for event in task_manager.stream_task(request.message, request.context, request.session_id):
+                    if event["type"] in ("done", "error"):
+                        status = event.get("status", status)
+                    yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+            except Exception as e:
+                error = {"type": "error", "status": "error", "message": f"Error processing request: {str(e)}"}
+                yield f"event: error\ndata: {json.dumps(error)}\n\n"
+            finally:
+                RUN_IN_FLIGHT.dec()
+                RUN_DURATION.observe(time.perf_counter() - started, status=status)
+
+        # no-cache and X-Accel-Buffering keep proxies from holding events back
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    async def run_job(message: str, context: Dict[str, Any], session_id: Optional[str]) -> Dict[str, Any]:
+        result = await task_manager.process_task(message, context, session_id, wait=True)
+        return {
+            "message": result.get("message", "Task processed successfully"),
+            "status": result.get("status", "success"),
+            "final_response": result.get("final_response", ""),
+        }
+
+    jobs = JobManager(run_job)
+    app.state.jobs = jobs
+    app.add_event_handler("startup", jobs.start)
+    app.add_event_handler("shutdown", jobs.stop)
+
+    # Background variant of /run: returns a job id at once, poll GET /jobs/{job_id} for the result
+    @app.post("/jobs", status_code=202)
+    async def submit_job(request: AgentRequest = Body(...)):
+        try:
+            job = jobs.submit(request.message, request.context, request.session_id)
+        except QueueFullError as e:
+            raise HTTPException(status_code=429, detail=f"Job queue is full: {e}")
+        return {"job_id": job.id, "status": job.status, "queue_position": jobs.position(job)}
+
+    @app.get("/jobs/{job_id}")
+    async def get_job(job_id: str):
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"No job {job_id}")
+        return {**job.to_dict(), "queue_position": jobs.position(job)}
 
     # Serve agent metadata
     @app.get("/.well-known/agent.json")
@@ -107,6 +170,11 @@ def create_agent_server(
         with open(agent_json_path, "r") as f:
             return JSONResponse(content=json.load(f))
 
+    # Prometheus scrape endpoint
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
     # Register custom endpoints if any
     if endpoints:
         for path, handler in endpoints.items():
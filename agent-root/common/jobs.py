@@ -0,0 +1,184 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .metrics import JOBS, JOBS_QUEUED
+
+logger = logging.getLogger(__name__)
+
+
+class JobConfig:
+    """Configuration for background jobs submitted through POST /jobs"""
+    # Jobs waiting to run; submissions beyond this are rejected
+    QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "16"))
+    # Jobs running at once
+    CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "1"))
+    # Finished jobs stay queryable this long, and at most MAX_RETAINED of them
+    RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+    MAX_RETAINED = int(os.getenv("JOB_MAX_RETAINED", "1000"))
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is full"""
+
+
+class Job:
+    """One submitted task: its request, progress per stage, and result once finished"""
+
+    def __init__(self, message: str, context: Dict[str, Any], session_id: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.message = message
+        self.context = context
+        self.session_id = session_id
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.result: Optional[Dict[str, Any]] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_ms": round((self.finished_at - self.started_at) * 1000, 1)
+            if self.started_at and self.finished_at else None,
+            "stages": [{"name": name, **progress} for name, progress in self.stages.items()],
+            "result": self.result,
+        }
+
+
+_current_job: contextvars.ContextVar[Optional[Job]] = contextvars.ContextVar("current_job", default=None)
+_stage_listener: contextvars.ContextVar[Optional[Callable[..., None]]] = contextvars.ContextVar(
+    "stage_listener", default=None)
+
+
+@contextmanager
+def listen_stages(listener: Callable[..., None]):
+    """Call listener(stage, status, **details) for every report_stage() made under this block"""
+    token = _stage_listener.set(listener)
+    try:
+        yield
+    finally:
+        _stage_listener.reset(token)
+
+
+def report_stage(stage: str, status: str, **details: Any) -> None:
+    """Record a stage's progress on the job being run and tell the stage listener, if any"""
+    listener = _stage_listener.get()
+    if listener is not None:
+        listener(stage, status, **details)
+    job = _current_job.get()
+    if job is None:
+        return
+    progress = job.stages.setdefault(stage, {})
+    if status == "running":
+        progress["started_at"] = time.time()
+    progress["status"] = status
+    progress.update(details)
+
+
+class JobManager:
+    """
+    Runs tasks in the background so a request returns before its run ends.
+
+    Submitted jobs wait in a bounded queue for one of `concurrency` worker
+    tasks; submitting to a full queue raises QueueFullError. While a job
+    runs, report_stage() calls made under it (from the pipeline runner and
+    the ADK stage callbacks) fill in its per-stage progress. Finished jobs
+    are kept for `retention_seconds`, at most `max_retained` of them.
+    """
+
+    def __init__(self, run: Callable[[str, Dict[str, Any], Optional[str]], Awaitable[Dict[str, Any]]],
+                 queue_size: int = JobConfig.QUEUE_SIZE, concurrency: int = JobConfig.CONCURRENCY,
+                 retention_seconds: float = JobConfig.RETENTION_SECONDS, max_retained: int = JobConfig.MAX_RETAINED):
+        self.run = run
+        self.queue_size = queue_size
+        self.concurrency = max(1, concurrency)
+        self.retention_seconds = retention_seconds
+        self.max_retained = max_retained
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start the workers on the running event loop"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, message: str, context: Dict[str, Any], session_id: Optional[str] = None) -> Job:
+        self.start()
+        self._prune()
+        job = Job(message, context, session_id)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"{self.queue_size} jobs are already waiting")
+        self.jobs[job.id] = job
+        JOBS_QUEUED.set(self._queue.qsize())
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def position(self, job: Job) -> Optional[int]:
+        """How many queued jobs are ahead of this one, or None once it has started"""
+        if job.status != "queued":
+            return None
+        return sum(1 for other in self.jobs.values() if other.status == "queued" and other.created_at < job.created_at)
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            JOBS_QUEUED.set(self._queue.qsize())
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        token = _current_job.set(job)
+        try:
+            job.result = await self.run(job.message, job.context, job.session_id)
+            # A run that reports an error failed, even though it returned normally
+            job.status = "failed" if isinstance(job.result, dict) and job.result.get("status") == "error" else "completed"
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed")
+            job.result = {"message": f"Error processing request: {str(e)}", "status": "error"}
+            job.status = "failed"
+        finally:
+            _current_job.reset(token)
+            job.finished_at = time.time()
+            JOBS.inc(status=job.status)
+
+    def _prune(self) -> None:
+        """Forget finished jobs past retention, then the oldest beyond max_retained"""
+        now = time.time()
+        finished = sorted((job for job in self.jobs.values() if job.finished), key=lambda job: job.finished_at)
+        expired = [job for job in finished if now - job.finished_at > self.retention_seconds]
+        retained = [job for job in finished if now - job.finished_at <= self.retention_seconds]
+        for job in expired + retained[:max(0, len(retained) - self.max_retained)]:
+            del self.jobs[job.id]
@@ -0,0 +1,277 @@
+import time
+import inspect
+import functools
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets in seconds, from fast Firestore reads to long LLM stages
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label set: [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def time(self, **labels) -> "_Timer":
+        """Context manager observing the elapsed time of its block"""
+        return _Timer(self, labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Process-wide set of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Pipeline metrics shared by the server, the pipeline runner and the agent services
+STAGE_DURATION = REGISTRY.histogram("nagar_stage_duration_seconds", "Pipeline stage run time", ["stage"])
+STAGE_RUNS = REGISTRY.counter("nagar_stage_runs_total", "Pipeline stage runs by outcome", ["stage", "status"])
+TOOL_DURATION = REGISTRY.histogram("nagar_tool_duration_seconds", "Agent tool call time", ["stage", "tool"])
+TOOL_CALLS = REGISTRY.counter("nagar_tool_calls_total", "Agent tool calls by outcome", ["stage", "tool", "status"])
+ITEMS = REGISTRY.counter("nagar_stage_items_total", "Items read into and written out of each stage",
+                         ["stage", "direction"])
+LLM_REQUESTS = REGISTRY.counter("nagar_llm_requests_total", "LLM gateway calls by outcome", ["stage", "status"])
+LLM_RETRIES = REGISTRY.counter("nagar_llm_retries_total", "LLM gateway retries", ["stage"])
+LLM_DURATION = REGISTRY.histogram("nagar_llm_request_duration_seconds",
+                                  "LLM gateway call time including queueing and retries", ["stage"])
+FIRESTORE_OPS = REGISTRY.counter("nagar_firestore_operations_total", "Firestore documents read and written",
+                                 ["op", "collection"])
+CACHE_LOOKUPS = REGISTRY.counter("nagar_cache_lookups_total", "Cache lookups by result", ["cache", "result"])
+RUN_IN_FLIGHT = REGISTRY.gauge("nagar_run_requests_in_flight", "/run requests currently being processed")
+RUN_DURATION = REGISTRY.histogram("nagar_run_request_duration_seconds", "/run request time", ["status"])
+JOBS = REGISTRY.counter("nagar_jobs_total", "Background jobs finished, by outcome", ["status"])
+JOBS_QUEUED = REGISTRY.gauge("nagar_jobs_queued", "Background jobs waiting to run")
+SCHEDULED_RUNS = REGISTRY.counter("nagar_scheduled_runs_total", "Scheduled pipeline runs by outcome", ["status"])
+SCHEDULE_INTERVAL = REGISTRY.gauge("nagar_schedule_interval_seconds", "Delay before the next scheduled run")
+SCHEDULE_NEW_ITEMS = REGISTRY.gauge("nagar_schedule_new_items", "New items found by the last scheduled run")
+
+
+def count_items(stage: str, direction: str, count: int) -> None:
+    """Record items read into ("in") or written out of ("out") a stage"""
+    ITEMS.inc(count, stage=stage, direction=direction)
+
+
+def count_firestore(op: str, collection: str, count: int = 1) -> None:
+    """Record Firestore document reads ("read") or writes ("write")"""
+    FIRESTORE_OPS.inc(count, op=op, collection=collection)
+
+
+def count_cache(cache: str, hits: int, misses: int) -> None:
+    if hits:
+        CACHE_LOOKUPS.inc(hits, cache=cache, result="hit")
+    if misses:
+        CACHE_LOOKUPS.inc(misses, cache=cache, result="miss")
+
+
+def _tool_status(result: Any) -> str:
+    return "error" if isinstance(result, dict) and "error" in result else "success"
+
+
+def instrument_tool(stage: str) -> Callable:
+    """
+    Decorator timing an agent tool and counting its outcome.
+
+    Keeps the wrapped function's name, docstring, signature and sync/async
+    kind so ADK builds the same tool declaration from it.
+    """
+    def decorator(func: Callable) -> Callable:
+        tool = func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                status = "error"
+                try:
+                    result = await func(*args, **kwargs)
+                    status = _tool_status(result)
+                    return result
+                finally:
+                    TOOL_DURATION.observe(time.perf_counter() - started, stage=stage, tool=tool)
+                    TOOL_CALLS.inc(stage=stage, tool=tool, status=status)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            status = "error"
+            try:
+                result = func(*args, **kwargs)
+                status = _tool_status(result)
+                return result
+            finally:
+                TOOL_DURATION.observe(time.perf_counter() - started, stage=stage, tool=tool)
+                TOOL_CALLS.inc(stage=stage, tool=tool, status=status)
+        return wrapper
+
+    return decorator
+
+
+class StageTimer:
+    """before/after agent callbacks that time ADK sub-agents as pipeline stages"""
+
+    def __init__(self):
+        self._started: Dict[Tuple[str, str], float] = {}
+
+    def before(self, callback_context) -> Optional[Any]:
+        from .jobs import report_stage
+
+        self._started[(callback_context.invocation_id, callback_context.agent_name)] = time.perf_counter()
+        report_stage(callback_context.agent_name, "running")
+        return None
+
+    def after(self, callback_context) -> Optional[Any]:
+        from .jobs import report_stage
+
+        started = self._started.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if started is not None:
+            STAGE_DURATION.observe(time.perf_counter() - started, stage=callback_context.agent_name)
+            STAGE_RUNS.inc(stage=callback_context.agent_name, status="success")
+            report_stage(callback_context.agent_name, "success",
+                         duration_ms=round((time.perf_counter() - started) * 1000, 1))
+        return None
@@ -0,0 +1,126 @@
+import os
+import time
+import uuid
+import asyncio
+import sqlite3
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SessionConfig:
+    """Configuration for agent sessions kept between requests"""
+    # "memory", or the path of a SQLite file so sessions survive restarts
+    STORE = os.getenv("SESSION_STORE", "memory")
+    # Sessions unused this long are deleted
+    TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+    # Beyond this many sessions the least recently used is deleted
+    MAX_SESSIONS = int(os.getenv("SESSION_MAX_COUNT", "1000"))
+
+
+class SessionStore:
+    """
+    ADK sessions reused by the session id the client sends, with bounded lifetime.
+
+    get_or_create() returns the client's session if it still exists and
+    creates it otherwise; a request without a session id gets a fresh one.
+    Every session is tracked by when it was last used: sessions idle for
+    ttl_seconds, and the least recently used beyond max_sessions, are
+    deleted from the session service, so memory stays flat however long the
+    process runs.
+
+    With a SQLite path, sessions live in ADK's DatabaseSessionService and
+    the last-used index is stored next to them, so both survive a restart
+    and eviction picks up where it left off.
+    """
+
+    def __init__(self, app_name: str, store: str = SessionConfig.STORE,
+                 ttl_seconds: float = SessionConfig.TTL_SECONDS, max_sessions: int = SessionConfig.MAX_SESSIONS):
+        self.app_name = app_name
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._lock = asyncio.Lock()
+        # (user_id, session_id) -> last used, least recently used first
+        self._last_used: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._index: Optional[sqlite3.Connection] = None
+
+        if store == "memory":
+            from google.adk.sessions import InMemorySessionService
+            self.service = InMemorySessionService()
+        else:
+            from google.adk.sessions import DatabaseSessionService
+            if os.path.dirname(store):
+                os.makedirs(os.path.dirname(store), exist_ok=True)
+            self.service = DatabaseSessionService(db_url=f"sqlite:///{store}")
+            self._open_index(store)
+
+    def __len__(self) -> int:
+        return len(self._last_used)
+
+    def _open_index(self, path: str) -> None:
+        self._index = sqlite3.connect(path, check_same_thread=False)
+        self._index.execute(
+            "CREATE TABLE IF NOT EXISTS session_last_used ("
+            "app_name TEXT NOT NULL, user_id TEXT NOT NULL, session_id TEXT NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (app_name, user_id, session_id))"
+        )
+        self._index.commit()
+        rows = self._index.execute(
+            "SELECT user_id, session_id, last_used FROM session_last_used WHERE app_name = ? ORDER BY last_used",
+            (self.app_name,),
+        ).fetchall()
+        for user_id, session_id, last_used in rows:
+            self._last_used[(user_id, session_id)] = last_used
+        logger.info(f"Loaded {len(rows)} stored sessions for {self.app_name}")
+
+    def _touch(self, key: Tuple[str, str], now: float) -> None:
+        self._last_used[key] = now
+        self._last_used.move_to_end(key)
+        if self._index is not None:
+            self._index.execute(
+                "INSERT OR REPLACE INTO session_last_used (app_name, user_id, session_id, last_used) VALUES (?, ?, ?, ?)",
+                (self.app_name, key[0], key[1], now),
+            )
+            self._index.commit()
+
+    async def get_or_create(self, user_id: str, session_id: Optional[str] = None,
+                            state: Optional[Dict[str, Any]] = None) -> Any:
+        """The client's session, reused if it is still live; a new one otherwise"""
+        async with self._lock:
+            now = time.time()
+            await self._evict(now)
+            session = None
+            if session_id is None:
+                session_id = uuid.uuid4().hex
+            else:
+                session = await self.service.get_session(app_name=self.app_name, user_id=user_id,
+                                                         session_id=session_id)
+            if session is None:
+                session = await self.service.create_session(app_name=self.app_name, user_id=user_id,
+                                                            state=state, session_id=session_id)
+            self._touch((user_id, session_id), now)
+            await self._evict(now)
+            return session
+
+    async def _evict(self, now: float) -> None:
+        expired = []
+        for key, last_used in self._last_used.items():
+            if now - last_used <= self.ttl_seconds and len(self._last_used) - len(expired) <= self.max_sessions:
+                break
+            expired.append(key)
+        for user_id, session_id in expired:
+            del self._last_used[(user_id, session_id)]
+            try:
+                await self.service.delete_session(app_name=self.app_name, user_id=user_id, session_id=session_id)
+            except Exception as e:
+                logger.warning(f"Could not delete session {session_id}: {e}")
+        if expired and self._index is not None:
+            self._index.executemany(
+                "DELETE FROM session_last_used WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                [(self.app_name, user_id, session_id) for user_id, session_id in expired],
+            )
+            self._index.commit()
+        if expired:
+            logger.info(f"Evicted {len(expired)} sessions; {len(self._last_used)} remain")
@@ -1,5 +1,6 @@
 import os
 import sys
+import json
 import logging
 import argparse
 import uvicorn
@@ -8,10 +9,13 @@ from contextlib import AsyncExitStack # For MCP exit stack
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
+from typing import List, Optional
 
 # Use relative imports within the agent package
 from .task_manager import TaskManager # Add this import
-from .agent import root_agent # Import the coroutine
+from .sub_agents.region_query import RegionQueryService
+from .pipeline import PipelineRunner, PIPELINE_NAME, PIPELINE_DESCRIPTION
+from .scheduler import PipelineScheduler, SchedulerConfig
 from common.a2a_server import AgentRequest, AgentResponse, create_agent_server # Use the helper
 
 # Configure logging
@@ -32,6 +36,40 @@ load_status = load_dotenv(dotenv_path=dotenv_path, override=True) # Use override
 # Global variable for the TaskManager instance
 task_manager_instance: TaskManager | None = None
 
+
+class RegionQueryRequest(BaseModel):
+    """Region query: either a center and radius or a bounding box."""
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    radius_km: Optional[float] = None
+    min_lat: Optional[float] = None
+    min_lng: Optional[float] = None
+    max_lat: Optional[float] = None
+    max_lng: Optional[float] = None
+    collections: Optional[List[str]] = None
+    limit: Optional[int] = None
+
+
+def make_region_endpoint(region_service: RegionQueryService):
+    """Create the /region handler bound to a RegionQueryService."""
+    async def region(request: RegionQueryRequest):
+        if request.lat is not None and request.lng is not None and request.radius_km is not None:
+            results = await asyncio.to_thread(
+                region_service.query_radius,
+                request.lat, request.lng, request.radius_km,
+                request.collections, request.limit,
+            )
+        elif None not in (request.min_lat, request.min_lng, request.max_lat, request.max_lng):
+            results = await asyncio.to_thread(
+                region_service.query_bbox,
+                request.min_lat, request.min_lng, request.max_lat, request.max_lng,
+                request.collections, request.limit,
+            )
+        else:
+            raise HTTPException(status_code=400, detail="Provide lat, lng and radius_km or a full bounding box")
+        return {"status": "success", "data": results}
+    return region
+
 def parse_args():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="Start the Nagar Chakshu Agent server")
@@ -53,26 +91,45 @@ def parse_args():
         default=os.getenv("LOG_LEVEL", "info"),
         help="Set the logging level"
     )
+    parser.add_argument(
+        "--mode",
+        choices=["agent", "direct"],
+        default=os.getenv("PIPELINE_MODE", "agent"),
+        help="Default /run mode: ADK agent orchestration or direct pipeline execution"
+    )
+    parser.add_argument(
+        "--run-once",
+        action="store_true",
+        help="Run the pipeline once directly and exit instead of starting the server"
+    )
+    parser.add_argument(
+        "--schedule",
+        action="store_true",
+        default=SchedulerConfig.ENABLED,
+        help="Also run the pipeline directly on an adaptive schedule (PIPELINE_SCHEDULE_* settings)"
+    )
     # Arguments related to TaskManager are handled via env vars now
     return parser.parse_args()
 
 async def main(): # Make main async
     """Initialize and start the Speaker Agent server."""
     global task_manager_instance
+    args = parse_args()
+
+    if args.run_once:
+        report = await PipelineRunner().run()
+        print(json.dumps(report, indent=2, default=str))
+        return
     
     logger.info("Starting NagarChakshu Agent A2A Server initialization...")
     
-    # Await the root_agent coroutine to get the actual agent and exit_stack
-    logger.info("Awaiting root_agent creation...")
-    agent_instance= root_agent
-    logger.info(f"Agent instance created: {agent_instance.name}")
-
-    # Use the exit_stack to manage the MCP connection lifecycle
+    # The root agent (and google.adk with it) loads on first use, so the port binds first
     if True:
-        logger.info("MCP exit_stack entered.")
-        # Initialize the TaskManager with the resolved agent instance
-        task_manager_instance = TaskManager(agent=agent_instance)
-        logger.info("TaskManager initialized with agent instance.")
+        task_manager_instance = TaskManager(
+            pipeline_runner=PipelineRunner(),
+            default_mode=args.mode,
+        )
+        logger.info("TaskManager initialized.")
 
         # Configuration for the A2A server
         # Use environment variables or defaults
@@ -106,12 +163,25 @@ async def main(): # Make main async
         # Create the FastAPI app using the helper
         # Pass the agent name, description, task manager instance, and allowed origins
         app = create_agent_server(
-            name=agent_instance.name,
-            description=agent_instance.description,
+            name=PIPELINE_NAME,
+            description=PIPELINE_DESCRIPTION,
             task_manager=task_manager_instance,
+            endpoints={"region": make_region_endpoint(RegionQueryService())},
             allowed_origins=allowed_origins
         )
         
+        if args.mode == "agent":
+            # Every /run needs the agent: start loading it once the server is up
+            async def start_warm_up():
+                app.state.warm_up = asyncio.create_task(task_manager_instance.warm_up())
+            app.add_event_handler("startup", start_warm_up)
+
+        if args.schedule:
+            # Scheduled runs share the run lock with /run, so they never overlap a request
+            scheduler = PipelineScheduler(task_manager_instance)
+            app.add_event_handler("startup", scheduler.start)
+            app.add_event_handler("shutdown", scheduler.stop)
+
         logger.info(f"NagarChakshu server starting on {host}:{port}")
         
         # Configure uvicorn
@@ -1,14 +1,5 @@
-import random
-import os
-from google.adk.agents import SequentialAgent
-import random
-import praw
-from praw.exceptions import PRAWException
-import dotenv
+from google.adk.agents import ParallelAgent, SequentialAgent
 from dotenv import load_dotenv
-import re
-from datetime import datetime
-from collections import defaultdict
 
 load_dotenv()
 
@@ -17,9 +8,36 @@ from .sub_agents.multimodal_intake_agent.agent import multimodal_intake_agent
 from .sub_agents.synthesis_agent.agent import synthesis_agent
 from .sub_agents.sentiment_analyzer_agent.agent import sentiment_analyzer_agent
 from .sub_agents.predictive_agent.agent import predictive_agent
+from .pipeline import PIPELINE_NAME, PIPELINE_DESCRIPTION, stage_levels
+from common.metrics import StageTimer
 
+stage_agents = [data_fusing_agent, multimodal_intake_agent,synthesis_agent, sentiment_analyzer_agent,predictive_agent]
+
+# Time each sub-agent as a pipeline stage for /metrics
+stage_timer = StageTimer()
+for stage_agent in stage_agents:
+    stage_agent.before_agent_callback = stage_timer.before
+    stage_agent.after_agent_callback = stage_timer.after
+
+
+def build_level(index: int, agents):
+    """One agent for a level of the stage DAG: the stage itself, or its stages in parallel"""
+    if len(agents) == 1:
+        return agents[0]
+    return ParallelAgent(
+        name=f"parallel_stages_{index}",
+        description=f"Runs {', '.join(agent.name for agent in agents)} concurrently",
+        sub_agents=agents,
+    )
+
+
+# Levels of PIPELINE_DEPENDENCIES run in sequence, independent stages within a level in parallel
+agents_by_name = {stage_agent.name: stage_agent for stage_agent in stage_agents}
 root_agent = SequentialAgent(
-    name="AgenticPipeline",
-    description="A pipeline that fuses data, processes it, and generates insights.",
-    sub_agents=[data_fusing_agent, multimodal_intake_agent,synthesis_agent, sentiment_analyzer_agent,predictive_agent],
-)
\ No newline at end of file
+    name=PIPELINE_NAME,
+    description=PIPELINE_DESCRIPTION,
+    sub_agents=[
+        build_level(index, [agents_by_name[name] for name in level])
+        for index, level in enumerate(stage_levels(list(agents_by_name)))
+    ],
+)
@@ -0,0 +1,48 @@
+import os
+import time
+import asyncio
+import logging
+from typing import List, Optional, Set
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class NotifyConfig:
+    """Where to announce finished pipeline runs"""
+    # Comma-separated URLs POSTed to after every run, e.g. the chatbot's /cache/invalidate
+    URLS = [url.strip() for url in os.getenv("PIPELINE_NOTIFY_URLS", "").split(",") if url.strip()]
+    TIMEOUT_SECONDS = float(os.getenv("PIPELINE_NOTIFY_TIMEOUT_SECONDS", "5"))
+    # Shared secret sent as a bearer token; the chatbot rejects invalidations without it
+    TOKEN = os.getenv("PIPELINE_NOTIFY_TOKEN", "")
+
+
+# Notifications in flight, kept referenced until they finish
+_pending: Set[asyncio.Task] = set()
+
+
+async def _post(urls: List[str], payload: dict) -> None:
+    headers = {"Authorization": f"Bearer {NotifyConfig.TOKEN}"} if NotifyConfig.TOKEN else {}
+    async with httpx.AsyncClient(timeout=NotifyConfig.TIMEOUT_SECONDS, headers=headers) as client:
+        results = await asyncio.gather(*(client.post(url, json=payload) for url in urls), return_exceptions=True)
+    for url, result in zip(urls, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not notify {url} of the pipeline run: {result}")
+        elif result.status_code >= 400:
+            logger.warning(f"Notifying {url} of the pipeline run failed with status {result.status_code}")
+
+
+def notify_run_finished(status: Optional[str], urls: Optional[List[str]] = None) -> None:
+    """
+    Tell the configured URLs that a pipeline run finished, so services
+    caching answers derived from pipeline data can drop them. Sent in the
+    background: a slow or unreachable listener never delays the run.
+    """
+    urls = NotifyConfig.URLS if urls is None else urls
+    if not urls:
+        return
+    task = asyncio.create_task(_post(urls, {"event": "pipeline_run_finished", "status": status,
+                                            "finished_at": time.time()}))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
@@ -0,0 +1,188 @@
+import time
+import asyncio
+import inspect
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .sub_agents.data_fusing_agent.service import service as data_fusing_service
+from .sub_agents.multimodal_intake_agent.service import service as multimodal_intake_service
+from .sub_agents.synthesis_agent.service import service as synthesis_service
+from .sub_agents.sentiment_analyzer_agent.service import service as sentiment_service
+from .sub_agents.predictive_agent.service import service as predictive_service
+from .sub_agents.handoff import PipelineContext, use_context
+from common.jobs import report_stage
+from common.metrics import STAGE_DURATION, STAGE_RUNS
+
+logger = logging.getLogger(__name__)
+
+# Shared by the root agent and the server metadata
+PIPELINE_NAME = "AgenticPipeline"
+PIPELINE_DESCRIPTION = "A pipeline that fuses data, processes it, and generates insights."
+
+# Stage name, service, and the tool methods the stage's agent is instructed to call, in order
+PIPELINE_STAGES: List[Tuple[str, Any, List[str]]] = [
+    ("data_fusing_agent", data_fusing_service,
+     ["get_live_data", "store_raw_data", "analyze_raw_data", "store_processed_data"]),
+    ("multimodal_intake_agent", multimodal_intake_service,
+     ["get_submitted_reports", "process_reports", "store_processed_data"]),
+    ("synthesis_agent", synthesis_service,
+     ["get_processed_data", "synthesize_processed_data", "store_summaries"]),
+    ("sentiment_analyzer_agent", sentiment_service,
+     ["get_summarized_data", "analyze_sentiment_data", "store_sentiment_data"]),
+    ("predictive_agent", predictive_service,
+     ["get_summarized_data", "get_historical_data", "make_predictions", "store_predictive_data"]),
+]
+
+# Stages each stage runs after. Stages with no path between them run concurrently: the two
+# intake stages, then sentiment and prediction, which both only read synthesis's summaries.
+PIPELINE_DEPENDENCIES: Dict[str, List[str]] = {
+    "data_fusing_agent": [],
+    "multimodal_intake_agent": [],
+    "synthesis_agent": ["data_fusing_agent", "multimodal_intake_agent"],
+    "sentiment_analyzer_agent": ["synthesis_agent"],
+    "predictive_agent": ["synthesis_agent"],
+}
+
+
+def stage_levels(names: List[str], dependencies: Dict[str, List[str]] = PIPELINE_DEPENDENCIES) -> List[List[str]]:
+    """
+    Group stages into levels, each depending only on earlier levels.
+
+    Dependencies on stages not in names are ignored, so any subset of the
+    pipeline can be scheduled. Within a level, stages keep their order in names.
+    """
+    remaining = {name: set(dependencies.get(name, ())) & set(names) for name in names}
+    levels = []
+    while remaining:
+        level = [name for name in names if name in remaining and not remaining[name]]
+        if not level:
+            raise ValueError(f"Pipeline stages have a dependency cycle: {sorted(remaining)}")
+        levels.append(level)
+        for name in level:
+            del remaining[name]
+        for waiting in remaining.values():
+            waiting.difference_update(level)
+    return levels
+
+
+def summarize_result(result: Any) -> Any:
+    """Compact a tool result for the run report"""
+    if isinstance(result, list):
+        return {"count": len(result)}
+    if isinstance(result, dict):
+        return {key: value for key, value in result.items() if key != "document_ids"}
+    return result
+
+
+class PipelineRunner:
+    """
+    Runs the pipeline by calling each service's tools directly.
+
+    This is the deterministic alternative to the agent path: no model turns
+    are spent deciding which tool to call next. Stages are scheduled by
+    their dependencies: each starts as soon as the stages it depends on
+    have finished, so independent stages overlap and a run takes as long
+    as its critical path. A step that returns a dict with an "error" key
+    ends its stage early (later steps depend on its output); the other
+    stages, including its dependents, still run.
+
+    Each run gets a PipelineContext: stages hand their output to the next
+    stage in memory and Firestore writes finish in the background. The run
+    waits for them before reporting, and a failed write makes the run a
+    partial failure.
+    """
+
+    def __init__(self, stages: Optional[List[Tuple[str, Any, List[str]]]] = None,
+                 dependencies: Optional[Dict[str, List[str]]] = None):
+        self.stages = stages or PIPELINE_STAGES
+        self.dependencies = PIPELINE_DEPENDENCIES if dependencies is None else dependencies
+        self.levels = stage_levels([name for name, _, _ in self.stages], self.dependencies)
+
+    async def run(self, context: Optional[PipelineContext] = None) -> Dict[str, Any]:
+        """Run every stage; pass a context to inspect the run's stage outputs afterwards"""
+        started = time.perf_counter()
+        context = context or PipelineContext()
+        with use_context(context):
+            try:
+                stage_reports = await self._run_stages(started)
+            finally:
+                stages_ms = round((time.perf_counter() - started) * 1000, 1)
+                writes = await context.flush()
+
+        for write in writes:
+            write["result"] = summarize_result(write["result"])
+        failed = [report["name"] for report in stage_reports if report["status"] != "success"]
+        failed_writes = [write["collection"] for write in writes if write["status"] != "success"]
+        return {
+            "status": "partial_failure" if failed or failed_writes else "success",
+            "failed_stages": failed,
+            "failed_writes": failed_writes,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "stages_duration_ms": stages_ms,
+            "stages": stage_reports,
+            "writes": writes,
+        }
+
+    async def _run_stages(self, run_started: float) -> List[Dict[str, Any]]:
+        """Start each stage when its dependencies finish; reports come back in declared order"""
+        by_name = {name: (service, steps) for name, service, steps in self.stages}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_after(name: str, waits_for: List[asyncio.Task]) -> Dict[str, Any]:
+            await asyncio.gather(*waits_for)
+            return await self._run_stage(name, *by_name[name], run_started)
+
+        # Levels are in dependency order, so every task a stage waits for already exists
+        for level in self.levels:
+            for name in level:
+                waits_for = [tasks[dependency] for dependency in self.dependencies.get(name, ()) if dependency in tasks]
+                tasks[name] = asyncio.create_task(run_after(name, waits_for))
+        try:
+            return list(await asyncio.gather(*(tasks[name] for name, _, _ in self.stages)))
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    async def _run_stage(self, name: str, service: Any, steps: List[str], run_started: float) -> Dict[str, Any]:
+        started = time.perf_counter()
+        step_reports = []
+        status = "success"
+        report_stage(name, "running")
+        for step in steps:
+            report_stage(name, "running", step=step)
+            step_started = time.perf_counter()
+            try:
+                result = await self._call(getattr(service, step))
+                step_status = "error" if isinstance(result, dict) and "error" in result else "success"
+            except Exception as e:
+                logger.exception(f"{name}.{step} failed")
+                result = {"error": str(e)}
+                step_status = "error"
+            step_reports.append({
+                "step": step,
+                "status": step_status,
+                "duration_ms": round((time.perf_counter() - step_started) * 1000, 1),
+                "result": summarize_result(result),
+            })
+            if step_status != "success":
+                status = "error"
+                break
+
+        STAGE_DURATION.observe(time.perf_counter() - started, stage=name)
+        STAGE_RUNS.inc(stage=name, status=status)
+        report_stage(name, status, duration_ms=round((time.perf_counter() - started) * 1000, 1))
+        logger.info(f"Stage {name} finished with status {status} in {time.perf_counter() - started:.2f}s")
+        return {
+            "name": name,
+            "status": status,
+            "started_ms": round((started - run_started) * 1000, 1),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "steps": step_reports,
+        }
+
+    @staticmethod
+    async def _call(method) -> Any:
+        if inspect.iscoroutinefunction(method):
+            return await method()
+        # Blocking Firestore work runs off the event loop
+        return await asyncio.to_thread(method)
@@ -0,0 +1,128 @@
+import os
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from .pipeline import PipelineRunner
+from .sub_agents.handoff import PipelineContext
+from .sub_agents.datastore import Collections
+from common.metrics import SCHEDULED_RUNS, SCHEDULE_INTERVAL, SCHEDULE_NEW_ITEMS
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerConfig:
+    """Configuration for the in-process pipeline scheduler"""
+    ENABLED = os.getenv("PIPELINE_SCHEDULE", "false").lower() == "true"
+    INTERVAL_SECONDS = float(os.getenv("PIPELINE_SCHEDULE_INTERVAL_SECONDS", "900"))
+    MIN_INTERVAL_SECONDS = float(os.getenv("PIPELINE_SCHEDULE_MIN_INTERVAL_SECONDS", "120"))
+    MAX_INTERVAL_SECONDS = float(os.getenv("PIPELINE_SCHEDULE_MAX_INTERVAL_SECONDS", "3600"))
+    # A run finding at least BUSY_ITEMS new items halves the interval; QUIET_ITEMS or fewer doubles it
+    BUSY_ITEMS = int(os.getenv("PIPELINE_SCHEDULE_BUSY_ITEMS", "50"))
+    QUIET_ITEMS = int(os.getenv("PIPELINE_SCHEDULE_QUIET_ITEMS", "5"))
+    TIGHTEN_FACTOR = 0.5
+    BACKOFF_FACTOR = 2.0
+    # Source ids remembered to tell new items from ones seen in earlier runs
+    SEEN_CAPACITY = 100_000
+
+
+class PipelineScheduler:
+    """
+    Runs the pipeline directly on an adaptive cadence.
+
+    Every run goes through the task manager's run lock, so a scheduled run
+    never overlaps another run (scheduled or /run); if one is in progress
+    the tick is skipped. After each run the interval adapts to how many new
+    items it found, i.e. processed items whose source id no earlier run in
+    this process produced: a busy feed tightens it towards the minimum, a
+    quiet one or a failed run backs it off towards the maximum.
+    """
+
+    def __init__(self, task_manager: Any, runner: Optional[PipelineRunner] = None,
+                 interval: float = SchedulerConfig.INTERVAL_SECONDS,
+                 min_interval: float = SchedulerConfig.MIN_INTERVAL_SECONDS,
+                 max_interval: float = SchedulerConfig.MAX_INTERVAL_SECONDS):
+        self.task_manager = task_manager
+        self.runner = runner or task_manager.pipeline_runner or PipelineRunner()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = self._clamp(interval)
+        self.last_new_items: Optional[int] = None
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        SCHEDULE_INTERVAL.set(self.interval)
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def next_interval(self, new_items: Optional[int]) -> float:
+        """The interval after a run that found new_items (None for a failed run)"""
+        if new_items is None or new_items <= SchedulerConfig.QUIET_ITEMS:
+            return self._clamp(self.interval * SchedulerConfig.BACKOFF_FACTOR)
+        if new_items >= SchedulerConfig.BUSY_ITEMS:
+            return self._clamp(self.interval * SchedulerConfig.TIGHTEN_FACTOR)
+        return self.interval
+
+    def count_new(self, items: Iterable[Dict[str, Any]]) -> int:
+        """Count items not seen before and remember them, forgetting the oldest beyond capacity"""
+        new_items = 0
+        for item in items:
+            source_id = item.get("source_id")
+            if source_id is None:
+                continue
+            if source_id in self._seen:
+                self._seen.move_to_end(source_id)
+                continue
+            self._seen[source_id] = None
+            new_items += 1
+        while len(self._seen) > SchedulerConfig.SEEN_CAPACITY:
+            self._seen.popitem(last=False)
+        return new_items
+
+    async def tick(self) -> Dict[str, Any]:
+        """Run the pipeline once unless a run is in progress, then adapt the interval"""
+        context = PipelineContext()
+        try:
+            report = await self.task_manager.run_exclusive(lambda: self.runner.run(context))
+        except Exception as e:
+            logger.exception("Scheduled pipeline run failed")
+            report = {"status": "error", "error": str(e)}
+
+        if report is None:
+            SCHEDULED_RUNS.inc(status="skipped")
+            logger.info("Scheduled run skipped: another run is in progress")
+            return {"status": "skipped", "next_run_in_seconds": self.interval}
+
+        new_items = None
+        if report["status"] != "error":
+            new_items = self.count_new(context.outputs.get(Collections.PROCESSED_DATA, []))
+            self.last_new_items = new_items
+            SCHEDULE_NEW_ITEMS.set(new_items)
+        self.interval = self.next_interval(new_items)
+        SCHEDULE_INTERVAL.set(self.interval)
+        SCHEDULED_RUNS.inc(status=report["status"])
+        logger.info(f"Scheduled run finished with status {report['status']} and {new_items} new items; "
+                    f"next run in {self.interval:.0f}s")
+        return {"status": report["status"], "new_items": new_items, "next_run_in_seconds": self.interval}
+
+    async def run_forever(self) -> None:
+        while True:
+            await self.tick()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start scheduling on the running event loop; the first run starts right away"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run_forever())
+            logger.info(f"Pipeline scheduler started (interval {self.min_interval:.0f}-{self.max_interval:.0f}s)")
+
+    async def stop(self) -> None:
+        """Stop scheduling; a run in progress is cancelled"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
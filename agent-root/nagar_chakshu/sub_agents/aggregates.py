@@ -0,0 +1,240 @@
+import os
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from firebase_admin import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from common.metrics import count_firestore
+
+from .datastore import get_db
+from .util import HOURS_PER_WEEK, observation_time, record_cell, epoch_hour, hour_of_week, week_index
+
+logger = logging.getLogger(__name__)
+
+
+class AggregateConfig:
+    """Configuration for incident aggregates"""
+    AGGREGATES_COLLECTION = "incident_aggregates"
+    # One marker per applied source item, so retried runs are not counted twice
+    APPLIED_COLLECTION = "incident_aggregates_applied"
+    PRECISIONS = (5, 6)
+    RETAINED_WEEKS = int(os.getenv("AGGREGATE_RETAINED_WEEKS", "12"))
+    EPISODE_GAP_HOURS = int(os.getenv("FORECAST_EPISODE_GAP_HOURS", "1"))
+    # Markers carry an expiry for a Firestore TTL policy on `expire_at`
+    MARKER_TTL = timedelta(days=int(os.getenv("AGGREGATE_MARKER_TTL_DAYS", "30")))
+    # Writes allowed in one transaction (Firestore's limit); each item costs its
+    # marker plus one write per aggregate document it touches
+    MAX_TRANSACTION_WRITES = 500
+
+
+def aggregate_doc_id(precision: int, cell: str, category: str) -> str:
+    return f"{precision}_{cell}_{category}"
+
+
+def merge_observations(
+    existing: Optional[Dict[str, Any]],
+    cell: str,
+    precision: int,
+    category: str,
+    hours: List[int],
+    gap_hours: int = AggregateConfig.EPISODE_GAP_HOURS,
+    retained_weeks: int = AggregateConfig.RETAINED_WEEKS,
+) -> Dict[str, Any]:
+    """
+    Fold new observation hours into an aggregate document.
+
+    The document keeps all-time hour-of-week counts, per-week totals for the
+    most recent weeks, and episode statistics (runs of reports no more than
+    gap_hours apart) used for resolution estimates.
+    """
+    doc = dict(existing) if existing else {
+        "cell": cell,
+        "precision": precision,
+        "category": category,
+        "counts": [0] * HOURS_PER_WEEK,
+        "weeks": {},
+        "total": 0,
+        "first_seen_hour": None,
+        "last_seen_hour": None,
+        "episode_count": 0,
+        "episode_hours": 0,
+    }
+    counts = list(doc.get("counts") or [0] * HOURS_PER_WEEK)
+    weeks = dict(doc.get("weeks") or {})
+    last = doc.get("last_seen_hour")
+
+    for hour in sorted(hours):
+        counts[hour_of_week(hour)] += 1
+        week = str(week_index(hour))
+        weeks[week] = weeks.get(week, 0) + 1
+        if last is None or hour - last > gap_hours:
+            doc["episode_count"] = doc.get("episode_count", 0) + 1
+            doc["episode_hours"] = doc.get("episode_hours", 0) + 1
+            last = hour
+        elif hour > last:
+            doc["episode_hours"] = doc.get("episode_hours", 0) + hour - last
+            last = hour
+
+    if weeks:
+        newest = max(int(week) for week in weeks)
+        weeks = {week: n for week, n in weeks.items() if int(week) > newest - retained_weeks}
+
+    first = doc.get("first_seen_hour")
+    doc.update({
+        "counts": counts,
+        "weeks": weeks,
+        "total": doc.get("total", 0) + len(hours),
+        "first_seen_hour": min(hours) if first is None else min(first, min(hours)),
+        "last_seen_hour": last,
+    })
+    return doc
+
+
+class IncidentAggregates:
+    """
+    Materialized hour-of-week incident counts per geohash cell and category.
+
+    Updated incrementally as processed items are stored. Each batch runs in a
+    Firestore transaction that skips items whose marker already exists, so
+    re-running a stage after a partial failure never double counts.
+    """
+
+    def __init__(self, db=None):
+        self._db = db
+
+    @property
+    def db(self):
+        return self._db if self._db is not None else get_db()
+
+    def apply(self, items: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Add processed items to the aggregates; returns counts of applied and skipped items"""
+        observations = []
+        for item in items:
+            source_id = item.get("source_id")
+            observed = observation_time(item)
+            categories = item.get("categories") or []
+            if isinstance(categories, str):
+                categories = [categories]
+            if not source_id or observed is None or not categories:
+                continue
+            hour = epoch_hour(observed)
+            keys = []
+            for precision in AggregateConfig.PRECISIONS:
+                cell = record_cell(item, precision)
+                if cell is None:
+                    continue
+                keys.extend((precision, cell, category) for category in categories)
+            if keys:
+                observations.append((self._marker_id(source_id), hour, keys))
+
+        applied = sum(self._apply_chunk(chunk) for chunk in self._chunks(observations))
+
+        logger.info(f"Applied {applied} of {len(observations)} items to incident aggregates")
+        return {"applied": applied, "skipped": len(observations) - applied}
+
+    @staticmethod
+    def _chunks(observations: List[Tuple[str, int, List[Tuple[int, str, str]]]],
+                max_writes: int = AggregateConfig.MAX_TRANSACTION_WRITES):
+        """
+        Split observations into transactions of at most max_writes writes:
+        a marker per observation plus one per distinct aggregate document.
+        Observations already applied only lower the count.
+        """
+        chunk, chunk_keys = [], set()
+        for observation in observations:
+            keys = set(observation[2])
+            writes = len(chunk) + 1 + len(chunk_keys | keys)
+            if chunk and writes > max_writes:
+                yield chunk
+                chunk, chunk_keys = [], set()
+            chunk.append(observation)
+            chunk_keys |= keys
+        if chunk:
+            yield chunk
+
+    def _apply_chunk(self, observations: List[Tuple[str, int, List[Tuple[int, str, str]]]]) -> int:
+        aggregates = self.db.collection(AggregateConfig.AGGREGATES_COLLECTION)
+        markers = self.db.collection(AggregateConfig.APPLIED_COLLECTION)
+
+        @firestore.transactional
+        def run(transaction) -> int:
+            marker_refs = [markers.document(marker_id) for marker_id, _, _ in observations]
+            count_firestore("read", AggregateConfig.APPLIED_COLLECTION, len(marker_refs))
+            already_applied = {
+                snapshot.id for snapshot in self.db.get_all(marker_refs, transaction=transaction) if snapshot.exists
+            }
+            pending = [obs for obs in observations if obs[0] not in already_applied]
+            if not pending:
+                return 0
+
+            hours_by_key = defaultdict(list)
+            for _, hour, keys in pending:
+                for key in set(keys):
+                    hours_by_key[key].append(hour)
+
+            refs = {key: aggregates.document(aggregate_doc_id(*key)) for key in hours_by_key}
+            count_firestore("read", AggregateConfig.AGGREGATES_COLLECTION, len(refs))
+            existing = {
+                snapshot.id: snapshot.to_dict() if snapshot.exists else None
+                for snapshot in self.db.get_all(list(refs.values()), transaction=transaction)
+            }
+
+            for key, hours in hours_by_key.items():
+                ref = refs[key]
+                doc = merge_observations(existing.get(ref.id), key[1], key[0], key[2], hours)
+                doc["updated_at"] = firestore.SERVER_TIMESTAMP
+                transaction.set(ref, doc)
+
+            count_firestore("write", AggregateConfig.AGGREGATES_COLLECTION, len(hours_by_key))
+            count_firestore("write", AggregateConfig.APPLIED_COLLECTION, len(pending))
+            expire_at = datetime.now() + AggregateConfig.MARKER_TTL
+            for marker_id, _, _ in pending:
+                transaction.set(markers.document(marker_id), {"applied_at": firestore.SERVER_TIMESTAMP, "expire_at": expire_at})
+            return len(pending)
+
+        try:
+            return run(self.db.transaction())
+        except Exception as e:
+            logger.error(f"Error updating incident aggregates: {e}")
+            return 0
+
+    def exists(self, precision: int) -> bool:
+        """Whether any aggregate documents exist at a precision"""
+        query = self.db.collection(AggregateConfig.AGGREGATES_COLLECTION).where(
+            filter=FieldFilter("precision", "==", precision)
+        ).limit(1)
+        try:
+            found = len(list(query.stream()))
+            count_firestore("read", AggregateConfig.AGGREGATES_COLLECTION, found)
+            return found > 0
+        except Exception as e:
+            logger.error(f"Error reading incident aggregates: {e}")
+            return False
+
+    def read(self, precision: int, cells: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Aggregate documents at a precision, optionally limited to some cells"""
+        collection_ref = self.db.collection(AggregateConfig.AGGREGATES_COLLECTION)
+        query = collection_ref.where(filter=FieldFilter("precision", "==", precision))
+        try:
+            if cells is None:
+                results = [doc.to_dict() for doc in query.stream()]
+                count_firestore("read", AggregateConfig.AGGREGATES_COLLECTION, len(results))
+                return results
+            results = []
+            cells = list(set(cells))
+            # Firestore allows up to 30 values in an "in" filter
+            for start in range(0, len(cells), 30):
+                chunk_query = query.where(filter=FieldFilter("cell", "in", cells[start:start + 30]))
+                results.extend(doc.to_dict() for doc in chunk_query.stream())
+            count_firestore("read", AggregateConfig.AGGREGATES_COLLECTION, len(results))
+            return results
+        except Exception as e:
+            logger.error(f"Error reading incident aggregates: {e}")
+            return []
+
+    @staticmethod
+    def _marker_id(source_id: Any) -> str:
+        return str(source_id).replace("/", "_")
@@ -0,0 +1,385 @@
+import os
+import json
+import time
+import queue
+import hashlib
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from dotenv import load_dotenv
+
+from common.metrics import count_firestore
+
+if TYPE_CHECKING:
+    from google.cloud.firestore_v1.collection import CollectionReference
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class DataStoreConfig:
+    """Configuration for the shared Firestore client"""
+    # "firestore" (default), "emulator" or "memory"
+    BACKEND = os.getenv("FIRESTORE_BACKEND", "firestore").lower()
+    EMULATOR_HOST = os.getenv("FIRESTORE_EMULATOR_HOST", "localhost:8080")
+    PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT") or "nagar-chakshu-local"
+    CREDENTIALS_PATH = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    # Documents per query when reading a collection in pages
+    PAGE_SIZE = int(os.getenv("FIRESTORE_PAGE_SIZE", "500"))
+    # Partitions read concurrently by full-collection scans
+    SCAN_PARTITIONS = int(os.getenv("FIRESTORE_SCAN_PARTITIONS", "8"))
+    # Firestore's limit on writes per batch
+    BATCH_LIMIT = 500
+    # Seconds a shared read is reused unless a write to its collection comes first
+    SHARED_READ_TTL_SECONDS = float(os.getenv("FIRESTORE_SHARED_READ_TTL_SECONDS", "60"))
+
+
+class Collections:
+    """Firestore collection names used by the pipeline"""
+    RAW_DATA = "raw_data"
+    # Compressed raw batches (see raw_archive.py)
+    RAW_ARCHIVE = "raw_archive"
+    RAW_ARCHIVE_CHUNKS = "raw_archive_chunks"
+    USER_REPORTS = "user_reports"
+    PROCESSED_DATA = "processed_data"
+    SUMMARIZED_DATA = "summarized_data"
+    SENTIMENT_DATA = "sentiment_data"
+    PREDICTIVE_DATA = "predictive_data"
+
+
+def document_id(*parts: Any) -> str:
+    """Firestore-safe document id from key parts ("/" is not allowed in ids)"""
+    return "_".join(str(part) for part in parts).replace("/", "_")
+
+
+def content_id(*values: Any) -> str:
+    """Stable id for an item that has none, from the values that identify it"""
+    return hashlib.sha1(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()[:20]
+
+
+_db: Optional[Any] = None
+_db_lock = threading.Lock()
+
+# Marks a scan partition reader as finished
+_DONE = object()
+
+# Fields each collection's shared readers need, and the current shared read per collection
+_shared_fields: Dict[str, Set[str]] = {}
+_shared_reads: Dict[str, Tuple[float, Future]] = {}
+_shared_lock = threading.Lock()
+
+
+def share_reads(name: str, fields: Sequence[str]) -> None:
+    """Declare fields a stage reads from a collection through DataStore.read_shared()"""
+    with _shared_lock:
+        _shared_fields.setdefault(name, set()).update(fields)
+        _shared_reads.pop(name, None)
+
+
+def invalidate_shared_reads(name: Optional[str] = None) -> None:
+    """Drop the shared read of a collection (or of all collections) so the next reader fetches again"""
+    with _shared_lock:
+        if name is None:
+            _shared_reads.clear()
+        else:
+            _shared_reads.pop(name, None)
+
+
+def _create_client(backend: str):
+    if backend == "memory":
+        from .memory_firestore import MemoryFirestore
+        logger.info("Using in-memory Firestore")
+        return MemoryFirestore()
+
+    if backend == "emulator":
+        from google.auth.credentials import AnonymousCredentials
+        from google.cloud import firestore as gcloud_firestore
+        # The client library routes to the emulator when this variable is set
+        os.environ["FIRESTORE_EMULATOR_HOST"] = DataStoreConfig.EMULATOR_HOST
+        logger.info(f"Using Firestore emulator at {DataStoreConfig.EMULATOR_HOST}")
+        return gcloud_firestore.Client(project=DataStoreConfig.PROJECT_ID, credentials=AnonymousCredentials())
+
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if not firebase_admin._apps:
+        cred_path = DataStoreConfig.CREDENTIALS_PATH
+        if cred_path and os.path.exists(cred_path):
+            firebase_admin.initialize_app(credentials.Certificate(cred_path))
+            logger.info(f"Firebase initialized with credentials from: {cred_path}")
+        else:
+            firebase_admin.initialize_app()
+            logger.info("Firebase initialized with default credentials")
+    return firestore.client()
+
+
+def get_db():
+    """
+    Return the process-wide Firestore client, creating it on first use.
+
+    Every stage shares this client and therefore its gRPC channel. The
+    backend is chosen by FIRESTORE_BACKEND: the real project, the local
+    emulator, or an in-memory store for tests and benchmarks.
+    """
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                try:
+                    _db = _create_client(DataStoreConfig.BACKEND)
+                    logger.info("Firestore client initialized successfully")
+                except Exception as e:
+                    logger.error(f"Failed to initialize Firestore client: {e}")
+                    raise
+    return _db
+
+
+def set_db(db) -> None:
+    """Replace the shared client, e.g. with a MemoryFirestore in tests"""
+    global _db
+    with _db_lock:
+        _db = db
+    invalidate_shared_reads()
+
+
+class DataStore:
+    """
+    Typed access to the pipeline's collections on the shared client.
+
+    The client is resolved on each access rather than at construction, so
+    creating a service never opens a connection.
+    """
+
+    def __init__(self, db=None):
+        self._db = db
+
+    @property
+    def db(self):
+        return self._db if self._db is not None else get_db()
+
+    def collection(self, name: str) -> "CollectionReference":
+        return self.db.collection(name)
+
+    def upsert(self, name: str, documents: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Write (document id, data) pairs with set(merge=True) in batches.
+
+        Writing the same ids again updates those documents in place, so a
+        retried or repeated run leaves one document per id. Returns the ids
+        written and an error per failed batch; other batches still commit.
+        """
+        # One write per id: later data merges over earlier, as two merge writes would
+        merged: Dict[str, Dict[str, Any]] = {}
+        for doc_id, data in documents:
+            merged[doc_id] = {**merged[doc_id], **data} if doc_id in merged else data
+
+        collection_ref = self.collection(name)
+        written: List[str] = []
+        errors: List[str] = []
+        batch, batch_ids = self.db.batch(), []
+
+        def commit() -> None:
+            try:
+                batch.commit()
+                written.extend(batch_ids)
+            except Exception as e:
+                logger.error(f"Error writing {len(batch_ids)} documents to {name}: {e}")
+                errors.append(f"Error writing documents {batch_ids[0]}..{batch_ids[-1]}: {e}")
+
+        for doc_id, data in merged.items():
+            batch.set(collection_ref.document(doc_id), data, merge=True)
+            batch_ids.append(doc_id)
+            if len(batch_ids) == DataStoreConfig.BATCH_LIMIT:
+                commit()
+                batch, batch_ids = self.db.batch(), []
+        if batch_ids:
+            commit()
+        invalidate_shared_reads(name)
+        return {"document_ids": written, "errors": errors}
+
+    def read(self, name: str, fields: Optional[Sequence[str]] = None,
+             page_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a collection's documents as dicts.
+
+        With fields, only those top-level fields are fetched (a Firestore
+        projection): the rest are neither sent over the wire nor decoded.
+        Documents missing a field simply lack that key. Each dict has the
+        document id as `id` unless the document has an `id` field. Documents
+        are read page by page, so at most one page is held at a time.
+        """
+        for page in self.pages(name, fields, page_size):
+            yield from page
+
+    def pages(self, name: str, fields: Optional[Sequence[str]] = None,
+              page_size: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Read a collection in pages of page_size documents, in document id order.
+
+        Each page is its own query resuming after the last document of the
+        previous page, so no single stream stays open for the whole
+        collection and a caller that drops each page keeps memory bounded.
+        """
+        return self._paginate(self.collection(name), fields, page_size)
+
+    @staticmethod
+    def _paginate(query, fields: Optional[Sequence[str]] = None,
+                  page_size: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        page_size = page_size or DataStoreConfig.PAGE_SIZE
+        if fields:
+            query = query.select(list(fields))
+        query = query.limit(page_size)
+
+        cursor = None
+        while True:
+            docs = list((query.start_after(cursor) if cursor is not None else query).stream())
+            if not docs:
+                return
+            # Documents carry their id, unless they store an `id` field of their own
+            yield [{"id": doc.id, **doc.to_dict()} for doc in docs]
+            if len(docs) < page_size:
+                return
+            cursor = docs[-1]
+
+    async def iter_pages(self, name: str, fields: Optional[Sequence[str]] = None,
+                         page_size: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """pages() as an async iterator; each page is fetched off the event loop"""
+        async for page in self._iterate(self.pages(name, fields, page_size)):
+            yield page
+
+    async def read_shared(self, name: str) -> List[Dict[str, Any]]:
+        """
+        Read a whole collection once for every stage that registered with share_reads().
+
+        The fetch selects the union of the registered fields. Concurrent
+        callers wait on the same fetch, and later callers reuse its result
+        until a write through upsert() invalidates it or
+        SHARED_READ_TTL_SECONDS pass. The documents are shared between
+        callers, so treat them as read-only.
+        """
+        with _shared_lock:
+            entry = _shared_reads.get(name)
+            fresh = entry is not None and time.monotonic() - entry[0] < DataStoreConfig.SHARED_READ_TTL_SECONDS
+            if fresh and not (entry[1].done() and entry[1].exception() is not None):
+                future, owner = entry[1], False
+            else:
+                future, owner = Future(), True
+                _shared_reads[name] = (time.monotonic(), future)
+            fields = sorted(_shared_fields.get(name, ()))
+
+        if owner:
+            try:
+                documents = await asyncio.to_thread(lambda: list(self.read(name, fields or None)))
+                count_firestore("read", name, len(documents))
+                future.set_result(documents)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+        return list(await asyncio.wrap_future(future))
+
+    def partitions(self, name: str, partition_count: Optional[int] = None) -> List[Any]:
+        """
+        Split a collection into queries over disjoint document id ranges.
+
+        Uses Firestore partition queries on the collection group, which may
+        return fewer partitions than asked for (a small collection is one).
+        """
+        partition_count = partition_count or DataStoreConfig.SCAN_PARTITIONS
+        group = self.db.collection_group(name)
+        return [partition.query() for partition in group.get_partitions(partition_count)]
+
+    def scan(self, name: str, fields: Optional[Sequence[str]] = None, partition_count: Optional[int] = None,
+             page_size: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Read a whole collection with its partitions paged concurrently.
+
+        Each partition gets a reader thread; their pages are merged into
+        one iterator in arrival order, so pages from different partitions
+        interleave. At most two pages per partition wait in the merge
+        queue, which bounds memory when the consumer is slower than the
+        readers. Falls back to pages() when the collection is one partition.
+        """
+        partition_count = partition_count or DataStoreConfig.SCAN_PARTITIONS
+        queries = self.partitions(name, partition_count) if partition_count > 1 else []
+        if len(queries) <= 1:
+            yield from self.pages(name, fields, page_size)
+            return
+
+        merged: "queue.Queue[Any]" = queue.Queue(maxsize=2 * len(queries))
+        stop = threading.Event()
+
+        def offer(item) -> bool:
+            while not stop.is_set():
+                try:
+                    merged.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read_partition(query) -> None:
+            try:
+                for page in self._paginate(query, fields, page_size):
+                    if not offer(page):
+                        return
+            except Exception as e:
+                offer(e)
+            finally:
+                offer(_DONE)
+
+        executor = ThreadPoolExecutor(max_workers=len(queries), thread_name_prefix=f"scan-{name}")
+        try:
+            for query in queries:
+                executor.submit(read_partition, query)
+            remaining = len(queries)
+            while remaining:
+                item = merged.get()
+                if item is _DONE:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            # Also runs when the consumer stops early: readers give up instead of blocking on the queue
+            stop.set()
+            executor.shutdown(wait=False)
+
+    async def iter_scan(self, name: str, fields: Optional[Sequence[str]] = None, partition_count: Optional[int] = None,
+                        page_size: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """scan() as an async iterator"""
+        async for page in self._iterate(self.scan(name, fields, partition_count, page_size)):
+            yield page
+
+    @staticmethod
+    async def _iterate(pages: Iterator[List[Dict[str, Any]]]) -> AsyncIterator[List[Dict[str, Any]]]:
+        try:
+            while True:
+                page = await asyncio.to_thread(next, pages, None)
+                if page is None:
+                    return
+                yield page
+        finally:
+            pages.close()
+
+    def raw_data(self) -> "CollectionReference":
+        return self.collection(Collections.RAW_DATA)
+
+    def user_reports(self) -> "CollectionReference":
+        return self.collection(Collections.USER_REPORTS)
+
+    def processed_data(self) -> "CollectionReference":
+        return self.collection(Collections.PROCESSED_DATA)
+
+    def summarized_data(self) -> "CollectionReference":
+        return self.collection(Collections.SUMMARIZED_DATA)
+
+    def sentiment_data(self) -> "CollectionReference":
+        return self.collection(Collections.SENTIMENT_DATA)
+
+    def predictive_data(self) -> "CollectionReference":
+        return self.collection(Collections.PREDICTIVE_DATA)
@@ -0,0 +1,120 @@
+import os
+import time
+import asyncio
+import logging
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HandoffConfig:
+    """Configuration for in-process stage handoff"""
+    # Threads persisting stage output; 1 keeps writes in the order stages produced them
+    WRITE_BEHIND_WORKERS = int(os.getenv("PIPELINE_WRITE_BEHIND_WORKERS", "1"))
+
+
+class PipelineContext:
+    """
+    State shared by the stages of one pipeline run.
+
+    A stage publishes its output under the collection it belongs to and the
+    next stage takes it from here instead of reading the collection back.
+    Persistence still happens, as write-behind jobs on a small thread pool;
+    flush() waits for them at the end of the run. Reads that must see this
+    run's writes (e.g. aggregates) call wait() for the collection first.
+    """
+
+    def __init__(self, workers: int = HandoffConfig.WRITE_BEHIND_WORKERS):
+        self.outputs: Dict[str, List[Dict[str, Any]]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="write-behind")
+        self._pending: List[Dict[str, Any]] = []
+
+    def publish(self, collection: str, items: List[Dict[str, Any]]) -> None:
+        self.outputs.setdefault(collection, []).extend(items)
+
+    def consume(self, collection: str) -> Optional[List[Dict[str, Any]]]:
+        """This run's output for a collection, or None if no stage published it"""
+        if collection not in self.outputs:
+            return None
+        return list(self.outputs[collection])
+
+    def write_behind(self, collection: str, func: Callable, *args) -> Future:
+        """Run a blocking write in the background; safe to call from any thread"""
+        def timed():
+            started = time.perf_counter()
+            result = func(*args)
+            return result, round((time.perf_counter() - started) * 1000, 1)
+
+        future = self._executor.submit(contextvars.copy_context().run, timed)
+        self._pending.append({"collection": collection, "future": future})
+        return future
+
+    async def wait(self, collection: str) -> None:
+        """Wait for the pending writes to a collection"""
+        futures = [job["future"] for job in self._pending if job["collection"] == collection]
+        if futures:
+            await asyncio.gather(*(asyncio.wrap_future(future) for future in futures), return_exceptions=True)
+
+    async def flush(self) -> List[Dict[str, Any]]:
+        """Wait for every write and report each one's outcome"""
+        reports = []
+        try:
+            for job in self._pending:
+                duration_ms = None
+                try:
+                    result, duration_ms = await asyncio.wrap_future(job["future"])
+                    status = "error" if isinstance(result, dict) and "error" in result else "success"
+                except Exception as e:
+                    logger.exception(f"Write-behind to {job['collection']} failed")
+                    result = {"error": str(e)}
+                    status = "error"
+                reports.append({
+                    "collection": job["collection"],
+                    "status": status,
+                    "duration_ms": duration_ms,
+                    "result": result,
+                })
+        finally:
+            self._executor.shutdown(wait=False)
+        return reports
+
+
+_current: contextvars.ContextVar[Optional[PipelineContext]] = contextvars.ContextVar("pipeline_context", default=None)
+
+
+def current_context() -> Optional[PipelineContext]:
+    """The active run's context; None outside PipelineRunner (e.g. under the ADK agents)"""
+    return _current.get()
+
+
+@contextmanager
+def use_context(context: PipelineContext):
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
+
+
+def hand_off(collection: str, items: List[Dict[str, Any]], write: Callable) -> Optional[Dict[str, Any]]:
+    """
+    Publish a stage's output to the active run and schedule write(items).
+
+    Returns the scheduling result, or None when no run is active and the
+    caller should write synchronously as before.
+    """
+    context = current_context()
+    if context is None:
+        return None
+    context.publish(collection, items)
+    context.write_behind(collection, write, list(items))
+    return {"status": "scheduled", "scheduled_count": len(items), "collection": collection}
+
+
+def handed_off(collection: str) -> Optional[List[Dict[str, Any]]]:
+    """Items an earlier stage of the active run published for a collection, if any"""
+    context = current_context()
+    return context.consume(collection) if context is not None else None
@@ -0,0 +1,213 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from dotenv import load_dotenv
+
+from common.metrics import LLM_REQUESTS, LLM_RETRIES, LLM_DURATION
+
+# Settings below are read at import, before the agent modules load .env themselves
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class LLMConfig:
+    """Configuration for the shared LLM gateway"""
+    MODEL = os.getenv("LLM_MODEL", "gemini-1.5-pro")
+    # Process-wide token bucket
+    RATE_PER_SECOND = float(os.getenv("LLM_RATE_PER_SECOND", "5"))
+    BURST = int(os.getenv("LLM_BURST", "10"))
+    # Concurrent in-flight calls, overall and per stage
+    MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    STAGE_CONCURRENCY = int(os.getenv("LLM_STAGE_CONCURRENCY", "4"))
+    TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1"))
+    BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "30"))
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when a gateway call fails after retries or misses its deadline"""
+
+
+class LLMBackend:
+    """Interface for model backends used by the gateway"""
+
+    async def generate(self, contents: Union[str, List[Any]], generation_config: Optional[Dict[str, Any]] = None) -> str:
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    """google.generativeai backend; the SDK is configured on first use"""
+
+    def __init__(self, model_name: str = LLMConfig.MODEL):
+        self.model_name = model_name
+        self._model = None
+
+    def _get_model(self):
+        if self._model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    async def generate(self, contents, generation_config=None) -> str:
+        response = await self._get_model().generate_content_async(contents, generation_config=generation_config)
+        return response.text
+
+
+class FakeBackend(LLMBackend):
+    """
+    Local stand-in for tests and benchmarks.
+
+    `responder` maps the prompt contents (and generation config) to the
+    response text; `latency` seconds are awaited before each response.
+    """
+
+    def __init__(self, responder: Optional[Callable[..., str]] = None, latency: float = 0.0):
+        self.responder = responder or (lambda contents, generation_config=None: "")
+        self.latency = latency
+        self.calls = 0
+
+    async def generate(self, contents, generation_config=None) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.responder(contents, generation_config)
+
+
+class TokenBucket:
+    """Async token bucket shared by every caller in the process"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate-limit and server errors worth retrying"""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    code = getattr(error, "code", None)
+    if callable(code):
+        code = code()
+    code = getattr(code, "value", code)
+    if isinstance(code, tuple):
+        code = code[0]
+    try:
+        return int(code) in RETRYABLE_STATUS_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+class LLMGateway:
+    """
+    Single entry point for model calls from every pipeline stage.
+
+    Each call waits for a token from the process-wide bucket and a slot in
+    both the global and the stage's concurrency limit, then runs with a
+    deadline. Rate-limit (429) and server (5xx) errors and timeouts are
+    retried with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[LLMBackend] = None,
+        rate_per_second: float = LLMConfig.RATE_PER_SECOND,
+        burst: int = LLMConfig.BURST,
+        max_concurrency: int = LLMConfig.MAX_CONCURRENCY,
+        stage_concurrency: int = LLMConfig.STAGE_CONCURRENCY,
+        stage_limits: Optional[Dict[str, int]] = None,
+        timeout: float = LLMConfig.TIMEOUT_SECONDS,
+        max_retries: int = LLMConfig.MAX_RETRIES,
+        backoff_base: float = LLMConfig.BACKOFF_BASE_SECONDS,
+        backoff_max: float = LLMConfig.BACKOFF_MAX_SECONDS,
+    ):
+        self.backend = backend or GeminiBackend()
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.global_limit = asyncio.Semaphore(max_concurrency)
+        self.stage_concurrency = stage_concurrency
+        self.stage_limits = {stage: asyncio.Semaphore(limit) for stage, limit in (stage_limits or {}).items()}
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _stage_limit(self, stage: str) -> asyncio.Semaphore:
+        if stage not in self.stage_limits:
+            self.stage_limits[stage] = asyncio.Semaphore(self.stage_concurrency)
+        return self.stage_limits[stage]
+
+    async def generate(
+        self,
+        stage: str,
+        contents: Union[str, List[Any]],
+        generation_config: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """Return the model's text for contents, raising LLMError once retries are exhausted"""
+        attempt = 0
+        started = time.perf_counter()
+        while True:
+            try:
+                async with self._stage_limit(stage), self.global_limit:
+                    await self.bucket.acquire()
+                    response = await asyncio.wait_for(
+                        self.backend.generate(contents, generation_config),
+                        timeout=timeout or self.timeout,
+                    )
+                LLM_REQUESTS.inc(stage=stage, status="success")
+                LLM_DURATION.observe(time.perf_counter() - started, stage=stage)
+                return response
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    LLM_REQUESTS.inc(stage=stage, status="error")
+                    LLM_DURATION.observe(time.perf_counter() - started, stage=stage)
+                    raise LLMError(f"{stage} LLM call failed after {attempt + 1} attempts: {e}") from e
+                LLM_RETRIES.inc(stage=stage)
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                delay = random.uniform(0, delay)
+                logger.warning(f"{stage} LLM call failed ({e}); retrying in {delay:.1f}s")
+                attempt += 1
+                await asyncio.sleep(delay)
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Return the process-wide gateway, creating it on first use"""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
+
+
+def set_llm_backend(backend: LLMBackend) -> LLMGateway:
+    """Swap the backend of the process-wide gateway, e.g. for a FakeBackend in tests"""
+    gateway = get_llm_gateway()
+    gateway.backend = backend
+    return gateway
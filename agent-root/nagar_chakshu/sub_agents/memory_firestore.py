@@ -0,0 +1,489 @@
+import uuid
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from google.cloud.firestore_v1 import transforms
+
+# Direction strings used by the real client's Query.order_by
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+
+def _copy(value: Any) -> Any:
+    """Detach stored values from the caller's dicts and lists (cheaper than deepcopy)"""
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+def _get_field(data: Dict[str, Any], field_path: str) -> Tuple[bool, Any]:
+    """Look up a dotted field path; returns (found, value)"""
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return False, None
+        value = value[part]
+    return True, value
+
+
+def _set_field(data: Dict[str, Any], field_path: str, value: Any) -> None:
+    parts = field_path.split(".")
+    for part in parts[:-1]:
+        data = data.setdefault(part, {})
+    if value is transforms.DELETE_FIELD:
+        data.pop(parts[-1], None)
+    else:
+        data[parts[-1]] = value
+
+
+def _resolve(value: Any, current: Any = None) -> Any:
+    """Apply server-side sentinels the way Firestore would at commit time"""
+    if value is transforms.SERVER_TIMESTAMP:
+        return datetime.now()
+    if isinstance(value, transforms.Increment):
+        return (current or 0) + value.value
+    if isinstance(value, dict):
+        current = current if isinstance(current, dict) else {}
+        return {
+            key: _resolve(item, current.get(key)) for key, item in value.items() if item is not transforms.DELETE_FIELD
+        }
+    if isinstance(value, list):
+        return [_resolve(item) for item in value]
+    return value
+
+
+def _merge(existing: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(existing)
+    for key, value in data.items():
+        if value is transforms.DELETE_FIELD:
+            merged.pop(key, None)
+        elif isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = _resolve(value, merged.get(key))
+    return merged
+
+
+def _matches(found: bool, value: Any, op: str, expected: Any) -> bool:
+    if op == "!=" or op == "not-in":
+        if not found:
+            return False
+        return value != expected if op == "!=" else value not in expected
+    if not found:
+        return False
+    try:
+        if op == "==":
+            return value == expected
+        if op == "<":
+            return value < expected
+        if op == "<=":
+            return value <= expected
+        if op == ">":
+            return value > expected
+        if op == ">=":
+            return value >= expected
+        if op == "in":
+            return value in expected
+        if op == "array-contains":
+            return isinstance(value, list) and expected in value
+        if op == "array-contains-any":
+            return isinstance(value, list) and any(item in value for item in expected)
+    except TypeError:
+        # Firestore never matches values of different types in range filters
+        return False
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+class MemoryDocumentSnapshot:
+    """Read-only view of a document at the time it was read"""
+
+    def __init__(self, reference: "MemoryDocumentReference", data: Optional[Dict[str, Any]]):
+        self.reference = reference
+        self._data = data
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return _copy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        found, value = _get_field(self._data or {}, field_path)
+        if not found:
+            raise KeyError(field_path)
+        return _copy(value)
+
+
+class MemoryDocumentReference:
+    def __init__(self, client: "MemoryFirestore", collection_id: str, document_id: str):
+        self._client = client
+        self._collection_id = collection_id
+        self.id = document_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection_id}/{self.id}"
+
+    @property
+    def parent(self) -> "MemoryCollectionReference":
+        return self._client.collection(self._collection_id)
+
+    def get(self, field_paths: Optional[Iterable[str]] = None, transaction=None) -> MemoryDocumentSnapshot:
+        return self._client._read(self, field_paths)
+
+    def create(self, document_data: Dict[str, Any]) -> datetime:
+        return self._client._write(self, "create", document_data)
+
+    def set(self, document_data: Dict[str, Any], merge: bool = False) -> datetime:
+        return self._client._write(self, "merge" if merge else "set", document_data)
+
+    def update(self, field_updates: Dict[str, Any]) -> datetime:
+        return self._client._write(self, "update", field_updates)
+
+    def delete(self) -> datetime:
+        return self._client._write(self, "delete", None)
+
+
+class MemoryQuery:
+    """Immutable query over one collection; each builder method returns a new query"""
+
+    def __init__(self, client: "MemoryFirestore", collection_id: str, filters=(), orders=(), limit=None,
+                 offset=0, start_after=None, projection=None, id_range=None):
+        self._client = client
+        self._collection_id = collection_id
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._offset = offset
+        self._start_after = start_after
+        self._projection = projection
+        # (start_at, end_before) document ids of a partition; None is unbounded
+        self._id_range = id_range
+
+    def _copy_with(self, **changes) -> "MemoryQuery":
+        state = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit": self._limit,
+            "offset": self._offset,
+            "start_after": self._start_after,
+            "projection": self._projection,
+            "id_range": self._id_range,
+        }
+        state.update(changes)
+        return MemoryQuery(self._client, self._collection_id, **state)
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None, value: Any = None,
+              filter=None) -> "MemoryQuery":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy_with(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "MemoryQuery":
+        return self._copy_with(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "MemoryQuery":
+        return self._copy_with(limit=count)
+
+    def offset(self, num_to_skip: int) -> "MemoryQuery":
+        return self._copy_with(offset=num_to_skip)
+
+    def start_after(self, document_fields_or_snapshot) -> "MemoryQuery":
+        return self._copy_with(start_after=document_fields_or_snapshot)
+
+    def select(self, field_paths: Iterable[str]) -> "MemoryQuery":
+        return self._copy_with(projection=list(field_paths))
+
+    def _sort_key(self, document_id: str, data: Dict[str, Any]) -> tuple:
+        return tuple(_get_field(data, field_path)[1] for field_path, _ in self._orders) + (document_id,)
+
+    def _cursor_key(self) -> Optional[tuple]:
+        cursor = self._start_after
+        if cursor is None:
+            return None
+        if isinstance(cursor, MemoryDocumentSnapshot):
+            return self._sort_key(cursor.id, cursor._data or {})
+        return tuple(_get_field(cursor, field_path)[1] for field_path, _ in self._orders)
+
+    def _results(self) -> List[Tuple[str, Dict[str, Any]]]:
+        documents = self._client._documents(self._collection_id)
+        results = [
+            (document_id, data) for document_id, data in documents
+            if all(_matches(*_get_field(data, field), op, value) for field, op, value in self._filters)
+            and all(_get_field(data, field)[0] for field, _ in self._orders)
+        ]
+        if self._id_range is not None:
+            start_at, end_before = self._id_range
+            results = [
+                (document_id, data) for document_id, data in results
+                if (start_at is None or document_id >= start_at) and (end_before is None or document_id < end_before)
+            ]
+        # Single sort direction per query is enough for the pipeline's queries
+        descending = bool(self._orders) and self._orders[0][1] == DESCENDING
+        try:
+            results.sort(key=lambda item: self._sort_key(*item), reverse=descending)
+        except TypeError:
+            results.sort(key=lambda item: tuple(map(str, self._sort_key(*item))), reverse=descending)
+
+        cursor = self._cursor_key()
+        if cursor is not None:
+            width = len(cursor)
+            if descending:
+                results = [item for item in results if self._sort_key(*item)[:width] < cursor]
+            else:
+                results = [item for item in results if self._sort_key(*item)[:width] > cursor]
+        results = results[self._offset:]
+        if self._limit is not None:
+            results = results[:self._limit]
+        return results
+
+    def stream(self, transaction=None) -> Iterator[MemoryDocumentSnapshot]:
+        results = self._results()
+        self._client._count("reads", max(1, len(results)))
+        for document_id, data in results:
+            if self._projection is not None:
+                projected = {}
+                for field_path in self._projection:
+                    found, value = _get_field(data, field_path)
+                    if found:
+                        _set_field(projected, field_path, value)
+                data = projected
+            yield MemoryDocumentSnapshot(
+                MemoryDocumentReference(self._client, self._collection_id, document_id), data
+            )
+
+    def get(self, transaction=None) -> List[MemoryDocumentSnapshot]:
+        return list(self.stream(transaction=transaction))
+
+
+class MemoryCollectionReference(MemoryQuery):
+    def __init__(self, client: "MemoryFirestore", collection_id: str):
+        super().__init__(client, collection_id)
+
+    @property
+    def id(self) -> str:
+        return self._collection_id
+
+    def document(self, document_id: Optional[str] = None) -> MemoryDocumentReference:
+        return MemoryDocumentReference(self._client, self._collection_id, document_id or uuid.uuid4().hex[:20])
+
+    def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None) -> Tuple[datetime, MemoryDocumentReference]:
+        reference = self.document(document_id)
+        return reference.create(document_data), reference
+
+    def list_documents(self) -> List[MemoryDocumentReference]:
+        return [self.document(document_id) for document_id, _ in self._client._documents(self._collection_id)]
+
+
+class MemoryQueryPartition:
+    """One document id range of a collection group, like the client's QueryPartition"""
+
+    def __init__(self, parent: MemoryQuery, start_at: Optional[str], end_at: Optional[str]):
+        self._parent = parent
+        self.start_at = start_at
+        self.end_at = end_at
+
+    def query(self) -> MemoryQuery:
+        return self._parent._copy_with(id_range=(self.start_at, self.end_at))
+
+
+class MemoryCollectionGroup(MemoryQuery):
+    """Collection group query; collections are flat here, so it covers one collection"""
+
+    def __init__(self, client: "MemoryFirestore", collection_id: str):
+        super().__init__(client, collection_id)
+
+    def get_partitions(self, partition_count: int, retry=None, timeout=None) -> Iterator[MemoryQueryPartition]:
+        """Split into at most partition_count contiguous document id ranges"""
+        document_ids = sorted(document_id for document_id, _ in self._client._documents(self._collection_id))
+        partition_count = max(1, min(partition_count, len(document_ids)))
+        size = -(-len(document_ids) // partition_count) if document_ids else 1
+        boundaries = [document_ids[index] for index in range(size, len(document_ids), size)]
+        starts = [None] + boundaries
+        ends = boundaries + [None]
+        for start_at, end_at in zip(starts, ends):
+            yield MemoryQueryPartition(self, start_at, end_at)
+
+
+class MemoryWriteBatch:
+    """Buffers writes and applies them together on commit"""
+
+    def __init__(self, client: "MemoryFirestore"):
+        self._client = client
+        self._writes: List[Tuple[MemoryDocumentReference, str, Optional[Dict[str, Any]]]] = []
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def create(self, reference: MemoryDocumentReference, document_data: Dict[str, Any]) -> None:
+        self._writes.append((reference, "create", _copy(document_data)))
+
+    def set(self, reference: MemoryDocumentReference, document_data: Dict[str, Any], merge: bool = False) -> None:
+        self._writes.append((reference, "merge" if merge else "set", _copy(document_data)))
+
+    def update(self, reference: MemoryDocumentReference, field_updates: Dict[str, Any]) -> None:
+        self._writes.append((reference, "update", _copy(field_updates)))
+
+    def delete(self, reference: MemoryDocumentReference) -> None:
+        self._writes.append((reference, "delete", None))
+
+    def commit(self) -> List[datetime]:
+        writes, self._writes = self._writes, []
+        return self._client._write_all(writes)
+
+
+class MemoryTransaction(MemoryWriteBatch):
+    """
+    Transaction compatible with firestore.transactional.
+
+    Writes are buffered until commit and the whole store is locked while they
+    are applied, which is enough isolation for a single process.
+    """
+
+    def __init__(self, client: "MemoryFirestore", max_attempts: int = 5, read_only: bool = False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+
+    @property
+    def in_progress(self) -> bool:
+        return self._id is not None
+
+    def _begin(self, retry_id=None) -> None:
+        self._id = uuid.uuid4().bytes
+
+    def _clean_up(self) -> None:
+        self._writes = []
+        self._id = None
+
+    def _rollback(self) -> None:
+        self._clean_up()
+
+    def _commit(self) -> List[datetime]:
+        try:
+            return self.commit()
+        finally:
+            self._clean_up()
+
+
+class MemoryFirestore:
+    """
+    In-process stand-in for a Firestore client.
+
+    Covers the part of the client API the pipeline uses: collections, documents,
+    add/set/update/delete, filtered and ordered queries with limits, cursors and
+    projections, collection group partitions, get_all, write batches and
+    transactions. Document reads and
+    writes are counted the way Firestore bills them, so benchmarks can report
+    operation counts alongside timings.
+    """
+
+    def __init__(self):
+        self._store: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.RLock()
+        self.reads = 0
+        self.writes = 0
+        self.deletes = 0
+
+    def collection(self, collection_id: str) -> MemoryCollectionReference:
+        return MemoryCollectionReference(self, collection_id)
+
+    def collection_group(self, collection_id: str) -> MemoryCollectionGroup:
+        return MemoryCollectionGroup(self, collection_id)
+
+    def collections(self) -> List[MemoryCollectionReference]:
+        with self._lock:
+            return [self.collection(collection_id) for collection_id in self._store]
+
+    def document(self, document_path: str) -> MemoryDocumentReference:
+        collection_id, document_id = document_path.split("/", 1)
+        return self.collection(collection_id).document(document_id)
+
+    def get_all(self, references: Iterable[MemoryDocumentReference], field_paths=None,
+                transaction=None) -> Iterator[MemoryDocumentSnapshot]:
+        for reference in references:
+            yield self._read(reference, field_paths)
+
+    def batch(self) -> MemoryWriteBatch:
+        return MemoryWriteBatch(self)
+
+    def transaction(self, max_attempts: int = 5, read_only: bool = False) -> MemoryTransaction:
+        return MemoryTransaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+            self.reads = self.writes = self.deletes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "reads": self.reads,
+                "writes": self.writes,
+                "deletes": self.deletes,
+                "documents": {collection_id: len(documents) for collection_id, documents in self._store.items()},
+            }
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _documents(self, collection_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            return list(self._store.get(collection_id, {}).items())
+
+    def _read(self, reference: MemoryDocumentReference, field_paths=None) -> MemoryDocumentSnapshot:
+        with self._lock:
+            self.reads += 1
+            data = self._store.get(reference._collection_id, {}).get(reference.id)
+        if data is not None and field_paths is not None:
+            projected = {}
+            for field_path in field_paths:
+                found, value = _get_field(data, field_path)
+                if found:
+                    _set_field(projected, field_path, value)
+            data = projected
+        return MemoryDocumentSnapshot(reference, data)
+
+    def _write(self, reference: MemoryDocumentReference, kind: str, data: Optional[Dict[str, Any]]) -> datetime:
+        return self._write_all([(reference, kind, _copy(data))])[0]
+
+    def _write_all(self, writes: List[Tuple[MemoryDocumentReference, str, Optional[Dict[str, Any]]]]) -> List[datetime]:
+        with self._lock:
+            # Validate first so a failing write leaves the store untouched, as a commit would
+            for reference, kind, _ in writes:
+                exists = reference.id in self._store.get(reference._collection_id, {})
+                if kind == "create" and exists:
+                    raise ValueError(f"Document already exists: {reference.path}")
+                if kind == "update" and not exists:
+                    raise ValueError(f"No document to update: {reference.path}")
+
+            results = []
+            for reference, kind, data in writes:
+                documents = self._store.setdefault(reference._collection_id, {})
+                if kind == "delete":
+                    documents.pop(reference.id, None)
+                    self.deletes += 1
+                elif kind == "merge":
+                    documents[reference.id] = _merge(documents.get(reference.id, {}), data)
+                    self.writes += 1
+                elif kind == "update":
+                    updated = dict(documents[reference.id])
+                    for field_path, value in data.items():
+                        _set_field(updated, field_path, _resolve(value, _get_field(updated, field_path)[1]))
+                    documents[reference.id] = updated
+                    self.writes += 1
+                else:
+                    documents[reference.id] = _resolve(data)
+                    self.writes += 1
+                results.append(datetime.now())
+            return results
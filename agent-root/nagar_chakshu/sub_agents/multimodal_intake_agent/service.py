@@ -0,0 +1,399 @@
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Union
+import dotenv
+from dotenv import load_dotenv
+from typing import List, Dict, Tuple
+import random
+from datetime import datetime, timedelta
+import asyncio
+import mimetypes
+import tempfile
+from io import BytesIO
+from ..util import KEYWORDS, CATEGORY_VALIDITY_DURATION, source_time
+from ..aggregates import IncidentAggregates
+from ..llm_gateway import get_llm_gateway
+from ..datastore import DataStore, Collections, document_id, content_id
+from ..handoff import hand_off
+from common.metrics import instrument_tool, count_items, count_firestore
+
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+
+LLM_STAGE = "multimodal_intake"
+STAGE = "multimodal_intake_agent"
+
+# Fields of a user report that media checks and processing read
+REPORT_FIELDS = ("id", "description", "mediaUrl", "location", "place", "timestamp")
+
+class MultiModalIntakeService:
+    """Main service class for data fusing operations"""
+    
+    def __init__(self):
+        self.store = DataStore()
+        self.aggregates = IncidentAggregates()
+        self.report_count = 0
+        self.processed_count = 0
+        # Totals of the per-page writes done by process_reports
+        self.store_result: Dict[str, Any] = {}
+        
+    @instrument_tool(STAGE)
+    async def get_submitted_reports(self) -> Dict[str, Any]:
+        """Set up reading user submitted reports; process_reports reads them from Firestore page by page"""
+        self.report_count = self.processed_count = 0
+        self.store_result = {"stored_count": 0, "scheduled_count": 0, "errors": []}
+        return {"status": "success", "source": Collections.USER_REPORTS, "paged": True}
+        
+    def download_media(self, url):
+        import requests
+
+        response = requests.get(url)
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch media: {url}")
+                
+        content_type = response.headers.get("Content-Type") or mimetypes.guess_type(url)[0]
+        return response.content, content_type
+
+    async def analyze_image_bytes(self, image_bytes, prompt):
+        from PIL import Image
+
+        image = Image.open(BytesIO(image_bytes))
+        response = await get_llm_gateway().generate(LLM_STAGE, [prompt, image])
+        return self._parse_yes_no_response(response)
+
+    def extract_video_frames(self, video_bytes, max_frames=5):
+        """Extract up to max_frames evenly spaced frames as PIL images"""
+        # OpenCV and PIL are only needed for media reports; keep them off the import path
+        import cv2
+        from PIL import Image
+
+        frames = []
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as temp_video:
+            temp_video.write(video_bytes)
+            temp_video.flush()
+            
+            cap = cv2.VideoCapture(temp_video.name)
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            
+            for i in range(max_frames):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_count * i // max_frames)
+                ret, frame = cap.read()
+                            
+                if ret:
+                    _, buffer = cv2.imencode('.jpg', frame)
+                    frames.append(Image.open(BytesIO(buffer.tobytes())))
+            
+            cap.release()
+        return frames
+
+    async def analyze_video_bytes(self, video_bytes, prompt):
+        max_frames = 5  # Limit to 5 frames for analysis
+        frames = await asyncio.to_thread(self.extract_video_frames, video_bytes, max_frames)
+        gateway = get_llm_gateway()
+        responses = await asyncio.gather(*(gateway.generate(LLM_STAGE, [prompt, image]) for image in frames))
+        yes_count = sum(1 for response in responses if self._parse_yes_no_response(response))
+        total_frames = len(frames)
+        # Return True if majority of frames match the description
+        return yes_count > (total_frames / 2) if total_frames > 0 else False
+
+    def _parse_yes_no_response(self, response_text):
+        """Parse AI response to extract yes/no and convert to boolean"""
+        response_lower = response_text.lower().strip()
+        
+        # Check for explicit yes/no
+        if 'yes' in response_lower and 'no' not in response_lower:
+            return True
+        elif 'no' in response_lower and 'yes' not in response_lower:
+            return False
+        
+        # Fallback: look for positive/negative indicators
+        positive_indicators = ['true', 'correct', 'match', 'shows', 'contains', 'displays']
+        negative_indicators = ['false', 'incorrect', 'no match', 'does not', 'doesn\'t']
+        
+        for indicator in positive_indicators:
+            if indicator in response_lower:
+                return True
+        
+        for indicator in negative_indicators:
+            if indicator in response_lower:
+                return False
+        
+        # Default to False if unclear
+        return False
+
+    async def analyze_media(self, media_url: str, description: str) -> bool:
+        """Analyze media and return True/False based on whether it matches description"""
+        prompt = f"Does this media show: '{description}'? Answer with 'yes' if it matches or 'no' if it doesn't."
+        
+        try:
+            media_bytes, content_type = await asyncio.to_thread(self.download_media, media_url)
+            
+            if content_type.startswith("image"):
+                return await self.analyze_image_bytes(media_bytes, prompt)
+                        
+            elif content_type.startswith("video"):
+                return await self.analyze_video_bytes(media_bytes, prompt)
+                        
+            else:
+                raise ValueError(f"Unsupported media type: {content_type}")
+                
+        except Exception as e:
+            print(f"Error analyzing media {media_url}: {e}")
+            return False
+        
+        
+        
+    def categorize_content(self, description: str, score_output: bool = False) -> List[str] | List[Tuple[str, int]]:
+        """
+        Returns a list of matched categories from the description.
+        If score_output=True, returns a sorted list of tuples: (category, match_count).
+        """
+        description = description.lower()
+        matched = {}
+
+        for category, keywords in KEYWORDS.items():
+            count = 0
+            for keyword in keywords:
+                # Use in-string match to allow phrase detection
+                if keyword in description:
+                    count += 1
+            if count > 0:
+                matched[category] = count
+
+        if score_output:
+            # Return categories sorted by most matches
+            return sorted(matched.items(), key=lambda x: x[1], reverse=True)
+        else:
+            return list(matched.keys())
+    
+    def get_combined_advice(self, categories: List[str]) -> str:
+        """
+        Return a single, concise 2–3 line advice summary based on combined categories.
+        """
+        if not categories:
+            return "No specific issues detected. Stay safe and follow local updates."
+
+        parts = []
+
+        if "emergency" in categories:
+            parts.append("An emergency has been reported nearby.")
+        if "traffic" in categories:
+            parts.append("Expect traffic delays — consider alternate routes.")
+        if "water-logging" in categories:
+            parts.append("Avoid flooded areas and check for waterlogging.")
+        if "weather" in categories:
+            parts.append("Severe weather may affect visibility or safety.")
+        if "public-transport" in categories:
+            parts.append("Public transport may be delayed or disrupted.")
+        if "infrastructure" in categories:
+            parts.append("Watch out for damaged roads or civic works.")
+        if "civic-issues" in categories:
+            parts.append("Civic issues like garbage or pollution may be present.")
+        if "security" in categories:
+            parts.append("Stay alert to any suspicious or unsafe activity.")
+        if "events" in categories:
+            parts.append("Large gatherings may cause congestion in some areas.")
+        if "stampede" in categories:
+            parts.append("Avoid dense crowds due to potential safety risks.")
+        if "utility" in categories:
+            parts.append("There might be service interruptions like power or water cuts.")
+
+        # Generate a clean summary
+        summary = " ".join(parts)
+
+        # Trim to ~2-3 lines, if needed
+        if len(summary.split()) > 45:
+            summary = "Multiple issues reported in your area. Please stay alert and follow local advisories."
+
+        return summary
+    
+    
+    
+    def get_resolution_time(self,categories: list[str]) -> datetime:
+        """Returns the latest valid_upto from the matched categories."""
+        durations = [
+            CATEGORY_VALIDITY_DURATION.get(cat, timedelta(hours=1))  # default to 1hr
+            for cat in categories
+        ]
+        return datetime.now() + max(durations, default=timedelta(hours=1))
+    
+    
+    def _analyze_data_item(self, data_item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            """Analyze a single data item and create summary"""
+            
+
+            
+            if not isinstance(data_item, dict):
+                return None
+            
+            text_content = data_item.get("description", "")
+            coordinates = {
+                'lat': data_item.get("location", {}).get("latitude"),
+                'lng': data_item.get("location", {}).get("longitude")
+            }
+            categories = self.categorize_content(text_content)
+            
+            # Get combined advice for all categories
+            advice = self.get_combined_advice(categories)
+            
+            resolution_time = self.get_resolution_time(categories)
+            
+            
+            
+            return {
+                "description": data_item.get("description", ""),
+                "categories": categories,  # Now an array
+                "advice": advice,
+                "coordinates": coordinates,
+                "resolution_time": resolution_time,
+                # When the report was submitted; reports without a timestamp count as seen now
+                "observed_at": source_time(data_item.get("timestamp")) or datetime.now(),
+                "source_id": data_item.get("id") or content_id(data_item.get("description"), data_item.get("mediaUrl")),
+                "image_url": data_item.get("mediaUrl", ""),
+                "location": data_item.get("place", {}).get("name", "Unknown Location"),
+            }
+
+    @instrument_tool(STAGE)
+    async def process_reports(self) -> Dict[str, Any]:
+        """Process user reports a page at a time, storing each page's results before reading the next"""
+        try:
+            async for page in self.store.iter_pages(Collections.USER_REPORTS, REPORT_FIELDS):
+                count_firestore("read", Collections.USER_REPORTS, len(page))
+                count_items(STAGE, "in", len(page))
+                self.report_count += len(page)
+                processed_data = await self._process_page(page)
+                self.processed_count += len(processed_data)
+                if processed_data:
+                    self._add_store_result(await self._store_page(processed_data))
+        except Exception as e:
+            logger.error(f"Error processing user reports: {e}")
+            return {"error": f"Error processing user reports: {e}", "report_count": self.report_count,
+                    "processed_count": self.processed_count}
+        print(f"Processed {self.processed_count} of {self.report_count} reports successfully.")
+        return {"status": "success", "report_count": self.report_count, "processed_count": self.processed_count}
+
+    async def _process_page(self, user_reports: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Processed records for the reports whose media matches their description"""
+        
+        async def check_media(report: Dict[str, Any]) -> bool:
+            try:
+                return await self.analyze_media(report["mediaUrl"], report["description"])
+            except Exception as e:
+                logger.error(f"Error processing report {report.get('id', 'unknown')}: {e}")
+                return False
+        
+        processed_data = []
+
+        # Media checks run concurrently within the LLM gateway's limits
+        matches = await asyncio.gather(*(check_media(report) for report in user_reports))
+        
+        for report, is_matching in zip(user_reports, matches):
+            try:
+                
+                if (is_matching):
+                    summary = self._analyze_data_item(report)
+                    if summary:
+                        processed_data.append(summary)
+                    else:
+                        continue
+                    
+            except Exception as e:
+                logger.error(f"Error processing report {report.get('id', 'unknown')}: {e}")
+                continue
+            
+        return processed_data
+
+    async def _store_page(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        scheduled = hand_off(Collections.PROCESSED_DATA, items, self._write_processed_data)
+        if scheduled is not None:
+            return scheduled
+        return await asyncio.to_thread(self._write_processed_data, items)
+
+    def _add_store_result(self, result: Dict[str, Any]) -> None:
+        if "error" in result:
+            self.store_result["errors"].append(result["error"])
+            return
+        self.store_result["stored_count"] += result.get("stored_count", 0)
+        self.store_result["scheduled_count"] += result.get("scheduled_count", 0)
+        self.store_result["errors"].extend(result.get("errors", []))
+    
+    @instrument_tool(STAGE)
+    def store_processed_data(self) -> Dict[str, Any]:
+        """
+        Tool 3: Report the processed_data stored in Firestore
+
+        Returns:
+            dict: Result of storage operation
+        """
+        if not self.processed_count:
+            return {"error": "No processed_data available to store. Please analyze data first."}
+
+        # process_reports stores each page as it goes, so only totals are left to report
+        stored = self.store_result["stored_count"]
+        scheduled = self.store_result["scheduled_count"]
+        if not stored and not scheduled:
+            return {"error": "; ".join(map(str, self.store_result["errors"])) or "No processed_data was stored"}
+        result = {
+            "status": "scheduled" if scheduled else "success",
+            "stored_count": stored,
+            "scheduled_count": scheduled,
+            "total_processed_data": self.processed_count,
+            "collection": Collections.PROCESSED_DATA,
+        }
+        if self.store_result["errors"]:
+            result["errors"] = self.store_result["errors"]
+        return result
+
+    def _write_processed_data(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            updated_count = 0
+            # Keyed by report id, so reprocessing a report updates its document
+            by_id = {document_id(summary["source_id"]): summary for summary in items}
+            written = self.store.upsert(Collections.PROCESSED_DATA, by_id.items())
+            stored_docs = written["document_ids"]
+            stored_items = [by_id[doc_id] for doc_id in stored_docs]
+            stored_count = len(stored_docs)
+            errors = written["errors"]
+
+            count_firestore("write", Collections.PROCESSED_DATA, stored_count)
+            count_items(STAGE, "out", stored_count)
+            result = {
+                "status": "success" if stored_count > 0 or updated_count > 0 else "partial_failure",
+                "stored_count": stored_count,
+                "updated_count": updated_count,
+                "total_processed_data": len(items),
+                "collection": Collections.PROCESSED_DATA,
+                "document_ids": stored_docs
+            }
+
+            if errors:
+                result["errors"] = errors
+            
+            # Keep hour-of-week aggregates in step with what was stored
+            result["aggregates"] = self.aggregates.apply(stored_items)
+
+            logger.info(
+                f"Stored {stored_count}, updated {updated_count} processed_data in collection '{Collections.PROCESSED_DATA}'"
+            )
+            return result
+
+        except Exception as e:
+            error_msg = f"Error storing processed_data in Firestore: {str(e)}"
+            logger.error(error_msg)
+            return {"error": error_msg}
+        
+        
+
+
+# Initialize the service
+service = MultiModalIntakeService()
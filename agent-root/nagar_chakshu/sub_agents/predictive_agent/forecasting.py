@@ -0,0 +1,263 @@
+import os
+import time
+import logging
+from datetime import timedelta
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+from ..util import (
+    CATEGORY_VALIDITY_DURATION, HOURS_PER_WEEK, EPOCH_WEEKDAY_OFFSET_HOURS,
+    observation_time, record_cell, epoch_hour,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ForecastConfig:
+    """Configuration for the local incident forecaster"""
+    CELL_PRECISION = int(os.getenv("FORECAST_CELL_PRECISION", "6"))
+    HORIZON_HOURS = int(os.getenv("FORECAST_HORIZON_HOURS", "6"))
+    HISTORY_WEEKS = int(os.getenv("FORECAST_HISTORY_WEEKS", "8"))
+    SMOOTHING_ALPHA = float(os.getenv("FORECAST_SMOOTHING_ALPHA", "0.3"))
+    # Pseudo-episodes pulling resolution estimates toward CATEGORY_VALIDITY_DURATION
+    PRIOR_WEIGHT = float(os.getenv("FORECAST_PRIOR_WEIGHT", "3"))
+    # Reports further apart than this start a new episode
+    EPISODE_GAP_HOURS = int(os.getenv("FORECAST_EPISODE_GAP_HOURS", "1"))
+
+
+class IncidentForecaster:
+    """
+    Per-cell, per-category incident forecasts from historical records.
+
+    Reports are bucketed into a (series, week, hour-of-week) count tensor,
+    where a series is one geohash cell and category. From it, vectorized over
+    every series at once:
+
+    - a seasonal hour-of-week baseline: mean count per hour-of-week over the
+      weeks observed, lightly smoothed across neighbouring hours;
+    - a trend factor: exponentially smoothed weekly totals relative to the
+      long-run weekly mean;
+    - expected incidents over the next horizon: baseline for the upcoming
+      hours scaled by the trend;
+    - a resolution estimate: mean length of past activity episodes, shrunk
+      toward the category's CATEGORY_VALIDITY_DURATION when history is thin.
+    """
+
+    def __init__(
+        self,
+        cell_precision: int = ForecastConfig.CELL_PRECISION,
+        horizon_hours: int = ForecastConfig.HORIZON_HOURS,
+        history_weeks: int = ForecastConfig.HISTORY_WEEKS,
+        alpha: float = ForecastConfig.SMOOTHING_ALPHA,
+        prior_weight: float = ForecastConfig.PRIOR_WEIGHT,
+        episode_gap_hours: int = ForecastConfig.EPISODE_GAP_HOURS,
+    ):
+        self.cell_precision = cell_precision
+        self.horizon_hours = horizon_hours
+        self.history_weeks = history_weeks
+        self.alpha = alpha
+        self.prior_weight = prior_weight
+        self.episode_gap_hours = episode_gap_hours
+
+        self.series_index: Dict[Tuple[str, str], int] = {}
+        self.baseline = np.zeros((0, HOURS_PER_WEEK), dtype=np.float32)
+        self.trend = np.zeros(0)
+        self.expected = np.zeros(0)
+        self.resolution_hours = np.zeros(0)
+        self.history_count = np.zeros(0, dtype=np.int64)
+        self.now_hour = 0
+
+    def fit(self, records: Iterable[Dict[str, Any]], now: Optional[float] = None) -> "IncidentForecaster":
+        """Build the series from records and forecast every series as of `now` (epoch seconds)."""
+        started = time.perf_counter()
+        self.series_index = {}
+        now_hour = int((now if now is not None else time.time()) // 3600)
+        first_hour = now_hour - self.history_weeks * HOURS_PER_WEEK + 1
+
+        keys: List[int] = []
+        hours: List[int] = []
+        for record in records:
+            observed = observation_time(record)
+            cell = record_cell(record, self.cell_precision)
+            if observed is None or cell is None:
+                continue
+            hour = epoch_hour(observed)
+            if hour < first_hour or hour > now_hour:
+                continue
+            categories = record.get("categories") or []
+            if isinstance(categories, str):
+                categories = [categories]
+            for category in categories:
+                key = (cell, category)
+                if key not in self.series_index:
+                    self.series_index[key] = len(self.series_index)
+                keys.append(self.series_index[key])
+                hours.append(hour)
+
+        self.now_hour = now_hour
+        self._fit_arrays(np.asarray(keys, dtype=np.int64), np.asarray(hours, dtype=np.int64), first_hour)
+        logger.info(
+            f"Fitted {len(self.series_index)} forecast series from {len(keys)} observations "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        return self
+
+    def fit_aggregates(self, aggregates: Iterable[Dict[str, Any]], now: Optional[float] = None) -> "IncidentForecaster":
+        """
+        Fit from incrementally maintained aggregate documents instead of raw history.
+
+        Each aggregate holds one cell and category's all-time hour-of-week
+        counts, recent per-week totals and episode statistics, so no history
+        has to be scanned.
+        """
+        started = time.perf_counter()
+        self.series_index = {}
+        self.now_hour = int((now if now is not None else time.time()) // 3600)
+        docs = []
+        for doc in aggregates:
+            if doc.get("precision") != self.cell_precision or doc.get("first_seen_hour") is None:
+                continue
+            key = (doc["cell"], doc["category"])
+            if key in self.series_index:
+                continue
+            self.series_index[key] = len(docs)
+            docs.append(doc)
+        n_series = len(docs)
+        if n_series == 0:
+            return self
+
+        counts = np.array([doc.get("counts") or [0] * HOURS_PER_WEEK for doc in docs], dtype=np.float64)
+        first_seen = np.array([min(doc["first_seen_hour"], self.now_hour) for doc in docs], dtype=np.int64)
+
+        # Weeks each hour-of-week has been observed since the series first appeared
+        observed_hours = self.now_hour - first_seen + 1
+        offset = (np.arange(HOURS_PER_WEEK)[None, :] - (first_seen[:, None] + EPOCH_WEEKDAY_OFFSET_HOURS)) % HOURS_PER_WEEK
+        observed_weeks_per_how = observed_hours[:, None] // HOURS_PER_WEEK + (offset < (observed_hours % HOURS_PER_WEEK)[:, None])
+        baseline = counts / np.maximum(observed_weeks_per_how, 1)
+
+        now_week = (self.now_hour + EPOCH_WEEKDAY_OFFSET_HOURS) // HOURS_PER_WEEK
+        weeks = np.arange(now_week - self.history_weeks + 1, now_week + 1)
+        weekly_counts = np.array(
+            [[(doc.get("weeks") or {}).get(str(week), 0) for week in weeks] for doc in docs], dtype=np.float64
+        )
+        week_start = weeks * HOURS_PER_WEEK - EPOCH_WEEKDAY_OFFSET_HOURS
+        lo = np.maximum(week_start[None, :], first_seen[:, None])
+        hi = np.minimum(week_start + HOURS_PER_WEEK - 1, self.now_hour)[None, :]
+        coverage = np.clip(hi - lo + 1, 0, None) / HOURS_PER_WEEK
+
+        n_episodes = np.array([doc.get("episode_count", 0) for doc in docs], dtype=np.float64)
+        episode_hours = np.array([doc.get("episode_hours", 0) for doc in docs], dtype=np.float64)
+        history_count = np.array([doc.get("total", 0) for doc in docs], dtype=np.int64)
+
+        self._finish(baseline, weekly_counts, coverage, n_episodes, episode_hours, history_count)
+        logger.info(
+            f"Fitted {n_series} forecast series from aggregates in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        return self
+
+    def _fit_arrays(self, keys: np.ndarray, hours: np.ndarray, first_hour: int) -> None:
+        n_series = len(self.series_index)
+        if n_series == 0:
+            return
+
+        shifted = hours + EPOCH_WEEKDAY_OFFSET_HOURS
+        first_week = (first_hour + EPOCH_WEEKDAY_OFFSET_HOURS) // HOURS_PER_WEEK
+        week = shifted // HOURS_PER_WEEK - first_week
+        n_weeks = int((self.now_hour + EPOCH_WEEKDAY_OFFSET_HOURS) // HOURS_PER_WEEK - first_week + 1)
+        how = shifted % HOURS_PER_WEEK
+
+        counts = np.zeros((n_series, n_weeks, HOURS_PER_WEEK), dtype=np.float32)
+        np.add.at(counts, (keys, week, how), 1.0)
+
+        # Only part of the first and last weeks falls inside the history window
+        window = np.arange(first_hour, self.now_hour + 1) + EPOCH_WEEKDAY_OFFSET_HOURS
+        observed_weeks_per_how = np.bincount(window % HOURS_PER_WEEK, minlength=HOURS_PER_WEEK)
+        coverage = np.bincount(window // HOURS_PER_WEEK - first_week, minlength=n_weeks) / HOURS_PER_WEEK
+
+        n_episodes, episode_hours = self._episodes(keys, hours)
+        self._finish(
+            counts.sum(axis=1) / np.maximum(observed_weeks_per_how, 1),
+            counts.sum(axis=2),
+            np.broadcast_to(coverage, (n_series, n_weeks)),
+            n_episodes,
+            episode_hours,
+            np.bincount(keys, minlength=n_series),
+        )
+
+    def _episodes(self, keys: np.ndarray, hours: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Episode count and total episode hours per series"""
+        n_series = len(self.series_index)
+        # Episodes are runs of reports in one series with gaps of at most episode_gap_hours
+        pairs = np.unique(np.stack([keys, hours], axis=1), axis=0)
+        sorted_keys, sorted_hours = pairs[:, 0], pairs[:, 1]
+        starts = np.ones(len(pairs), dtype=bool)
+        starts[1:] = (sorted_keys[1:] != sorted_keys[:-1]) | (np.diff(sorted_hours) > self.episode_gap_hours)
+        episode_id = np.cumsum(starts) - 1
+        episode_key = sorted_keys[starts]
+        episode_start = sorted_hours[starts]
+        episode_end = np.zeros(len(episode_key), dtype=np.int64)
+        np.maximum.at(episode_end, episode_id, sorted_hours)
+        episode_length = (episode_end - episode_start + 1).astype(np.float64)
+
+        n_episodes = np.bincount(episode_key, minlength=n_series)
+        total_length = np.bincount(episode_key, weights=episode_length, minlength=n_series)
+        return n_episodes, total_length
+
+    def _finish(self, baseline: np.ndarray, weekly_counts: np.ndarray, coverage: np.ndarray,
+                n_episodes: np.ndarray, episode_hours: np.ndarray, history_count: np.ndarray) -> None:
+        """Derive baseline, trend, expected incidents and resolution estimates for every series"""
+        n_series = len(self.series_index)
+
+        # Seasonal hour-of-week baseline, smoothed over adjacent hours
+        self.baseline = (np.roll(baseline, 1, axis=1) + 2 * baseline + np.roll(baseline, -1, axis=1)) / 4
+
+        # Exponentially smoothed weekly totals against the long-run weekly mean
+        # Partial weeks are scaled up to a full week but weighted by their coverage
+        weekly = weekly_counts / np.maximum(coverage, 1e-9)
+        mean_weekly = (weekly * coverage).sum(axis=1) / np.maximum(coverage.sum(axis=1), 1e-9)
+        level = mean_weekly
+        for w in range(weekly.shape[1]):
+            weight = self.alpha * coverage[:, w]
+            level = weight * weekly[:, w] + (1 - weight) * level
+        self.trend = np.clip(np.divide(level, mean_weekly, out=np.ones(n_series), where=mean_weekly > 0), 0.25, 4.0)
+
+        upcoming = (self.now_hour + 1 + np.arange(self.horizon_hours) + EPOCH_WEEKDAY_OFFSET_HOURS) % HOURS_PER_WEEK
+        self.expected = self.baseline[:, upcoming].sum(axis=1) * self.trend
+
+        prior = np.empty(n_series)
+        for (_, category), idx in self.series_index.items():
+            prior[idx] = CATEGORY_VALIDITY_DURATION.get(category, timedelta(hours=1)).total_seconds() / 3600
+        self.resolution_hours = (episode_hours + self.prior_weight * prior) / (n_episodes + self.prior_weight)
+        self.history_count = history_count
+
+    def forecast(self, geohash: str, categories: List[str]) -> Dict[str, Any]:
+        """Forecast for one location across its categories"""
+        cell = geohash[:self.cell_precision] if geohash else ""
+        per_category = {}
+        for category in categories or []:
+            idx = self.series_index.get((cell, category))
+            if idx is None:
+                prior = CATEGORY_VALIDITY_DURATION.get(category, timedelta(hours=1)).total_seconds() / 3600
+                per_category[category] = {
+                    "expected_incidents": 0.0,
+                    "trend": 1.0,
+                    "resolution_hours": prior,
+                    "history_count": 0,
+                }
+                continue
+            per_category[category] = {
+                "expected_incidents": round(float(self.expected[idx]), 2),
+                "trend": round(float(self.trend[idx]), 2),
+                "resolution_hours": round(float(self.resolution_hours[idx]), 1),
+                "history_count": int(self.history_count[idx]),
+            }
+
+        return {
+            "cell": cell,
+            "horizon_hours": self.horizon_hours,
+            "expected_incidents": round(sum(c["expected_incidents"] for c in per_category.values()), 2),
+            "resolution_hours": max((c["resolution_hours"] for c in per_category.values()), default=None),
+            "history_count": sum(c["history_count"] for c in per_category.values()),
+            "categories": per_category,
+        }
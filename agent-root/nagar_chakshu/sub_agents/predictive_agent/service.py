@@ -0,0 +1,316 @@
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Union
+import dotenv
+from dotenv import load_dotenv
+from typing import List, Dict, Tuple, Iterator
+import random
+from datetime import datetime, timedelta
+import math
+import itertools
+import asyncio
+from ..util import PROMPT_PREDICTIVE_NARRATION, cluster_key, record_cell
+from ..result_cache import get_result_cache
+from .forecasting import IncidentForecaster
+from ..aggregates import IncidentAggregates
+from ..llm_gateway import get_llm_gateway
+from ..datastore import DataStore, Collections
+from ..handoff import hand_off, handed_off, current_context
+from common.metrics import instrument_tool, count_items, count_firestore
+
+
+
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+
+LLM_STAGE = "predictive"
+STAGE = "predictive_agent"
+
+# Fields of summarized_data predictions are built from: the summary and where and what it is
+SUMMARY_FIELDS = ("summary", "coordinates", "geohash", "location", "resolution_time", "categories", "cluster_key")
+# Fields of processed_data the forecaster fits on when there are no aggregates
+HISTORY_FIELDS = ("observed_at", "resolution_time", "categories", "geohash", "coordinates")
+
+# Bands forecast numbers are narrated in, as (upper bound, label)
+EXPECTED_BANDS = ((0.5, "almost no"), (3, "a few"), (10, "several"), (math.inf, "many"))
+RESOLUTION_BANDS = ((1, "within an hour"), (6, "within a few hours"), (36, "within a day or so"), (math.inf, "over several days"))
+
+
+def _band(value: Optional[float], bands: Tuple[Tuple[float, str], ...]) -> str:
+    if value is None:
+        return "unknown"
+    return next(label for bound, label in bands if value < bound)
+
+
+def _trend_band(trend: float) -> str:
+    if trend > 1.2:
+        return "above its usual level"
+    if trend < 0.8:
+        return "below its usual level"
+    return "around its usual level"
+
+
+class PredictiveAgent:
+    
+    def __init__(self):
+        self.store = DataStore()
+        self.summarized_data: List[Dict[str, Any]] = []
+        self.predicitve_data: List[Dict[str, Any]] = []
+        # Without this run's summaries, summarized_data is read and stored a page at a time
+        self.paged = False
+        # Set when each page of summaries is fitted on the aggregates of its own cells
+        self.fit_per_page = False
+        self.summary_count = 0
+        self.prediction_count = 0
+        self.stored_count = 0
+        self.history_count = 0
+        self.forecaster = IncidentForecaster()
+        self.aggregates = IncidentAggregates()
+        # When false, forecasts are turned into prose locally without a model call
+        self.use_llm = os.getenv("PREDICTION_USE_LLM", "true").lower() == "true"
+        
+    @instrument_tool(STAGE)
+    async def get_summarized_data(self) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        """Take this run's summaries, or set up reading summarized_data from Firestore page by page"""
+        self.summarized_data = []
+        self.predicitve_data = []
+        self.summary_count = self.prediction_count = self.stored_count = 0
+        summarized_data = handed_off(Collections.SUMMARIZED_DATA)
+        self.paged = summarized_data is None
+        if self.paged:
+            # make_predictions reads, forecasts and stores one page at a time
+            return {"status": "success", "source": Collections.SUMMARIZED_DATA, "paged": True}
+        self.summarized_data = summarized_data
+        self.summary_count = len(self.summarized_data)
+        count_items(STAGE, "in", len(self.summarized_data))
+        print(f"Fetched {len(self.summarized_data)} summarized data entries.")
+        return self.summarized_data
+        
+    @instrument_tool(STAGE)
+    async def get_historical_data(self) -> Dict[str, Any]:
+        """Fit the local forecaster from incident aggregates, or from processed data history if there are none"""
+        context = current_context()
+        if context is not None:
+            # Aggregates and history are updated by the processed_data writes still in flight
+            await context.wait(Collections.PROCESSED_DATA)
+        self.fit_per_page = False
+        if self.aggregates.exists(self.forecaster.cell_precision):
+            if self.paged:
+                self.fit_per_page = True
+                return {"status": "success", "source": "aggregates", "fitted": "per page of summaries"}
+            self._fit_aggregates(self.summarized_data)
+            return {
+                "status": "success",
+                "source": "aggregates",
+                "series_count": len(self.forecaster.series_index),
+            }
+        
+        # History and summaries stream into the fit page by page instead of being loaded whole
+        self.history_count = 0
+        summaries = self._stored_summaries() if self.paged else self.summarized_data
+        await asyncio.to_thread(self.forecaster.fit, itertools.chain(self._history(), summaries))
+        print(f"Fitted on {self.history_count} processed data entries from Firestore.")
+        return {
+            "status": "success",
+            "source": "processed_data",
+            "history_count": self.history_count,
+            "series_count": len(self.forecaster.series_index),
+        }
+
+    def _fit_aggregates(self, summarized_data: List[Dict[str, Any]]) -> None:
+        """Fit the forecaster on the aggregates of the cells being forecast, not every aggregate in the city"""
+        precision = self.forecaster.cell_precision
+        cells = {record_cell(data, precision) for data in summarized_data} - {None}
+        self.forecaster.fit_aggregates(self.aggregates.read(precision, cells) if cells else [])
+
+    def _history(self) -> Iterator[Dict[str, Any]]:
+        """processed_data records a page at a time, partitions read concurrently; a failed read ends the history early"""
+        try:
+            for page in self.store.scan(Collections.PROCESSED_DATA, HISTORY_FIELDS):
+                count_firestore("read", Collections.PROCESSED_DATA, len(page))
+                self.history_count += len(page)
+                yield from page
+        except Exception as e:
+            logger.error(f"Error fetching processed data: {e}")
+        
+    def _stored_summaries(self) -> Iterator[Dict[str, Any]]:
+        """summarized_data records for the history fit, a page at a time"""
+        for page in self.store.pages(Collections.SUMMARIZED_DATA, HISTORY_FIELDS):
+            count_firestore("read", Collections.SUMMARIZED_DATA, len(page))
+            yield from page
+        
+    @instrument_tool(STAGE)
+    async def make_predictions(self) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        """Forecast each summarized location locally and describe the forecast in prose"""
+        if self.paged:
+            return await self._predict_pages()
+
+        if not self.summarized_data:
+            logger.warning("No data to Predict.")
+            return []
+        
+        self.predicitve_data = await self._predict(self.summarized_data)
+        self.prediction_count = len(self.predicitve_data)
+        return self.predicitve_data
+
+    async def _predict_pages(self) -> Dict[str, Any]:
+        """Forecast and store summarized_data a page at a time, so only one page is held"""
+        try:
+            async for page in self.store.iter_pages(Collections.SUMMARIZED_DATA, SUMMARY_FIELDS):
+                count_firestore("read", Collections.SUMMARIZED_DATA, len(page))
+                count_items(STAGE, "in", len(page))
+                self.summary_count += len(page)
+                if self.fit_per_page:
+                    await asyncio.to_thread(self._fit_aggregates, page)
+                predictive_data = await self._predict(page)
+                self.prediction_count += len(predictive_data)
+                self.stored_count += await asyncio.to_thread(self._write_predictive_data, predictive_data)
+        except Exception as e:
+            logger.error(f"Error predicting summarized data: {e}")
+            return {"error": f"Error predicting summarized data: {e}", "predicted_count": self.prediction_count,
+                    "stored_count": self.stored_count}
+        print(f"Predicted {self.prediction_count} of {self.summary_count} summarized data entries.")
+        return {"status": "success", "predicted_count": self.prediction_count, "stored_count": self.stored_count}
+
+    async def _predict(self, summarized_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Prediction records for summaries"""
+        predictive_data = []
+        
+        # Narration is keyed on the incident and its banded forecast, so runs that only
+        # nudge the forecast numbers reuse the prose written for the same band
+        prompts = {}
+        forecasts = []
+        for data in summarized_data:
+            summary = data.get('summary', '')
+            if not summary:
+                logger.warning("No summary found for data entry.")
+                continue
+            forecast = self.forecaster.forecast(data.get('geohash', ''), data.get('categories', []))
+            outline = self._outline_forecast(forecast)
+            narration_key = f"{data.get('cluster_key') or cluster_key(data)}\n{outline}"
+            prompts.setdefault(narration_key, f"{summary}\n\nForecast:\n{outline}")
+            forecasts.append((data, forecast, narration_key))
+        
+        # Reuse predictions for incidents whose forecast stayed in the same band since earlier runs
+        cache = get_result_cache()
+        cached_predictions = cache.get_many(PROMPT_PREDICTIVE_NARRATION, prompts.keys()) if self.use_llm else {}
+        fresh_predictions = {}
+        if self.use_llm:
+            missing = [narration_key for narration_key in prompts if narration_key not in cached_predictions]
+            results = await asyncio.gather(*(self._narrate(prompts[narration_key]) for narration_key in missing))
+            fresh_predictions = {
+                narration_key: prediction for narration_key, prediction in zip(missing, results) if prediction
+            }
+        
+        for data, forecast, narration_key in forecasts:
+            try:
+                
+                prediction = cached_predictions.get(narration_key) or fresh_predictions.get(narration_key)
+                if prediction is None:
+                    prediction = self._describe_forecast(forecast)
+                
+                # Resolution time from the forecast's resolution estimate when there is history
+                resolution_time = data.get('resolution_time')
+                if forecast["history_count"] and forecast["resolution_hours"]:
+                    resolution_time = datetime.now() + timedelta(hours=forecast["resolution_hours"])
+                else:
+                    resolution_time += timedelta(hours=6)
+                
+                data_with_prediction = {
+                    "coordinates": data.get('coordinates', {'lat': 0, 'lng': 0}),
+                    "geohash": data.get('geohash', ''),
+                    "location": data.get('location', ''),
+                    "resolution_time": resolution_time,
+                    "prediction": prediction,
+                    "forecast": forecast,
+                    "cluster_key": data.get('cluster_key') or cluster_key(data),
+                }
+                
+                predictive_data.append(data_with_prediction)
+                
+            except Exception as e:                              
+                logger.error(f"Error analyzing predictive for data entry {data.get('id', 'unknown')}: {e}")
+        
+        cache.put_many(PROMPT_PREDICTIVE_NARRATION, fresh_predictions)
+        logger.info(f"Prediction cache: {len(cached_predictions)} hits, {len(fresh_predictions)} model calls")
+                
+        return predictive_data
+    
+    async def _narrate(self, narration_input: str) -> Optional[str]:
+        """Ask the model to turn a summary and its forecast into a short prediction"""
+        try:
+            prompt = f"{PROMPT_PREDICTIVE_NARRATION} {narration_input}"
+            response = await get_llm_gateway().generate(LLM_STAGE, prompt)
+            return response.strip()
+        except Exception as e:
+            logger.error(f"Error generating prediction: {e}")
+            return None
+    
+    @staticmethod
+    def _outline_forecast(forecast: Dict[str, Any]) -> str:
+        """The forecast in coarse bands for the narration prompt; also its cache key, so it must stay stable"""
+        if not forecast["categories"]:
+            return "- no category history"
+        category, values = max(forecast["categories"].items(), key=lambda item: item[1]["expected_incidents"])
+        others = sorted(other for other in forecast["categories"] if other != category)
+        lines = [
+            f"- mostly {category}, {_band(values['expected_incidents'], EXPECTED_BANDS)} incidents expected "
+            f"in the next {forecast['horizon_hours']}h, {_trend_band(values['trend'])}",
+            f"- similar issues typically clear {_band(values['resolution_hours'], RESOLUTION_BANDS)}",
+        ]
+        if others:
+            lines.append(f"- also reported here: {', '.join(others)}")
+        return "\n".join(lines)
+    
+    @staticmethod
+    def _describe_forecast(forecast: Dict[str, Any]) -> str:
+        """Template prose for a forecast, used when the model is disabled"""
+        if not forecast["categories"]:
+            return "No recurring pattern found for this location."
+        category, values = max(forecast["categories"].items(), key=lambda item: item[1]["expected_incidents"])
+        return (
+            f"About {forecast['expected_incidents']} more incidents expected here in the next "
+            f"{forecast['horizon_hours']} hours, mostly {category}, which is {_trend_band(values['trend'])}. "
+            f"Similar issues have typically cleared in about {forecast['resolution_hours']} hours."
+        )
+    
+    
+    
+    
+    @instrument_tool(STAGE)
+    def store_predictive_data(self) -> Optional[Dict[str, Any]]:
+        """Store summarized data in Firestore"""
+        if self.paged:
+            # Each page was stored as it was predicted
+            return {"status": "success", "stored_count": self.stored_count, "collection": Collections.PREDICTIVE_DATA}
+        scheduled = hand_off(Collections.PREDICTIVE_DATA, self.predicitve_data, self._write_predictive_data)
+        if scheduled is not None:
+            return scheduled
+        self._write_predictive_data(self.predicitve_data)
+
+    def _write_predictive_data(self, items: List[Dict[str, Any]]) -> int:
+        try:
+            # Keyed like the summary it came from, so reruns replace the incident's prediction
+            written = self.store.upsert(Collections.PREDICTIVE_DATA, ((data["cluster_key"], data) for data in items))
+            stored_count = len(written["document_ids"])
+            
+            count_firestore("write", Collections.PREDICTIVE_DATA, stored_count)
+            count_items(STAGE, "out", stored_count)
+            logger.info(f"Stored {stored_count} predictive data entries in Firestore.")
+            return stored_count
+        except Exception as e:
+            logger.error(f"Error storing predictive data: {e}")
+            return 0
+        
+        
+service = PredictiveAgent()
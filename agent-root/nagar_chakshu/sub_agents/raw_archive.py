@@ -0,0 +1,184 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from common.metrics import count_firestore
+
+from .datastore import DataStore, Collections, content_id
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveConfig:
+    """Configuration for the raw data archive"""
+    # "blob" archives each fetched batch as one compressed blob; "documents" writes one document per item
+    FORMAT = os.getenv("RAW_ARCHIVE_FORMAT", "blob").lower()
+    # Where blobs go: "firestore", a local directory, or gs://bucket/prefix
+    LOCATION = os.getenv("RAW_ARCHIVE_LOCATION", "firestore")
+    # "gzip" or "zstd" (needs the zstandard package)
+    COMPRESSION = os.getenv("RAW_ARCHIVE_COMPRESSION", "gzip").lower()
+    # Blob bytes per Firestore document, below the 1 MiB document limit
+    CHUNK_BYTES = 900_000
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor().compress(data)
+    if compression == "gzip":
+        # mtime=0 so the same batch always compresses to the same bytes
+        return gzip.compress(data, mtime=0)
+    raise ValueError(f"Unsupported archive compression: {compression}")
+
+
+def decompress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    if compression == "gzip":
+        return gzip.decompress(data)
+    raise ValueError(f"Unsupported archive compression: {compression}")
+
+
+def encode_items(items: List[Dict[str, Any]]) -> bytes:
+    """JSON lines, one item per line; values JSON cannot hold are written as strings"""
+    return b"".join(json.dumps(item, default=str, ensure_ascii=False).encode("utf-8") + b"\n" for item in items)
+
+
+def decode_items(data: bytes) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in data.splitlines() if line.strip()]
+
+
+class RawArchive:
+    """
+    Raw feed batches archived as compressed JSON lines.
+
+    Each fetched batch becomes one blob plus a small index document in
+    `raw_archive` describing it (item count, sizes, checksum, where the blob
+    lives). On Firestore a blob that fits in one document is stored inside
+    its index document, so archiving a batch is a single write; larger blobs
+    are split over `raw_archive_chunks` documents committed in the same
+    batch. Local and gs:// locations write one file and the index document.
+
+    The batch id is a hash of the items' source ids, so archiving the same
+    batch again overwrites it instead of adding a copy.
+    """
+
+    def __init__(self, store: Optional[DataStore] = None, location: str = ArchiveConfig.LOCATION,
+                 compression: str = ArchiveConfig.COMPRESSION):
+        self.store = store or DataStore()
+        self.location = location
+        self.compression = compression
+
+    def write(self, items: List[Dict[str, Any]], source_ids: List[str]) -> Dict[str, Any]:
+        """Archive one batch; source_ids identify the items and give the batch its id"""
+        raw = encode_items(items)
+        blob = compress(raw, self.compression)
+        batch_id = content_id(sorted(source_ids))
+        fetched = sorted(str(item["fetched_at"]) for item in items if item.get("fetched_at"))
+
+        index = {
+            "batch_id": batch_id,
+            "created_at": datetime.now(),
+            "item_count": len(items),
+            "encoding": "jsonl",
+            "compression": self.compression,
+            "raw_bytes": len(raw),
+            "stored_bytes": len(blob),
+            "sha256": hashlib.sha256(blob).hexdigest(),
+            "first_fetched_at": fetched[0] if fetched else None,
+            "last_fetched_at": fetched[-1] if fetched else None,
+        }
+
+        if self.location == "firestore":
+            writes = self._write_firestore(batch_id, blob, index)
+        else:
+            index["location"] = self._write_file(batch_id, blob)
+            self.store.collection(Collections.RAW_ARCHIVE).document(batch_id).set(index)
+            writes = 1
+        count_firestore("write", Collections.RAW_ARCHIVE, writes)
+
+        logger.info(f"Archived {len(items)} raw items as batch {batch_id} "
+                    f"({len(raw)} -> {len(blob)} bytes, {writes} Firestore writes)")
+        return {**index, "firestore_writes": writes}
+
+    def _write_firestore(self, batch_id: str, blob: bytes, index: Dict[str, Any]) -> int:
+        chunks = [blob[start:start + ArchiveConfig.CHUNK_BYTES] for start in range(0, len(blob), ArchiveConfig.CHUNK_BYTES)]
+        index["location"] = "firestore"
+        index["chunk_count"] = len(chunks)
+
+        batch = self.store.db.batch()
+        if len(chunks) == 1:
+            index["payload"] = chunks[0]
+        else:
+            chunk_ref = self.store.collection(Collections.RAW_ARCHIVE_CHUNKS)
+            for n, chunk in enumerate(chunks):
+                batch.set(chunk_ref.document(f"{batch_id}_{n}"), {"batch_id": batch_id, "n": n, "payload": chunk})
+        batch.set(self.store.collection(Collections.RAW_ARCHIVE).document(batch_id), index)
+        batch.commit()
+        return len(chunks) + 1 if len(chunks) > 1 else 1
+
+    def _write_file(self, batch_id: str, blob: bytes) -> str:
+        name = f"{batch_id}.jsonl.{'gz' if self.compression == 'gzip' else self.compression}"
+        if self.location.startswith("gs://"):
+            bucket, _, prefix = self.location[len("gs://"):].partition("/")
+            path = "/".join(filter(None, [prefix.strip("/"), name]))
+            from google.cloud import storage
+            storage.Client().bucket(bucket).blob(path).upload_from_string(blob, content_type="application/octet-stream")
+            return f"gs://{bucket}/{path}"
+
+        os.makedirs(self.location, exist_ok=True)
+        path = os.path.join(self.location, name)
+        with open(path, "wb") as f:
+            f.write(blob)
+        return path
+
+    def batches(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Index documents of archived batches, oldest first, without their payloads"""
+        fields = ["batch_id", "created_at", "item_count", "compression", "stored_bytes", "sha256",
+                  "location", "chunk_count", "first_fetched_at", "last_fetched_at"]
+        found = [
+            index for index in self.store.read(Collections.RAW_ARCHIVE, fields)
+            if (since is None or index["created_at"] >= since) and (until is None or index["created_at"] < until)
+        ]
+        return sorted(found, key=lambda index: index["created_at"])
+
+    def load(self, batch_id: str) -> List[Dict[str, Any]]:
+        """The items of one archived batch, checked against the stored checksum"""
+        snapshot = self.store.collection(Collections.RAW_ARCHIVE).document(batch_id).get()
+        if not snapshot.exists:
+            raise KeyError(f"No archived raw batch {batch_id}")
+        index = snapshot.to_dict()
+        count_firestore("read", Collections.RAW_ARCHIVE, 1)
+
+        blob = self._read_blob(index)
+        if hashlib.sha256(blob).hexdigest() != index["sha256"]:
+            raise ValueError(f"Archived raw batch {batch_id} does not match its checksum")
+        return decode_items(decompress(blob, index["compression"]))
+
+    def _read_blob(self, index: Dict[str, Any]) -> bytes:
+        location = index["location"]
+        if location == "firestore":
+            if "payload" in index:
+                return index["payload"]
+            chunk_ref = self.store.collection(Collections.RAW_ARCHIVE_CHUNKS)
+            chunks = [chunk_ref.document(f"{index['batch_id']}_{n}").get() for n in range(index["chunk_count"])]
+            count_firestore("read", Collections.RAW_ARCHIVE_CHUNKS, len(chunks))
+            return b"".join(chunk.to_dict()["payload"] for chunk in chunks)
+
+        if location.startswith("gs://"):
+            bucket, _, path = location[len("gs://"):].partition("/")
+            from google.cloud import storage
+            return storage.Client().bucket(bucket).blob(path).download_as_bytes()
+
+        with open(location, "rb") as f:
+            return f.read()
+
+    def replay(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Archived items batch by batch, in archive order; one batch is held at a time"""
+        for index in self.batches(since, until):
+            yield from self.load(index["batch_id"])
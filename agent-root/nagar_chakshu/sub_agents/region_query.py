@@ -0,0 +1,126 @@
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from common.metrics import count_firestore
+
+from .datastore import Collections, get_db
+from .util import covering_prefixes, bounding_box, haversine_km
+
+logger = logging.getLogger(__name__)
+
+
+class RegionQueryConfig:
+    """Configuration constants for region queries"""
+    SUMMARIZED_DATA_COLLECTION = Collections.SUMMARIZED_DATA
+    SENTIMENT_DATA_COLLECTION = Collections.SENTIMENT_DATA
+    PREDICTIVE_DATA_COLLECTION = Collections.PREDICTIVE_DATA
+    GEOHASH_FIELD = "geohash"
+    # Upper bound on prefix range queries issued per collection
+    MAX_PREFIXES = 16
+
+
+class RegionQueryService:
+    """
+    Answers "what's happening near me" lookups using geohash prefix range queries.
+
+    A region (circle or bounding box) is expanded to a small set of covering
+    geohash prefixes; each prefix becomes a `>= prefix, < prefix~` range query
+    on the stored precision-9 `geohash`, so only documents in the covering
+    cells are read. Results are then filtered to the exact region.
+    """
+
+    COLLECTIONS = [
+        RegionQueryConfig.SUMMARIZED_DATA_COLLECTION,
+        RegionQueryConfig.SENTIMENT_DATA_COLLECTION,
+        RegionQueryConfig.PREDICTIVE_DATA_COLLECTION,
+    ]
+
+    def __init__(self, db=None):
+        self._db = db
+
+    @property
+    def db(self):
+        return self._db if self._db is not None else get_db()
+
+    def query_radius(
+        self,
+        lat: float,
+        lng: float,
+        radius_km: float,
+        collections: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Return documents within radius_km of (lat, lng), keyed by collection name."""
+        bbox = bounding_box(lat, lng, radius_km)
+
+        def within(coords: Tuple[float, float]) -> bool:
+            return haversine_km(lat, lng, coords[0], coords[1]) <= radius_km
+
+        return self._query_region(bbox, within, collections, limit)
+
+    def query_bbox(
+        self,
+        min_lat: float,
+        min_lng: float,
+        max_lat: float,
+        max_lng: float,
+        collections: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Return documents inside the bounding box, keyed by collection name."""
+        bbox = (min_lat, min_lng, max_lat, max_lng)
+
+        def within(coords: Tuple[float, float]) -> bool:
+            return min_lat <= coords[0] <= max_lat and min_lng <= coords[1] <= max_lng
+
+        return self._query_region(bbox, within, collections, limit)
+
+    def _query_region(self, bbox, within, collections, limit) -> Dict[str, List[Dict[str, Any]]]:
+        prefixes = covering_prefixes(*bbox, max_cells=RegionQueryConfig.MAX_PREFIXES)
+        results = {}
+
+        for collection in collections or self.COLLECTIONS:
+            matches = []
+            scanned = 0
+            try:
+                for prefix in prefixes:
+                    for doc in self._prefix_query(collection, prefix):
+                        scanned += 1
+                        data = doc.to_dict()
+                        coords = self._extract_coordinates(data)
+                        if coords is None or not within(coords):
+                            continue
+                        data["id"] = doc.id
+                        matches.append(data)
+                        if limit and len(matches) >= limit:
+                            break
+                    if limit and len(matches) >= limit:
+                        break
+            except Exception as e:
+                logger.error(f"Error querying region in {collection}: {e}")
+            count_firestore("read", collection, scanned)
+            results[collection] = matches
+
+        return results
+
+    def _prefix_query(self, collection: str, prefix: str):
+        """Stream documents whose geohash starts with prefix"""
+        return (
+            self.db.collection(collection)
+            .where(filter=FieldFilter(RegionQueryConfig.GEOHASH_FIELD, ">=", prefix))
+            .where(filter=FieldFilter(RegionQueryConfig.GEOHASH_FIELD, "<", prefix + "~"))
+            .stream()
+        )
+
+    @staticmethod
+    def _extract_coordinates(data: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+        coords = data.get("coordinates") or {}
+        lat, lng = coords.get("lat"), coords.get("lng")
+        if lat is None or lng is None:
+            return None
+        try:
+            return float(lat), float(lng)
+        except (ValueError, TypeError):
+            return None
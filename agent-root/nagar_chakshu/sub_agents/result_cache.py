@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Optional
+
+from common.metrics import count_cache
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCacheConfig:
+    """Configuration for the persistent LLM result cache"""
+    PATH = os.getenv("LLM_CACHE_PATH", "llm_result_cache.db")
+    MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+    # 0 disables expiry
+    TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "0"))
+
+
+class ResultCache:
+    """
+    Content-addressed, SQLite-backed store for model results.
+
+    Entries are keyed by the SHA-256 of the prompt template plus the input
+    text, so a result is reused whenever the same question is asked about the
+    same text. The store is bounded to max_entries with least-recently-used
+    eviction and entries older than ttl_seconds are treated as misses.
+
+    KEY_VERSION is part of every key: bumping it when the format of stored
+    results changes leaves old entries unreachable until they are evicted.
+    """
+
+    # 2: batched sentiment labels keyed on the batch prompt instead of the single-item one
+    KEY_VERSION = 2
+
+    def __init__(self, path: str = ResultCacheConfig.PATH, max_entries: int = ResultCacheConfig.MAX_ENTRIES,
+                 ttl_seconds: float = ResultCacheConfig.TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_created_at ON results (created_at)")
+        self._conn.commit()
+
+    @classmethod
+    def make_key(cls, template: str, text: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"v{cls.KEY_VERSION}".encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(template.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, template: str, text: str) -> Optional[Any]:
+        """Return the cached result or None on a miss"""
+        return self.get_many(template, [text]).get(text)
+
+    def get_many(self, template: str, texts) -> dict:
+        """Return {text: result} for the texts that are cached and still fresh"""
+        keys = {self.make_key(template, text): text for text in texts}
+        if not keys:
+            return {}
+        now = time.time()
+        found = {}
+        with self._lock:
+            key_list = list(keys)
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(key_list), 500):
+                chunk = key_list[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for key, value, created_at in self._conn.execute(
+                    f"SELECT key, value, created_at FROM results WHERE key IN ({placeholders})", chunk
+                ):
+                    if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                        continue
+                    found[key] = value
+            if found:
+                self._conn.executemany("UPDATE results SET accessed_at = ? WHERE key = ?",
+                                       [(now, key) for key in found])
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        count_cache("llm_result", len(found), len(keys) - len(found))
+        return {keys[key]: json.loads(value) for key, value in found.items()}
+
+    def put(self, template: str, text: str, value: Any) -> None:
+        self.put_many(template, {text: value})
+
+    def put_many(self, template: str, results: dict) -> None:
+        """Store several results for the same template in one transaction"""
+        if not results:
+            return
+        now = time.time()
+        rows = [(self.make_key(template, text), json.dumps(value), now, now) for text, value in results.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else None}
+
+
+_result_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide result cache, opening it on first use"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache()
+        logger.info(f"LLM result cache opened at {_result_cache.path}")
+    return _result_cache
@@ -0,0 +1,104 @@
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from ..util import COMMON_SENTIMENTS
+
+
+# Cue phrases per sentiment. Matching is whole-word and case-insensitive.
+SENTIMENT_LEXICON: Dict[str, List[str]] = {
+    "Happy": ["happy", "great", "good news", "smooth", "nice", "enjoy", "enjoyed", "pleasant", "relief"],
+    "Excited": ["excited", "exciting", "festival", "concert", "celebration", "celebrations", "marathon",
+                "hackathon", "can't wait", "parade", "fireworks"],
+    "Hopeful": ["hope", "hopefully", "improving", "will be fixed", "work in progress", "restored soon",
+                "expected to clear", "getting better"],
+    "Grateful": ["thank", "thanks", "thank you", "grateful", "kudos", "appreciate", "appreciated",
+                 "helped", "quick response"],
+    "Proud": ["proud", "achievement", "award", "cleanest", "record"],
+    "Calm": ["calm", "normal", "peaceful", "light traffic", "moving freely", "no issues", "all clear"],
+    "Indifferent": ["whatever", "as usual", "nothing new", "same old"],
+    "Uncertain": ["maybe", "unclear", "unconfirmed", "rumor", "rumour", "possibly", "not sure", "any update",
+                  "does anyone know"],
+    "Waiting": ["waiting", "still waiting", "queue", "queues", "awaiting", "wait", "stuck for", "no bus"],
+    "Frustrated": ["jam", "jams", "stuck", "delay", "delayed", "delays", "slow", "gridlock", "congestion",
+                   "bumper to bumper", "again", "every day", "fed up", "annoying", "worst", "pothole",
+                   "potholes", "crawling", "traffic"],
+    "Angry": ["angry", "outrage", "outraged", "furious", "disgusting", "shameful", "shame", "ridiculous",
+              "pathetic", "unacceptable", "harassment", "assault", "fight", "vandalism"],
+    "Worried": ["worried", "worry", "concern", "concerned", "unsafe", "danger", "dangerous", "risk",
+                "accident", "emergency", "fire", "flood", "flooded", "flooding", "injured", "injury",
+                "stampede", "theft", "robbery", "storm", "waterlogged", "collapsed", "ambulance"],
+    "Disappointed": ["disappointed", "disappointing", "poor", "failed", "still not", "no action", "neglect",
+                     "neglected", "broken", "let down"],
+    "Helpless": ["helpless", "nobody", "no help", "no one", "stranded", "trapped", "no power", "no water",
+                 "power cut", "blackout", "nothing we can do"],
+}
+
+
+class LocalSentimentClassifier:
+    """
+    Lexicon-based first tier for sentiment classification.
+
+    Scores each COMMON_SENTIMENTS label by the cue phrases it matches and
+    returns the top label with a confidence in [0, 1]. Confidence combines how
+    dominant the top label is with how much evidence was found, so texts with
+    a single weak cue stay below typical escalation thresholds.
+    """
+
+    def __init__(self, lexicon: Optional[Dict[str, List[str]]] = None, min_evidence: int = 3):
+        self.lexicon = lexicon or SENTIMENT_LEXICON
+        self.min_evidence = min_evidence
+        self._label_for_term = {}
+        for label, terms in self.lexicon.items():
+            if label not in COMMON_SENTIMENTS:
+                raise ValueError(f"Unknown sentiment label in lexicon: {label}")
+            for term in terms:
+                self._label_for_term[term.lower()] = label
+        # Longest terms first so phrases win over their constituent words
+        terms = sorted(self._label_for_term, key=len, reverse=True)
+        self._pattern = re.compile(r"\b(?:" + "|".join(re.escape(t) for t in terms) + r")\b")
+
+    def classify(self, text: str) -> Tuple[Optional[str], float]:
+        """Return (sentiment, confidence); sentiment is None when no cue matched."""
+        scores = Counter(self._label_for_term[m] for m in self._pattern.findall(text.lower()))
+        if not scores:
+            return None, 0.0
+        ranked = scores.most_common(2)
+        top_label, top_score = ranked[0]
+        if len(ranked) > 1 and ranked[1][1] == top_score:
+            # Tie between labels: no dominant sentiment
+            return top_label, 0.0
+        total = sum(scores.values())
+        confidence = (top_score / total) * min(1.0, total / self.min_evidence)
+        return top_label, confidence
+
+
+class AgreementTracker:
+    """Tracks how often confident local labels agree with the LLM on a random sample of items."""
+
+    def __init__(self):
+        self.compared = 0
+        self.agreed = 0
+        self.confusion: Counter = Counter()
+
+    def record(self, local_label: Optional[str], llm_label: str) -> None:
+        self.compared += 1
+        if local_label == llm_label:
+            self.agreed += 1
+        else:
+            self.confusion[(local_label, llm_label)] += 1
+
+    @property
+    def agreement_rate(self) -> Optional[float]:
+        return self.agreed / self.compared if self.compared else None
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "compared": self.compared,
+            "agreed": self.agreed,
+            "agreement_rate": self.agreement_rate,
+            "top_disagreements": [
+                {"local": local, "llm": llm, "count": count}
+                for (local, llm), count in self.confusion.most_common(5)
+            ],
+        }
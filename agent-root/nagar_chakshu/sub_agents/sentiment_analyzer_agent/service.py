@@ -0,0 +1,294 @@
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Union
+import dotenv
+from dotenv import load_dotenv
+from typing import List, Dict, Tuple
+import random
+from datetime import datetime, timedelta
+import math
+import asyncio
+from ..util import PROMPT_SENTIMENT_ANALYSIS, PROMPT_BATCH_SENTIMENT_ANALYSIS, normalize_sentiment, cluster_key
+from .classifier import LocalSentimentClassifier, AgreementTracker
+from ..result_cache import get_result_cache
+from ..llm_gateway import get_llm_gateway
+from ..datastore import DataStore, Collections
+from ..handoff import hand_off, handed_off
+from common.metrics import instrument_tool, count_items, count_firestore
+
+
+
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+LLM_STAGE = "sentiment"
+STAGE = "sentiment_analyzer_agent"
+
+# Fields of summarized_data the sentiment records are built from
+SUMMARY_FIELDS = ("descriptions", "coordinates", "geohash", "location", "resolution_time", "categories", "cluster_key")
+
+class SentimentAnalyzerAgent:
+    
+    def __init__(self):
+        self.store = DataStore()
+        self.sentiment_data: List[Dict[str, Any]] = []
+        self.summarized_data: List[Dict[str, Any]] = []
+        # Without this run's summaries, summarized_data is read and stored a page at a time
+        self.paged = False
+        self.summary_count = 0
+        self.sentiment_count = 0
+        self.stored_count = 0
+        # Number of clusters packed into one prompt; 1 disables batching
+        self.batch_size = int(os.getenv("SENTIMENT_BATCH_SIZE", "20"))
+        self.max_batch_retries = int(os.getenv("SENTIMENT_BATCH_RETRIES", "3"))
+        # Local first tier: items at or above the threshold skip the LLM.
+        # A threshold above 1 sends everything to the LLM.
+        self.local_classifier = LocalSentimentClassifier()
+        self.local_threshold = float(os.getenv("SENTIMENT_LOCAL_THRESHOLD", "0.6"))
+        # Fraction of confident local labels also sent to the LLM to measure agreement
+        self.agreement_sample_rate = float(os.getenv("SENTIMENT_AGREEMENT_SAMPLE_RATE", "0.05"))
+        self.agreement = AgreementTracker()
+        
+    @instrument_tool(STAGE)
+    async def get_summarized_data(self) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        """Take this run's summaries, or set up reading summarized_data from Firestore page by page"""
+        self.summarized_data = []
+        self.sentiment_data = []
+        self.summary_count = self.sentiment_count = self.stored_count = 0
+        summarized_data = handed_off(Collections.SUMMARIZED_DATA)
+        self.paged = summarized_data is None
+        if self.paged:
+            # analyze_sentiment_data reads, analyzes and stores one page at a time
+            return {"status": "success", "source": Collections.SUMMARIZED_DATA, "paged": True}
+        self.summarized_data = summarized_data
+        self.summary_count = len(self.summarized_data)
+        count_items(STAGE, "in", len(self.summarized_data))
+        print(f"Fetched {len(self.summarized_data)} summarized data entries.")
+        return self.summarized_data
+        
+        
+    @instrument_tool(STAGE)
+    async def analyze_sentiment_data(self) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        """Analyze sentiment of the fetched data"""
+        if self.paged:
+            return await self._analyze_pages()
+
+        if not self.summarized_data:
+            logger.warning("No data to analyze sentiment.")
+            return []
+        
+        self.sentiment_data = await self._analyze(self.summarized_data)
+        self.sentiment_count = len(self.sentiment_data)
+        return self.sentiment_data
+
+    async def _analyze_pages(self) -> Dict[str, Any]:
+        """Analyze and store summarized_data a page at a time, so only one page is held"""
+        try:
+            async for page in self.store.iter_pages(Collections.SUMMARIZED_DATA, SUMMARY_FIELDS):
+                count_firestore("read", Collections.SUMMARIZED_DATA, len(page))
+                count_items(STAGE, "in", len(page))
+                self.summary_count += len(page)
+                sentiment_data = await self._analyze(page)
+                self.sentiment_count += len(sentiment_data)
+                self.stored_count += await asyncio.to_thread(self._write_sentiment_data, sentiment_data)
+        except Exception as e:
+            logger.error(f"Error analyzing summarized data: {e}")
+            return {"error": f"Error analyzing summarized data: {e}", "analyzed_count": self.sentiment_count,
+                    "stored_count": self.stored_count}
+        print(f"Analyzed {self.sentiment_count} of {self.summary_count} summarized data entries.")
+        return {"status": "success", "analyzed_count": self.sentiment_count, "stored_count": self.stored_count}
+
+    async def _analyze(self, summarized_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Sentiment records for summaries"""
+        sentiment_data = []
+        
+        # Combine all descriptions of each entry into a single text for sentiment analysis
+        items = {}
+        for idx, data in enumerate(summarized_data):
+            descriptions = data.get('descriptions', [])
+            if not descriptions:
+                logger.warning("No descriptions found for data entry.")
+                continue
+            items[str(idx)] = " ".join(descriptions)
+        
+        sentiments = await self._classify(items)
+        
+        for item_id, sentiment in sentiments.items():
+            data = summarized_data[int(item_id)]
+            
+            # Append the sentiment analysis result to the data entry
+            data_with_sentiment = {
+                "coordinates": data.get('coordinates', {'lat': 0, 'lng': 0}),
+                "geohash": data.get('geohash', ''),
+                "location": data.get('location', ''),
+                "resolution_time": data.get('resolution_time', ''),
+                "categories": data.get('categories', []),
+                "sentiment": sentiment,
+                "cluster_key": data.get('cluster_key') or cluster_key(data),
+            }
+            
+            sentiment_data.append(data_with_sentiment)
+                
+        return sentiment_data
+    
+    async def _classify(self, items: Dict[str, str]) -> Dict[str, str]:
+        """Label items locally, escalating low-confidence ones to the LLM"""
+        sentiments = {}
+        local_labels = {}
+        escalated = {}
+        # Confident items also sent to the LLM, only to measure how often it agrees with them
+        sampled = {}
+        for item_id, combined_text in items.items():
+            label, confidence = self.local_classifier.classify(combined_text)
+            local_labels[item_id] = label
+            if label and confidence >= self.local_threshold:
+                sentiments[item_id] = label
+                if random.random() < self.agreement_sample_rate:
+                    sampled[item_id] = combined_text
+            else:
+                escalated[item_id] = combined_text
+        
+        if escalated or sampled:
+            llm_sentiments = await self._classify_with_llm({**escalated, **sampled})
+            for item_id, sentiment in llm_sentiments.items():
+                if item_id in sampled:
+                    self.agreement.record(local_labels[item_id], normalize_sentiment(sentiment) or sentiment)
+                else:
+                    sentiments[item_id] = sentiment
+        
+        logger.info(
+            f"Sentiment: {len(items) - len(escalated)} of {len(items)} items labelled locally "
+            f"({len(sampled)} also sampled for agreement), {len(escalated)} labelled by the LLM; "
+            f"local agreement {self.agreement.summary()}"
+        )
+        return sentiments
+    
+    async def _classify_with_llm(self, items: Dict[str, str]) -> Dict[str, str]:
+        """LLM labels for items, served from the result cache where the same text was seen before"""
+        cache = get_result_cache()
+        # Batched labels are normalized and single ones are raw, so each path keeps its own entries
+        template = PROMPT_BATCH_SENTIMENT_ANALYSIS if self.batch_size > 1 else PROMPT_SENTIMENT_ANALYSIS
+        cached = cache.get_many(template, set(items.values()))
+        sentiments = {item_id: cached[text] for item_id, text in items.items() if text in cached}
+        missing = {item_id: text for item_id, text in items.items() if text not in cached}
+        
+        if missing:
+            if self.batch_size > 1:
+                fresh = await self._classify_batched(missing)
+            else:
+                fresh = await self._classify_individually(missing)
+            cache.put_many(template, {missing[item_id]: sentiment for item_id, sentiment in fresh.items()})
+            sentiments.update(fresh)
+        
+        logger.info(f"Sentiment cache: {len(items) - len(missing)} hits, {len(missing)} model lookups")
+        return sentiments
+    
+    async def _classify_individually(self, items: Dict[str, str]) -> Dict[str, str]:
+        """One model call per item, run concurrently within the gateway's limits"""
+        gateway = get_llm_gateway()
+        
+        async def classify(item_id: str, combined_text: str) -> Optional[str]:
+            try:
+                prompt = f"{PROMPT_SENTIMENT_ANALYSIS} {combined_text}"
+                response = await gateway.generate(LLM_STAGE, prompt)
+                return response.strip()
+            except Exception as e:
+                logger.error(f"Error analyzing sentiment for data entry {item_id}: {e}")
+                return None
+        
+        results = await asyncio.gather(*(classify(item_id, text) for item_id, text in items.items()))
+        return {item_id: sentiment for item_id, sentiment in zip(items, results) if sentiment is not None}
+    
+    async def _classify_batched(self, items: Dict[str, str]) -> Dict[str, str]:
+        """Pack items into prompts of batch_size, retrying only the items that fail"""
+        item_ids = list(items.keys())
+        batches = [
+            {item_id: items[item_id] for item_id in item_ids[start:start + self.batch_size]}
+            for start in range(0, len(item_ids), self.batch_size)
+        ]
+        sentiments = {}
+        for result in await asyncio.gather(*(self._classify_batch(batch, self.max_batch_retries) for batch in batches)):
+            sentiments.update(result)
+        return sentiments
+    
+    async def _classify_batch(self, batch: Dict[str, str], retries_left: int) -> Dict[str, str]:
+        """
+        Classify a batch with one structured-output call.
+
+        Items missing from the response or labelled outside COMMON_SENTIMENTS
+        are split into halves and retried until retries run out.
+        """
+        sentiments = {}
+        try:
+            prompt = PROMPT_BATCH_SENTIMENT_ANALYSIS + "\n".join(
+                json.dumps({"id": item_id, "text": text}) for item_id, text in batch.items()
+            )
+            response = await get_llm_gateway().generate(
+                LLM_STAGE,
+                prompt,
+                generation_config={"response_mime_type": "application/json"},
+            )
+            parsed = json.loads(response)
+            if not isinstance(parsed, dict):
+                raise ValueError("Expected a JSON object of id to sentiment")
+        except Exception as e:
+            logger.error(f"Error analyzing sentiment batch of {len(batch)} items: {e}")
+            parsed = {}
+        
+        failed = {}
+        for item_id, text in batch.items():
+            sentiment = normalize_sentiment(parsed.get(item_id))
+            if sentiment:
+                sentiments[item_id] = sentiment
+            else:
+                failed[item_id] = text
+        
+        if failed:
+            if retries_left <= 0:
+                logger.error(f"Giving up on sentiment for items {list(failed.keys())}")
+                return sentiments
+            failed_ids = list(failed.keys())
+            mid = max(1, len(failed_ids) // 2)
+            parts = [part for part in (failed_ids[:mid], failed_ids[mid:]) if part]
+            for result in await asyncio.gather(*(
+                self._classify_batch({item_id: failed[item_id] for item_id in part}, retries_left - 1) for part in parts
+            )):
+                sentiments.update(result)
+        
+        return sentiments
+        
+    @instrument_tool(STAGE)
+    def store_sentiment_data(self) -> Optional[Dict[str, Any]]:
+        """Store summarized data in Firestore"""
+        if self.paged:
+            # Each page was stored as it was analyzed
+            return {"status": "success", "stored_count": self.stored_count, "collection": Collections.SENTIMENT_DATA}
+        scheduled = hand_off(Collections.SENTIMENT_DATA, self.sentiment_data, self._write_sentiment_data)
+        if scheduled is not None:
+            return scheduled
+        self._write_sentiment_data(self.sentiment_data)
+
+    def _write_sentiment_data(self, items: List[Dict[str, Any]]) -> int:
+        try:
+            # Keyed like the summary it came from, so reruns replace the incident's sentiment
+            written = self.store.upsert(Collections.SENTIMENT_DATA, ((data["cluster_key"], data) for data in items))
+            stored_count = len(written["document_ids"])
+            
+            count_firestore("write", Collections.SENTIMENT_DATA, stored_count)
+            count_items(STAGE, "out", stored_count)
+            logger.info(f"Stored {stored_count} sentiment data entries in Firestore.")
+            return stored_count
+        except Exception as e:
+            logger.error(f"Error storing sentiment data: {e}")
+            return 0
+
+
+service = SentimentAnalyzerAgent()
@@ -0,0 +1,265 @@
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Union
+import dotenv
+from dotenv import load_dotenv
+from typing import List, Dict, Tuple
+import random
+from datetime import datetime, timedelta
+import math
+import asyncio
+from google.cloud.firestore_v1 import Increment
+from ..util import CATEGORY_VALIDITY_DURATION, encode, cluster_key, first_seen, primary_category
+from ..llm_gateway import get_llm_gateway
+from ..datastore import DataStore, Collections
+from ..handoff import hand_off, handed_off
+from common.metrics import instrument_tool, count_items, count_firestore
+
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+
+LLM_STAGE = "synthesis"
+STAGE = "synthesis_agent"
+
+# Fields of processed_data that clustering and summaries use
+PROCESSED_FIELDS = ("description", "categories", "coordinates", "location", "observed_at", "resolution_time")
+
+class SynthesisAgent:
+    """Main service class for data fusing operations"""
+    
+    def __init__(self):
+        self.store = DataStore()
+        self.processed_data: List[Dict[str, Any]] = []
+        self.summarized_data: List[Dict[str, Any]] = []
+        
+    @instrument_tool(STAGE)
+    async def get_processed_data(self) -> List[Dict[str, Any]]:
+        """Fetch user submitted reports from Firestore"""
+        try:
+            # Within a pipeline run, take what the intake stages produced instead of reading it back
+            processed_data = handed_off(Collections.PROCESSED_DATA)
+            if processed_data is not None:
+                self.processed_data = processed_data
+            else:
+                # A full re-synthesis reads every partition of the collection concurrently. Clustering
+                # needs every item, so the whole collection is held: memory grows with it
+                self.processed_data = []
+                async for page in self.store.iter_scan(Collections.PROCESSED_DATA, PROCESSED_FIELDS):
+                    self.processed_data.extend(page)
+                count_firestore("read", Collections.PROCESSED_DATA, len(self.processed_data))
+            count_items(STAGE, "in", len(self.processed_data))
+            print(f"Fetched {len(self.processed_data)} processed data entries.")
+            return self.processed_data
+        except Exception as e:
+            logger.error(f"Error fetching user reports: {e}")
+            return []
+        
+        
+    @instrument_tool(STAGE)
+    async def synthesize_processed_data(self) -> List[Dict[str, Any]]:
+        """Remove duplicates and summarize processed data"""
+        self.summarized_data = []
+        
+        if not self.processed_data:
+            return self.summarized_data
+        
+        # Keep track of which data points have been clustered
+        processed_indices = set()
+        clusters = []
+        
+        for i, data_point in enumerate(self.processed_data):
+            if i in processed_indices:
+                continue
+                
+            # Start a new cluster with current data point
+            cluster = [data_point]
+            processed_indices.add(i)
+            
+            # Find all other points that should be in same cluster
+            for j, other_point in enumerate(self.processed_data):
+                if j in processed_indices or i == j:
+                    continue
+                
+                # Check if they should be clustered together
+                if self._should_cluster_together(data_point, other_point):
+                    cluster.append(other_point)
+                    processed_indices.add(j)
+            
+            clusters.append(cluster)
+        
+        # Clusters first seen in the same cell with the same primary category share a key: one incident
+        incidents: Dict[str, List[Dict[str, Any]]] = {}
+        for cluster in clusters:
+            incidents.setdefault(cluster_key(first_seen(cluster)), []).extend(cluster)
+        
+        # Create cluster summaries; the model calls run concurrently
+        self.summarized_data = list(await asyncio.gather(*(
+            self._create_cluster_summary(cluster, cluster_id) for cluster_id, cluster in enumerate(incidents.values())
+        )))
+        
+        print(len(self.summarized_data), "clusters created from processed data.")
+        
+        return self.summarized_data
+
+    def _should_cluster_together(self, data_point: Dict, other_point: Dict) -> bool:
+        """Check if two points should be in the same cluster"""
+        
+        point1 = data_point.get('coordinates', {})
+        point2 = other_point.get('coordinates', {})
+        
+        # Check distance (must be within 100m)
+        lat1 = point1.get('lat', 0)
+        lng1 = point1.get('lng', 0)
+        lat2 = point2.get('lat', 0)
+        lng2 = point2.get('lng', 0)
+        
+        # Skip if coordinates are missing
+        if not all([lat1, lng1, lat2, lng2]):
+            return False
+        
+        distance = self._calculate_distance(lat1, lng1, lat2, lng2)
+        
+        if distance > 0.007:  
+            return False
+        
+        # Check if any categories match
+        categories1 = data_point.get('categories', [])
+        categories2 = other_point.get('categories', [])
+        
+        
+        
+        # Handle single category (convert to list)
+        if isinstance(categories1, str):
+            categories1 = [categories1]
+        if isinstance(categories2, str):
+            categories2 = [categories2]
+        
+        # Check if any category overlaps
+        if not categories1 or not categories2:
+            return False
+            
+        return bool(set(categories1) & set(categories2))  # True if any common categories
+
+    def _calculate_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+        """Calculate distance between two points in kilometers"""
+        # Convert to radians
+        lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
+        
+        # Haversine formula
+        dlat = lat2 - lat1
+        dlng = lng2 - lng1
+        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
+        c = 2 * math.asin(math.sqrt(a))
+        
+        return c * 6371  # Earth radius in km
+    
+    async def get_intelligent_summary(self, cluster_data: List[Dict[str, Any]]) -> str:
+        """Generate an intelligent summary for a cluster using Gemini model"""
+        try:
+            # Prepare input text
+            input_text = " ".join([data.get('description', '') for data in cluster_data])
+
+            prompt = f"Generate a concise summary, dont miss any important details for the following data points:\n{input_text}\n\nSummary:"
+            response = await get_llm_gateway().generate(LLM_STAGE, prompt)
+            return response.strip()
+        except Exception as e:
+            logger.error(f"Error generating summary: {e}")
+            return "Summary generation failed due to an error."
+        
+  
+    def get_resolution_time(self,categories: list[str]) -> datetime:
+        """Returns the latest valid_upto from the matched categories."""
+        durations = [
+            CATEGORY_VALIDITY_DURATION.get(cat, timedelta(hours=1))  # default to 1hr
+            for cat in categories
+        ]
+        return datetime.now() + max(durations, default=timedelta(hours=1))
+    
+    async def _create_cluster_summary(self, cluster_data: List[Dict], cluster_id: int) -> Dict[str, Any]:
+        """Create summary for a cluster"""
+        
+        # Basic info
+        cluster_size = len(cluster_data)
+        
+        # The incident is placed where it was first seen, which later reports do not change
+        first = first_seen(cluster_data)
+        lat = first.get('coordinates', {}).get('lat', 0)
+        lng = first.get('coordinates', {}).get('lng', 0)
+
+        
+        
+        # Collect all categories
+        all_categories = []
+        for data_point in cluster_data:
+            categories = data_point.get('categories', [])
+            if isinstance(categories, str):
+                categories = [categories]
+            all_categories.extend(categories)
+        
+        # Count unique categories
+        unique_categories = list(set(all_categories))
+        
+        intelligent_cluster_summary  =  await self.get_intelligent_summary(cluster_data)
+        image_urls = [data.get('image_url') for data in cluster_data if 'image_url' in data]
+        descriptions = [data.get('description', '') for data in cluster_data]
+        resolution_time = self.get_resolution_time(unique_categories)
+        
+        
+        hash_code = encode(lat, lng, precision=9)
+        
+        
+        summary = {
+            'summary': intelligent_cluster_summary,
+            'cluster_id': cluster_id,
+            'occurrences': cluster_size,
+            'resolution_time': resolution_time,
+            'coordinates': {
+                'lat': lat,
+                'lng': lng
+            },
+            'categories': unique_categories,
+            'descriptions': descriptions,
+            'geohash':hash_code,
+            'location': first.get('location', 'Unknown Location'),
+            'primary_category': primary_category(first),
+            'votes':0
+        }
+        summary['cluster_key'] = cluster_key(summary)
+        return summary
+        
+    @instrument_tool(STAGE)
+    def store_summaries(self) -> Optional[Dict[str, Any]]:
+        """Store summarized data in Firestore"""
+        scheduled = hand_off(Collections.SUMMARIZED_DATA, self.summarized_data, self._write_summaries)
+        if scheduled is not None:
+            return scheduled
+        self._write_summaries(self.summarized_data)
+
+    def _write_summaries(self, items: List[Dict[str, Any]]) -> None:
+        try:
+            # One document per incident; Increment(0) creates votes at 0 without resetting existing votes
+            written = self.store.upsert(Collections.SUMMARIZED_DATA, (
+                (summary["cluster_key"], {**summary, "votes": Increment(0)}) for summary in items
+            ))
+            stored_count = len(written["document_ids"])
+            
+            count_firestore("write", Collections.SUMMARIZED_DATA, stored_count)
+            count_items(STAGE, "out", stored_count)
+            logger.info(f"Stored {stored_count} summarized data entries in Firestore.")
+        except Exception as e:
+            logger.error(f"Error storing summaries: {e}")
+
+    
+    
+# Initialize the service
+service = SynthesisAgent()
@@ -76,6 +76,26 @@ CATEGORY_VALIDITY_DURATION = {
     "utility": timedelta(hours=8),
 }
 
+HOURS_PER_WEEK = 168
+# 1970-01-01 was a Thursday; shifting by 3 days makes hour-of-week 0 Monday 00:00 UTC
+EPOCH_WEEKDAY_OFFSET_HOURS = 72
+
+
+def epoch_hour(timestamp):
+    """Whole hours since the Unix epoch for a datetime"""
+    return int(timestamp.timestamp() // 3600)
+
+
+def hour_of_week(hour):
+    """Hour-of-week (0 = Monday 00:00 UTC) for an epoch hour"""
+    return (hour + EPOCH_WEEKDAY_OFFSET_HOURS) % HOURS_PER_WEEK
+
+
+def week_index(hour):
+    """Week number since the epoch, with weeks starting on Monday 00:00 UTC"""
+    return (hour + EPOCH_WEEKDAY_OFFSET_HOURS) // HOURS_PER_WEEK
+
+
 __base32 = '0123456789bcdefghjkmnpqrstuvwxyz'
 
 def encode(latitude, longitude, precision=12):
@@ -114,6 +134,174 @@ def encode(latitude, longitude, precision=12):
     return ''.join(geohash)
 
 
+def decode_bounds(geohash):
+    """
+    Decode a geohash to its bounding box, returned as
+    (min_lat, min_lng, max_lat, max_lng).
+    """
+    lat_interval, lon_interval = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for c in geohash:
+        cd = __base32.index(c)
+        for mask in [ 16, 8, 4, 2, 1 ]:
+            if even:
+                mid = (lon_interval[0] + lon_interval[1]) / 2
+                if cd & mask:
+                    lon_interval[0] = mid
+                else:
+                    lon_interval[1] = mid
+            else:
+                mid = (lat_interval[0] + lat_interval[1]) / 2
+                if cd & mask:
+                    lat_interval[0] = mid
+                else:
+                    lat_interval[1] = mid
+            even = not even
+    return lat_interval[0], lon_interval[0], lat_interval[1], lon_interval[1]
+
+
+def cell_size(precision):
+    """Return the (lat_degrees, lng_degrees) size of a geohash cell at the given precision."""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def covering_prefixes(min_lat, min_lng, max_lat, max_lng, max_cells=16, max_precision=9):
+    """
+    Return the geohash prefixes that together cover the given bounding box.
+
+    The longest precision whose grid needs at most `max_cells` cells is used,
+    so small boxes get tight prefixes and large boxes a handful of coarse ones.
+    Boxes crossing the antimeridian are not split.
+    """
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+    min_lng, max_lng = max(min_lng, -180.0), min(max_lng, 180.0)
+
+    for precision in range(max_precision, 0, -1):
+        lat_step, lng_step = cell_size(precision)
+        rows = math.ceil((max_lat - min_lat) / lat_step) + 1
+        cols = math.ceil((max_lng - min_lng) / lng_step) + 1
+        if rows * cols <= max_cells or precision == 1:
+            break
+
+    prefixes = set()
+    for i in range(rows):
+        lat = min(min_lat + i * lat_step, max_lat)
+        for j in range(cols):
+            lng = min(min_lng + j * lng_step, max_lng)
+            prefixes.add(encode(lat, lng, precision))
+    return sorted(prefixes)
+
+
+def bounding_box(lat, lng, radius_km):
+    """Return the (min_lat, min_lng, max_lat, max_lng) box enclosing a circle of radius_km."""
+    dlat = radius_km / 111.32
+    dlng = radius_km / (111.32 * max(math.cos(math.radians(lat)), 1e-6))
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Calculate distance between two points in kilometers"""
+    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
+    return 2 * math.asin(math.sqrt(a)) * 6371
+
+
+
+def source_time(value):
+    """
+    A source's own timestamp as a naive local datetime, like datetime.now().
+
+    Accepts datetimes (Firestore returns UTC-aware ones) and ISO strings
+    such as the feed's `created_at`; anything else, or an unparsable
+    string, gives None.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+
+def observation_time(record):
+    """
+    When a processed or summarized record was observed.
+
+    Uses `observed_at` when present. Older records only carry
+    `resolution_time`, which was set to observation time plus the longest
+    CATEGORY_VALIDITY_DURATION of their categories, so that offset is undone.
+    """
+    observed_at = record.get("observed_at")
+    if isinstance(observed_at, datetime):
+        return observed_at
+    resolution_time = record.get("resolution_time")
+    if not isinstance(resolution_time, datetime):
+        return None
+    categories = record.get("categories") or []
+    if isinstance(categories, str):
+        categories = [categories]
+    validity = max(
+        (CATEGORY_VALIDITY_DURATION.get(cat, timedelta(hours=1)) for cat in categories),
+        default=timedelta(hours=1),
+    )
+    return resolution_time - validity
+
+
+def record_cell(record, precision):
+    """Geohash cell of a record, from its geohash or its coordinates"""
+    geohash = record.get("geohash")
+    if geohash and len(geohash) >= precision:
+        return geohash[:precision]
+    coords = record.get("coordinates") or {}
+    lat, lng = coords.get("lat"), coords.get("lng")
+    if not lat or not lng:
+        return None
+    return encode(float(lat), float(lng), precision=precision)
+
+
+# Geohash precision of incident keys: cells of about 150 m
+CLUSTER_KEY_PRECISION = 7
+
+
+def first_seen(records):
+    """The earliest observed of an incident's records; ties and undated records fall back to their content"""
+    return min(records, key=lambda record: (
+        observation_time(record) is None,
+        observation_time(record) or datetime.min,
+        str(record.get("coordinates")),
+        str(record.get("description", "")),
+    ))
+
+
+def primary_category(record):
+    """A record's primary category: the one set explicitly, else the first it lists"""
+    categories = record.get("categories") or []
+    if isinstance(categories, str):
+        categories = [categories]
+    return record.get("primary_category") or (categories[0] if categories else None)
+
+
+def cluster_key(record):
+    """
+    Stable key of an incident: the precision-7 geohash of where it was first
+    seen plus its primary category.
+
+    record is the incident's first-seen report, or its summary, which takes
+    its coordinates and primary_category from that report. Reports joining
+    the incident later, in any order, leave the key unchanged, so summaries,
+    sentiment and predictions for it update one document each across runs.
+    Documents written under the earlier keys (precision-9 geohash plus all
+    categories) are not merged into these and are left as they are.
+    """
+    cell = record_cell(record, CLUSTER_KEY_PRECISION) or "nogeo"
+    return f"{cell}_{primary_category(record) or 'uncategorized'}"
+
 
 COMMON_SENTIMENTS = [
     # Positive
@@ -137,6 +325,30 @@ the sentiment from the following list of common sentiments:
 
 """+"\n".join(COMMON_SENTIMENTS)+"Combined Description:\n"
 
+PROMPT_BATCH_SENTIMENT_ANALYSIS = """
+You are an expert in sentiment analysis. You will be given several items, each with an id and a
+combined descriptions text. For every item decide its sentiment in one word, chosen only from the
+following list of common sentiments:
+
+"""+"\n".join(COMMON_SENTIMENTS)+"""
+
+Return a JSON object mapping each item id to its sentiment, for example {"0": "Frustrated", "1": "Calm"}.
+Include every id exactly once and nothing else.
+
+Items:
+"""
+
+
+def normalize_sentiment(label):
+    """Map a model label onto COMMON_SENTIMENTS, or return None if it is not one of them."""
+    if not isinstance(label, str):
+        return None
+    cleaned = label.strip().strip(".\"'").lower()
+    for sentiment in COMMON_SENTIMENTS:
+        if sentiment.lower() == cleaned:
+            return sentiment
+    return None
+
 PROMPT_PREDICTIVE_ANALYSIS = """
 
 You are an expert in predictive analysis. Your task is to analyze the summary and make predictions based on it.
@@ -145,3 +357,11 @@ You have to return the prediction in 2-3 lines. It should be crisp and to the po
 Summary:\n
 """
 
+PROMPT_PREDICTIVE_NARRATION = """
+
+You are an expert in predictive analysis. You are given a summary of incidents at a location and a
+statistical forecast for that location computed from historical reports. Turn the forecast into a
+prediction in 2-3 lines. Keep to the levels given, do not invent numbers. It should be crisp and to the point.
+
+Summary:\n
+"""
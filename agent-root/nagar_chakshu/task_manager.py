@@ -1,11 +1,17 @@
+import json
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+import threading
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, Any, List, Optional
 
-from google.adk.agents import Agent
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService, Session
-from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
-from google.genai import types as adk_types
+from common.jobs import listen_stages
+from common.sessions import SessionStore
+
+from .notify import notify_run_finished
+
+if TYPE_CHECKING:
+    from google.adk.agents import Agent
+    from google.adk.events import Event
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,67 +19,149 @@ logger = logging.getLogger(__name__)
 
 A2A_APP_NAME = "nagar_chakshu_app"
 
+# Lists longer than this in streamed tool payloads are sent as their length
+STREAM_MAX_LIST_ITEMS = 20
+
+
+def compact(value: Any) -> Any:
+    """Shrink a tool payload for streaming: long lists become counts, ids are dropped"""
+    if isinstance(value, list):
+        return {"count": len(value)} if len(value) > STREAM_MAX_LIST_ITEMS else [compact(item) for item in value]
+    if isinstance(value, dict):
+        return {key: compact(item) for key, item in value.items() if key != "document_ids"}
+    return value
+
+
+def event_payloads(event: "Event") -> List[Dict[str, Any]]:
+    """The streamable parts of an ADK event: tool calls, tool results and text"""
+    payloads = []
+    for call in event.get_function_calls():
+        payloads.append({"type": "tool_call", "author": event.author, "name": call.name, "args": compact(call.args)})
+    for response in event.get_function_responses():
+        payloads.append({"type": "tool_result", "author": event.author, "name": response.name,
+                         "response": compact(response.response)})
+    text = "".join(part.text for part in (event.content.parts or []) if part.text) if event.content else ""
+    if text:
+        payloads.append({"type": "text", "author": event.author, "text": text, "partial": bool(event.partial),
+                         "final": event.is_final_response()})
+    return payloads
+
+
+def event_text(event: "Event") -> Optional[str]:
+    if event.content and event.content.parts:
+        return event.content.parts[0].text
+    return None
+
 class TaskManager:
     """Task Manager for the Reddit Scout App in A2A mode."""
 
-    def __init__(self, agent: Agent):
+    def __init__(self, agent: Optional["Agent"] = None, pipeline_runner: Any = None, default_mode: str = "agent"):
+        # Without an agent, the root agent is imported on the first agent-mode
+        # request: google.adk takes seconds to import and direct mode never needs it
         self.agent = agent
+        # "direct" runs the pipeline through pipeline_runner without LLM orchestration
+        self.pipeline_runner = pipeline_runner
+        self.default_mode = default_mode
 
-        # Initialize ADK services
-        self.session_service = InMemorySessionService()
-        self.artifact_service = InMemoryArtifactService()
+        self.sessions: Optional[SessionStore] = None
+        self.session_service = None
+        self.artifact_service = None
+        self.runner = None
+        self._load_lock = threading.Lock()
+        # Held for every pipeline run, /run or scheduled: stages keep run state on shared services
+        self.run_lock = asyncio.Lock()
 
-        # Create the runner
-        self.runner = Runner(
-            agent=self.agent,
-            app_name=A2A_APP_NAME,
-            session_service=self.session_service,
-            artifact_service=self.artifact_service
-        )
+    def load_agent(self):
+        """Import ADK, build the runner and return it (once)"""
+        if self.runner is not None:
+            return self.runner
+        with self._load_lock:
+            if self.runner is None:
+                from google.adk.runners import Runner
+                from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
+
+                if self.agent is None:
+                    from .agent import root_agent
+                    self.agent = root_agent
+
+                # Initialize ADK services; sessions are reused per client session id and evicted when idle
+                self.sessions = SessionStore(A2A_APP_NAME)
+                self.session_service = self.sessions.service
+                self.artifact_service = InMemoryArtifactService()
 
-    async def process_task(self, message: str, context: Dict[str, Any], session_id: Optional[str] = None) -> Dict[str, Any]:
+                # Create the runner
+                self.runner = Runner(
+                    agent=self.agent,
+                    app_name=A2A_APP_NAME,
+                    session_service=self.session_service,
+                    artifact_service=self.artifact_service
+                )
+                logger.info("ADK runner initialized")
+        return self.runner
+
+    async def warm_up(self) -> None:
+        """Load the agent off the event loop so the server answers while ADK imports"""
+        try:
+            await asyncio.to_thread(self.load_agent)
+        except Exception:
+            logger.exception("Failed to load the agent")
+
+    async def run_exclusive(self, run: Callable[[], Awaitable[Dict[str, Any]]],
+                            wait: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Await run() holding the run lock. If a run is already in progress,
+        return None without running, or with wait, run once it finishes.
+        Listeners in PIPELINE_NOTIFY_URLS are told when the run finishes.
+        """
+        if self.run_lock.locked() and not wait:
+            return None
+        async with self.run_lock:
+            result = await run()
+        notify_run_finished(result.get("status"))
+        return result
+
+    async def process_task(self, message: str, context: Dict[str, Any], session_id: Optional[str] = None,
+                           wait: bool = False) -> Dict[str, Any]:
         """
         Process an A2A task request by running the agent.
 
+        Only one pipeline run happens at a time; a request that arrives
+        during another run is answered with status "busy" instead, unless
+        wait is set (background jobs), in which case it runs afterwards.
+
         Args:
             message: The text message to process.
             context: Additional context data.
             session_id: Optional session ID.
+            wait: Wait for a run in progress instead of answering "busy".
 
         Returns:
             Response dictionary.
         """
-        # Use provided session ID or generate one
-        session_id = session_id or "session-abc"
-        user_id = context.get("user_id", "user-abc")
+        result = await self.run_exclusive(lambda: self._process_task(message, context, session_id), wait=wait)
+        if result is None:
+            return {
+                "message": "A pipeline run is already in progress; try again when it finishes",
+                "status": "busy",
+                "final_response": "",
+            }
+        return result
+
+    async def _process_task(self, message: str, context: Dict[str, Any], session_id: Optional[str]) -> Dict[str, Any]:
+        if self.pipeline_runner is not None and context.get("mode", self.default_mode) == "direct":
+            return await self._run_direct()
 
         try:
-            session = await self.session_service.create_session(
-            app_name=A2A_APP_NAME,
-            user_id=user_id,
-            state={"initial_key": "initial_value"} # State can be initialized
-         )
-
-            # Create user message content
-            request_content = adk_types.Content(role="user", parts=[adk_types.Part(text=message)])
-
-            # Run the agent asynchronously
-            events_async = self.runner.run_async(
-                user_id=user_id,
-                session_id=session.id,
-                new_message=request_content
-            )
-
-            raw_events = []
-            async for event in events_async:
-                raw_events.append(event.model_dump(exclude_none=True))
-                
-            # Final response
-            final_raw_event = raw_events[len(raw_events) - 1] if raw_events else {}
-            final_response = final_raw_event['content']['parts'][0]['text'] if 'content' in final_raw_event else "No response generated"
+            # Only the last event is kept: its text is the response
+            event_count = 0
+            last_event = None
+            async for event in self._agent_events(message, context, session_id):
+                event_count += 1
+                last_event = event
 
+            final_response = (event_text(last_event) if last_event is not None else None) or "No response generated"
             return {
-                "message": f"{len(raw_events)} events processed",
+                "message": f"{event_count} events processed",
                 "status": "success",
                 "final_response": final_response,
             }
@@ -85,3 +173,125 @@ class TaskManager:
                 "status": "error",
                 "data": {"error_type": type(e).__name__}
             }
+
+    async def _agent_events(self, message: str, context: Dict[str, Any], session_id: Optional[str],
+                            streaming: bool = False) -> AsyncIterator["Event"]:
+        """Run the agent on a message in the client's session and yield its events as they come"""
+        user_id = context.get("user_id", "user-abc")
+        runner = self.runner or await asyncio.to_thread(self.load_agent)
+        from google.genai import types as adk_types
+        from google.adk.agents.run_config import RunConfig, StreamingMode
+
+        session = await self.sessions.get_or_create(
+            user_id,
+            session_id,
+            state={"initial_key": "initial_value"} # State for new sessions
+        )
+
+        # Create user message content
+        request_content = adk_types.Content(role="user", parts=[adk_types.Part(text=message)])
+
+        # With streaming, model text also arrives as partial events while it is generated
+        run_config = RunConfig(streaming_mode=StreamingMode.SSE) if streaming else None
+        async for event in runner.run_async(
+            user_id=user_id,
+            session_id=session.id,
+            new_message=request_content,
+            run_config=run_config,
+        ):
+            yield event
+
+    async def stream_task(self, message: str, context: Dict[str, Any],
+                          session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run a task like process_task, yielding its events as they happen.
+
+        Agent mode yields tool calls, tool results and (partial) text from
+        each ADK event, plus a "stage" event when a sub-agent starts or
+        finishes; direct mode yields the stage events. Nothing is kept
+        once yielded. The last event has type "done" (with the same
+        message, status and final_response as process_task) or "error".
+        A run already in progress ends the stream with status "busy".
+        """
+        if self.run_lock.locked():
+            yield {"type": "done", "status": "busy", "final_response": "",
+                   "message": "A pipeline run is already in progress; try again when it finishes"}
+            return
+
+        async with self.run_lock:
+            if self.pipeline_runner is not None and context.get("mode", self.default_mode) == "direct":
+                stream = self._stream_direct()
+            else:
+                stream = self._stream_agent(message, context, session_id)
+            status = None
+            try:
+                async for payload in stream:
+                    status = payload.get("status", status)
+                    yield payload
+            except Exception as e:
+                logger.exception("Failed to stream task")
+                yield {"type": "error", "status": "error", "message": f"Error processing your request: {str(e)}",
+                       "error_type": type(e).__name__}
+            finally:
+                await stream.aclose()
+                # Also after a disconnect: a cancelled run may have written part of its output
+                notify_run_finished(status or "cancelled")
+
+    async def _stream_agent(self, message: str, context: Dict[str, Any],
+                            session_id: Optional[str]) -> AsyncIterator[Dict[str, Any]]:
+        # Stage callbacks run while the runner produces the next event, so they are sent just before it
+        stages: List[Dict[str, Any]] = []
+        event_count = 0
+        final_response = None
+        with listen_stages(lambda stage, status, **details: stages.append(
+                {"type": "stage", "stage": stage, "status": status, **details})):
+            async for event in self._agent_events(message, context, session_id, streaming=True):
+                event_count += 1
+                while stages:
+                    yield stages.pop(0)
+                for payload in event_payloads(event):
+                    if payload["type"] == "text" and not payload["partial"]:
+                        final_response = payload["text"]
+                    yield payload
+        while stages:
+            yield stages.pop(0)
+        yield {"type": "done", "status": "success", "message": f"{event_count} events processed",
+               "final_response": final_response or "No response generated"}
+
+    async def _stream_direct(self) -> AsyncIterator[Dict[str, Any]]:
+        events: asyncio.Queue = asyncio.Queue()
+        with listen_stages(lambda stage, status, **details: events.put_nowait(
+                {"type": "stage", "stage": stage, "status": status, **details})):
+            # The task copies the context, so the pipeline's stage reports reach the queue
+            run = asyncio.create_task(self._run_direct())
+        try:
+            while not (run.done() and events.empty()):
+                next_event = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait({next_event, run}, return_when=asyncio.FIRST_COMPLETED)
+                if next_event in done:
+                    yield next_event.result()
+                else:
+                    next_event.cancel()
+            yield {"type": "done", **run.result()}
+        finally:
+            # The client went away: stop the run, and let it finish its writes before the run lock is released
+            if not run.done():
+                run.cancel()
+                await asyncio.gather(run, return_exceptions=True)
+
+    async def _run_direct(self) -> Dict[str, Any]:
+        """Run the pipeline stages directly and report per-stage results"""
+        try:
+            report = await self.pipeline_runner.run()
+            return {
+                "message": f"{len(report['stages'])} stages run in {report['duration_ms']} ms",
+                "status": report["status"],
+                "final_response": json.dumps(report, default=str),
+            }
+        except Exception as e:
+            logger.exception("Failed to run pipeline")
+            return {
+                "message": f"Error running pipeline: {str(e)}",
+                "status": "error",
+                "data": {"error_type": type(e).__name__}
+            }
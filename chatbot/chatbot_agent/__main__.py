@@ -1,5 +1,6 @@
 import os
 import sys
+import hmac
 import logging
 import argparse
 import uvicorn
@@ -13,6 +14,8 @@ from pydantic import BaseModel
 # Use relative imports within the agent package
 from .task_manager import TaskManager
 from .agent import root_agent
+from .details_client import details_client
+from .answer_cache import AnswerCacheConfig
 from common.a2a_server import AgentRequest, AgentResponse, create_agent_server
 
 # Configure logging
@@ -90,12 +93,28 @@ async def main():
         host = os.getenv("SPEAKER_A2A_HOST", "0.0.0.0")
         port = int(os.getenv("SPEAKER_A2A_PORT", 8004))
         
+        async def invalidate_cache(request: Request):
+            """Called by the pipeline server when a run finishes: cached answers describe old data"""
+            # Only the pipeline server, holding the shared token, may drop the caches
+            token = AnswerCacheConfig.INVALIDATE_TOKEN
+            if not token:
+                raise HTTPException(status_code=403, detail="Cache invalidation is disabled: PIPELINE_NOTIFY_TOKEN is not set")
+            if not hmac.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()):
+                raise HTTPException(status_code=401, detail="Invalid or missing token")
+            answers = task_manager_instance.answer_cache
+            dropped = answers.clear(reason="pipeline_run") if answers is not None else 0
+            details_client.clear(reason="pipeline_run")
+            return {"status": "success", "answers_dropped": dropped}
+
         # Create the FastAPI app using the helper
         app = create_agent_server(
             name=agent_instance.name,
             description=agent_instance.description,
-            task_manager=task_manager_instance 
+            task_manager=task_manager_instance,
+            endpoints={"cache/invalidate": invalidate_cache},
         )
+        # Close the pooled connections to the city details API
+        app.add_event_handler("shutdown", details_client.close)
         
         # Add CORS middleware to allow multiple origins
         allow_all_origins = os.getenv("CORS_ALLOW_ALL", "false").lower() == "true"
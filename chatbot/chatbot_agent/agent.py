@@ -2,8 +2,6 @@ import random
 import os
 from google.adk.agents import Agent
 import random
-import praw
-from praw.exceptions import PRAWException
 import dotenv
 from dotenv import load_dotenv
 import re
@@ -11,6 +9,7 @@ from datetime import datetime
 from collections import defaultdict
 import aiohttp
 import asyncio
+from .details_client import details_client
 
 load_dotenv()
 
@@ -24,27 +23,8 @@ async def fetch_details(message: str):
     Returns:
         dict: API response containing city information
     """
-    try:
-        endpoint = os.getenv('BASE_API_URL') + "/api/ai-search"
-        body = {
-            "message": message
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(endpoint, json=body) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    return {
-                        "error": f"API request failed with status {response.status}",
-                        "message": "Unable to fetch city information at this time"
-                    }
-    
-    except Exception as e:
-        return {
-            "error": str(e),
-            "message": "An error occurred while fetching city information"
-        }
+    # Shared connection pool; repeated and concurrent identical queries are answered from one call
+    return await details_client.fetch(message)
 
 root_agent = Agent(
     name="city_events_chatbot",
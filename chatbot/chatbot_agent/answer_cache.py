@@ -0,0 +1,162 @@
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Optional, Set, Tuple
+
+from common.metrics import CACHE_ENTRIES, CACHE_INVALIDATIONS, count_cache
+
+from .details_client import DetailsConfig, normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerCacheConfig:
+    """Configuration for the chatbot's answer cache"""
+    ENABLED = os.getenv("ANSWER_CACHE", "true").lower() == "true"
+    # Answers are reused only within the window the city details themselves are cached for
+    TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(DetailsConfig.CACHE_TTL_SECONDS)))
+    MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+    # Jaccard similarity of the questions' key words needed to reuse an answer; 1.0 means the same words
+    SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.8"))
+    # Questions with fewer key words than this are only answered from cache on an exact match
+    MIN_TOKENS = int(os.getenv("ANSWER_CACHE_MIN_TOKENS", "2"))
+    # Bearer token /cache/invalidate requires, shared with the pipeline server; unset refuses every call
+    INVALIDATE_TOKEN = os.getenv("PIPELINE_NOTIFY_TOKEN", "")
+
+
+# Words that do not change what a city question asks about
+STOPWORDS = frozenset("""
+a an the is are was were be any there here it this that what whats how hows which
+on in at of for to from near around by with about
+me my i we us you your please tell show give know
+now currently current right latest s update updates status situation info information
+can could would will do does did
+""".split())
+
+
+def question_tokens(message: str) -> FrozenSet[str]:
+    """The key words of a question: normalized, without stopwords"""
+    return frozenset(token for token in normalize_query(message).split() if token not in STOPWORDS)
+
+
+def similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class AnswerCache:
+    """
+    Recent chatbot answers, reused for questions that ask the same thing.
+
+    A question is reduced to its key words (question_tokens) and answered
+    from the cached entry whose key words are most similar to it, if that
+    similarity reaches `similarity` and the entry is younger than
+    ttl_seconds. Questions with fewer than `min_tokens` key words only
+    match an entry with exactly the same words. Candidates come from an
+    inverted index of key words, so a lookup only compares against entries
+    sharing at least one word with the question.
+
+    clear() drops every entry; the server calls it when a pipeline run
+    finishes, as cached answers then describe outdated city data.
+    """
+
+    name = "answers"
+
+    def __init__(self, ttl_seconds: float = AnswerCacheConfig.TTL_SECONDS,
+                 max_entries: int = AnswerCacheConfig.MAX_ENTRIES,
+                 similarity: float = AnswerCacheConfig.SIMILARITY, min_tokens: int = AnswerCacheConfig.MIN_TOKENS):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.min_tokens = min_tokens
+        self.hits = 0
+        self.misses = 0
+        # Bumped by clear(); an answer worked out across a clear is not stored
+        self.generation = 0
+        # key words -> (stored at, question, answer), least recently used first
+        self._entries: "OrderedDict[FrozenSet[str], Tuple[float, str, str]]" = OrderedDict()
+        self._index: Dict[str, Set[FrozenSet[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "entries": len(self._entries),
+        }
+
+    def get(self, message: str) -> Optional[Dict[str, Any]]:
+        """The cached answer for a question like message, or None"""
+        tokens = question_tokens(message)
+        match = self._match(tokens, time.monotonic())
+        if match is None:
+            self.misses += 1
+            count_cache(self.name, 0, 1)
+            return None
+
+        key, score = match
+        self._entries.move_to_end(key)
+        stored_at, question, answer = self._entries[key]
+        self.hits += 1
+        count_cache(self.name, 1, 0)
+        return {"answer": answer, "question": question, "similarity": round(score, 3),
+                "age_seconds": round(time.monotonic() - stored_at, 1)}
+
+    def _match(self, tokens: FrozenSet[str], now: float) -> Optional[Tuple[FrozenSet[str], float]]:
+        if not tokens:
+            return None
+        if len(tokens) < self.min_tokens:
+            candidates = {tokens} if tokens in self._entries else set()
+        else:
+            candidates = set().union(*(self._index.get(token, ()) for token in tokens))
+
+        best = None
+        for key in candidates:
+            if now - self._entries[key][0] >= self.ttl_seconds:
+                self._remove(key)
+                continue
+            score = similarity(tokens, key)
+            if score >= self.similarity and (best is None or score > best[1]):
+                best = (key, score)
+        return best
+
+    def put(self, message: str, answer: str, generation: Optional[int] = None) -> None:
+        """Cache an answer; with the generation read before answering, skipped if a clear happened since"""
+        tokens = question_tokens(message)
+        if not tokens or (generation is not None and generation != self.generation):
+            return
+        if tokens in self._entries:
+            self._remove(tokens)
+        self._entries[tokens] = (time.monotonic(), message, answer)
+        for token in tokens:
+            self._index.setdefault(token, set()).add(tokens)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+        CACHE_ENTRIES.set(len(self._entries), cache=self.name)
+
+    def _remove(self, key: FrozenSet[str]) -> None:
+        del self._entries[key]
+        for token in key:
+            keys = self._index.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[token]
+        CACHE_ENTRIES.set(len(self._entries), cache=self.name)
+
+    def clear(self, reason: str = "manual") -> int:
+        """Drop every cached answer; returns how many there were"""
+        dropped = len(self._entries)
+        self.generation += 1
+        self._entries.clear()
+        self._index.clear()
+        CACHE_ENTRIES.set(0, cache=self.name)
+        CACHE_INVALIDATIONS.inc(cache=self.name, reason=reason)
+        logger.info(f"Answer cache cleared ({reason}): {dropped} answers dropped")
+        return dropped
@@ -0,0 +1,145 @@
+import os
+import re
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+from common.metrics import CACHE_INVALIDATIONS, count_cache
+
+logger = logging.getLogger(__name__)
+
+
+class DetailsConfig:
+    """Configuration for the city details API client"""
+    # The pipeline refreshes city data at most this often, so answers cannot go stale faster
+    PIPELINE_REFRESH_SECONDS = float(os.getenv("PIPELINE_SCHEDULE_MIN_INTERVAL_SECONDS", "120"))
+    CACHE_TTL_SECONDS = float(os.getenv("DETAILS_CACHE_TTL_SECONDS", str(PIPELINE_REFRESH_SECONDS / 2)))
+    CACHE_MAX_ENTRIES = int(os.getenv("DETAILS_CACHE_MAX_ENTRIES", "1000"))
+    # Open connections to the API shared by all requests
+    POOL_SIZE = int(os.getenv("DETAILS_POOL_SIZE", "20"))
+    TIMEOUT_SECONDS = float(os.getenv("DETAILS_TIMEOUT_SECONDS", "30"))
+
+
+def normalize_query(message: str) -> str:
+    """Cache key for a query: case, punctuation and spacing do not change the answer"""
+    return " ".join(re.sub(r"[^\w\s]", " ", message.lower()).split())
+
+
+class DetailsClient:
+    """
+    Client for the backend's /api/ai-search with pooling, caching and coalescing.
+
+    All calls share one aiohttp session and its connection pool. Successful
+    responses are cached by normalized query for ttl_seconds (LRU-bounded to
+    max_entries); errors are not cached. Identical queries arriving while a
+    call for them is in flight wait for that call instead of making their own.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, ttl_seconds: float = DetailsConfig.CACHE_TTL_SECONDS,
+                 max_entries: int = DetailsConfig.CACHE_MAX_ENTRIES):
+        self.base_url = base_url
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        # Bumped by clear(): a response fetched across a clear describes data from before it
+        self._generation = 0
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def endpoint(self) -> str:
+        return (self.base_url or os.getenv("BASE_API_URL")) + "/api/ai-search"
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=DetailsConfig.POOL_SIZE, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=DetailsConfig.TIMEOUT_SECONDS),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else None,
+            "entries": len(self._cache),
+        }
+
+    async def fetch(self, message: str) -> Dict[str, Any]:
+        key = normalize_query(message)
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl_seconds:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            count_cache("details", 1, 0)
+            return cached[1]
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            count_cache("details", 1, 0)
+            # wait() does not raise if the call is cancelled with the request that made it; retry then
+            await asyncio.wait({in_flight})
+            return in_flight.result() if not in_flight.cancelled() else await self.fetch(message)
+
+        self.misses += 1
+        count_cache("details", 0, 1)
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        generation = self._generation
+        try:
+            result = await self._post(message)
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._in_flight[key]
+
+        if "error" not in result and generation == self._generation:
+            self._store(key, result)
+        future.set_result(result)
+        return result
+
+    def clear(self, reason: str = "manual") -> None:
+        """Drop every cached response; calls in flight still complete but are not cached"""
+        self._generation += 1
+        self._cache.clear()
+        CACHE_INVALIDATIONS.inc(cache="details", reason=reason)
+
+    def _store(self, key: str, result: Dict[str, Any]) -> None:
+        self._cache[key] = (time.monotonic(), result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def _post(self, message: str) -> Dict[str, Any]:
+        try:
+            async with self._get_session().post(self.endpoint, json={"message": message}) as response:
+                if response.status == 200:
+                    return await response.json()
+                return {
+                    "error": f"API request failed with status {response.status}",
+                    "message": "Unable to fetch city information at this time"
+                }
+        except Exception as e:
+            return {
+                "error": str(e),
+                "message": "An error occurred while fetching city information"
+            }
+
+
+details_client = DetailsClient()
@@ -1,26 +1,72 @@
+import uuid
 import logging
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 
 from google.adk.agents import Agent
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService, Session
 from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
 from google.genai import types as adk_types
 
+from common.sessions import SessionStore
+
+from .answer_cache import AnswerCache, AnswerCacheConfig
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 A2A_APP_NAME = "nagar_chakshu_chatbot"
 
+# Lists longer than this in streamed tool payloads are sent as their length
+STREAM_MAX_LIST_ITEMS = 20
+
+
+def compact(value: Any) -> Any:
+    """Shrink a tool payload for streaming: long lists become counts"""
+    if isinstance(value, list):
+        return {"count": len(value)} if len(value) > STREAM_MAX_LIST_ITEMS else [compact(item) for item in value]
+    if isinstance(value, dict):
+        return {key: compact(item) for key, item in value.items()}
+    return value
+
+
+def event_payloads(event: Event) -> List[Dict[str, Any]]:
+    """The streamable parts of an ADK event: tool calls, tool results and text"""
+    payloads = []
+    for call in event.get_function_calls():
+        payloads.append({"type": "tool_call", "author": event.author, "name": call.name, "args": compact(call.args)})
+    for response in event.get_function_responses():
+        payloads.append({"type": "tool_result", "author": event.author, "name": response.name,
+                         "response": compact(response.response)})
+    text = "".join(part.text for part in (event.content.parts or []) if part.text) if event.content else ""
+    if text:
+        payloads.append({"type": "text", "author": event.author, "text": text, "partial": bool(event.partial),
+                         "final": event.is_final_response()})
+    return payloads
+
+
+def event_text(event: Event) -> Optional[str]:
+    if event.content and event.content.parts:
+        return event.content.parts[0].text
+    return None
+
+
+def tool_failed(event: Event) -> bool:
+    """Whether a tool result in the event reports an error"""
+    return any(isinstance(response.response, dict) and "error" in response.response
+               for response in event.get_function_responses())
+
 class TaskManager:
     """Task Manager for the Nagar chakshu chatbot  A2A mode."""
 
     def __init__(self, agent: Agent):
         self.agent = agent
 
-        # Initialize ADK services
-        self.session_service = InMemorySessionService()
+        # Initialize ADK services; sessions are reused per client session id and evicted when idle
+        self.sessions = SessionStore(A2A_APP_NAME)
+        self.session_service = self.sessions.service
         self.artifact_service = InMemoryArtifactService()
 
         # Create the runner
@@ -31,6 +77,9 @@ class TaskManager:
             artifact_service=self.artifact_service
         )
 
+        # Answers reused for repeated questions until the next pipeline run; None when disabled
+        self.answer_cache = AnswerCache() if AnswerCacheConfig.ENABLED else None
+
     async def process_task(self, message: str, context: Dict[str, Any], session_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Process an A2A task request by running the agent.
@@ -43,39 +92,34 @@ class TaskManager:
         Returns:
             Response dictionary.
         """
-        # Use provided session ID or generate one
-        session_id = session_id or "session-abc"
-        user_id = context.get("user_id", "user-abc")
-
         try:
-            session = await self.session_service.create_session(
-            app_name=A2A_APP_NAME,
-            user_id=user_id,
-            state={"initial_key": "initial_value"} # State can be initialized
-         )
-
-            # Create user message content
-            request_content = adk_types.Content(role="user", parts=[adk_types.Part(text=message)])
-
-            # Run the agent asynchronously
-            events_async = self.runner.run_async(
-                user_id=user_id,
-                session_id=session.id,
-                new_message=request_content
-            )
-
-            raw_events = []
-            async for event in events_async:
-                raw_events.append(event.model_dump(exclude_none=True))
-                
-            # Final response
-            final_raw_event = raw_events[len(raw_events) - 1] if raw_events else {}
-            final_response = final_raw_event['content']['parts'][0]['text'] if 'content' in final_raw_event else "No response generated"
-
+            session, cached = await self._lookup(message, context, session_id)
+            if cached is not None:
+                return {
+                    "message": f"Answered from cache (similarity {cached['similarity']}, {cached['age_seconds']}s old)",
+                    "status": "success",
+                    "final_response": cached["answer"],
+                }
+
+            # Only the last event is kept: its text is the response
+            standalone = not session.events
+            generation = self.answer_cache.generation if self.answer_cache is not None else None
+            event_count = 0
+            last_event = None
+            failed = False
+            async for event in self._agent_events(message, session):
+                event_count += 1
+                last_event = event
+                failed = failed or tool_failed(event)
+
+            final_response = event_text(last_event) if last_event is not None else None
+            # Only answers to a conversation's first question stand on their own; follow-ups depend on history
+            if standalone and not failed and final_response and self.answer_cache is not None:
+                self.answer_cache.put(message, final_response, generation)
             return {
-                "message": f"{len(raw_events)} events processed",
+                "message": f"{event_count} events processed",
                 "status": "success",
-                "final_response": final_response,
+                "final_response": final_response or "No response generated",
             }
 
         except Exception as e:
@@ -85,3 +129,84 @@ class TaskManager:
                 "status": "error",
                 "data": {"error_type": type(e).__name__}
             }
+
+    async def _lookup(self, message: str, context: Dict[str, Any],
+                      session_id: Optional[str]) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """
+        The client's session, and the cached answer to the message if there
+        is one. Only a conversation's first question is looked up, as put()
+        only stores answers to first questions: a follow-up depends on the
+        turns before it. A cached answer is added to the session as the turn
+        it replaces, so later questions in the conversation still see it.
+        """
+        session = await self.sessions.get_or_create(
+            context.get("user_id", "user-abc"),
+            session_id,
+            state={"initial_key": "initial_value"} # State for new sessions
+        )
+        standalone = not session.events
+        cached = self.answer_cache.get(message) if standalone and self.answer_cache is not None else None
+        if cached is not None:
+            invocation_id = f"e-{uuid.uuid4()}"
+            for author, role, text in (("user", "user", message), (self.agent.name, "model", cached["answer"])):
+                await self.session_service.append_event(session, Event(
+                    invocation_id=invocation_id,
+                    author=author,
+                    content=adk_types.Content(role=role, parts=[adk_types.Part(text=text)]),
+                ))
+        return session, cached
+
+    async def _agent_events(self, message: str, session: Any, streaming: bool = False) -> AsyncIterator[Event]:
+        """Run the agent on a message in the client's session and yield its events as they come"""
+        # Create user message content
+        request_content = adk_types.Content(role="user", parts=[adk_types.Part(text=message)])
+
+        # With streaming, model text also arrives as partial events while it is generated
+        run_config = RunConfig(streaming_mode=StreamingMode.SSE) if streaming else None
+        async for event in self.runner.run_async(
+            user_id=session.user_id,
+            session_id=session.id,
+            new_message=request_content,
+            run_config=run_config,
+        ):
+            yield event
+
+    async def stream_task(self, message: str, context: Dict[str, Any],
+                          session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run a task like process_task, yielding tool calls, tool results and
+        (partial) text as each ADK event arrives. Nothing is kept once
+        yielded. The last event has type "done" (with the same message,
+        status and final_response as process_task) or "error".
+        """
+        event_count = 0
+        final_response = None
+        try:
+            session, cached = await self._lookup(message, context, session_id)
+            if cached is not None:
+                yield {"type": "text", "author": self.agent.name, "text": cached["answer"], "partial": False,
+                       "final": True}
+                yield {"type": "done", "status": "success", "final_response": cached["answer"],
+                       "message": f"Answered from cache (similarity {cached['similarity']}, "
+                                  f"{cached['age_seconds']}s old)"}
+                return
+
+            standalone = not session.events
+            generation = self.answer_cache.generation if self.answer_cache is not None else None
+            failed = False
+            async for event in self._agent_events(message, session, streaming=True):
+                event_count += 1
+                failed = failed or tool_failed(event)
+                for payload in event_payloads(event):
+                    if payload["type"] == "text" and not payload["partial"]:
+                        final_response = payload["text"]
+                    yield payload
+        except Exception as e:
+            logger.exception("Failed to stream task")
+            yield {"type": "error", "status": "error", "message": f"Error processing your request: {str(e)}",
+                   "error_type": type(e).__name__}
+            return
+        if standalone and not failed and final_response and self.answer_cache is not None:
+            self.answer_cache.put(message, final_response, generation)
+        yield {"type": "done", "status": "success", "message": f"{event_count} events processed",
+               "final_response": final_response or "No response generated"}
@@ -4,9 +4,11 @@ import inspect
 from typing import Dict, Any, Callable, Optional
 
 from fastapi import FastAPI, Body
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
+from .metrics import REGISTRY
+
 class AgentRequest(BaseModel):
     """Standard A2A agent request format."""
     message: str = Field(..., description="The message to process")
@@ -39,7 +41,7 @@ def create_agent_server(
     # Generate agent.json metadata
     agent_json_path = os.path.join(well_known_path, "agent.json")
     if not os.path.exists(agent_json_path):
-        endpoint_names = ["run"]
+        endpoint_names = ["run", "run/stream", "metrics"]
         if endpoints:
             endpoint_names.extend(endpoints.keys())
         
@@ -75,12 +77,32 @@ def create_agent_server(
                 }
             )
 
+    # Streaming variant of /run: each event is sent as a server-sent event as soon as it happens
+    @app.post("/run/stream")
+    async def run_stream(request: AgentRequest = Body(...)):
+        async def events():
+            try:
+                async for event in task_manager.stream_task(request.message, request.context, request.session_id):
+                    yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+            except Exception as e:
+                error = {"type": "error", "status": "error", "message": f"Error processing request: {str(e)}"}
+                yield f"event: error\ndata: {json.dumps(error)}\n\n"
+
+        # no-cache and X-Accel-Buffering keep proxies from holding events back
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
     # Serve agent metadata
     @app.get("/.well-known/agent.json")
     async def get_metadata():
         with open(agent_json_path, "r") as f:
             return JSONResponse(content=json.load(f))
 
+    # Prometheus scrape endpoint
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
     # Register custom endpoints if any
     if endpoints:
         for path, handler in endpoints.items():